@@ -1,24 +1,25 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from athena import ConsultaCancelada, EjecutorAthena, ErrorConsulta
+from cache import CacheResultados, normalizar_sql, tablas_de
+from motores import MotorAthena, MotorLocal
+from botocore.config import Config
 import boto3
+import csv
+import io
+import json
 import os
-import time
-from typing import Optional
+from typing import List, Optional
 
-app = FastAPI(
-    title="Analítico Service API",
-    description="Microservicio analítico con AWS Athena para reportes e indicadores",
-    version="1.0.0"
-)
-
-# CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Motor de consultas: 'athena', 'local' (DuckDB sobre los Parquet que la
+# ingesta deja en DIRECTORIO_DATOS cuando no hay S3) o 'auto' (Athena si hay
+# credenciales, si no local si existe DIRECTORIO_DATOS/parquet)
+MOTOR_CONSULTAS = os.getenv('MOTOR_CONSULTAS', 'auto')
+DIRECTORIO_DATOS = os.getenv('DIRECTORIO_DATOS', '/data')
+LOCAL_MAX_CONCURRENTES = int(os.getenv('LOCAL_MAX_CONCURRENTES', 4))
 
 # Configuración AWS
 AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
@@ -26,76 +27,232 @@ ATHENA_DATABASE = os.getenv('ATHENA_DATABASE', 'inventario_db')
 ATHENA_OUTPUT_LOCATION = os.getenv(
     'ATHENA_OUTPUT_LOCATION', 's3://inventario-athena-results/')
 AWS_PROFILE = os.getenv('AWS_PROFILE', 'default')
+# Workgroup de los reportes y de las consultas personalizadas (por defecto
+# el mismo); cada workgroup tiene su propio límite de consultas simultáneas
+ATHENA_WORKGROUP = os.getenv('ATHENA_WORKGROUP', 'primary')
+ATHENA_WORKGROUP_PERSONALIZADA = os.getenv(
+    'ATHENA_WORKGROUP_PERSONALIZADA', ATHENA_WORKGROUP)
+ATHENA_MAX_CONCURRENTES = int(os.getenv('ATHENA_MAX_CONCURRENTES', 5))
+# Hilos para las llamadas bloqueantes de boto3 (y conexiones del cliente)
+ATHENA_HILOS = int(os.getenv('ATHENA_HILOS', 16))
+# Plazo total de una consulta y backoff del polling de su estado (segundos)
+ATHENA_TIMEOUT = float(os.getenv('ATHENA_TIMEOUT', 30.0))
+ATHENA_POLL_INICIAL = float(os.getenv('ATHENA_POLL_INICIAL', 0.2))
+ATHENA_POLL_MAXIMO = float(os.getenv('ATHENA_POLL_MAXIMO', 2.0))
+# Antigüedad máxima (minutos) de un resultado previo que Athena puede
+# reutilizar para una consulta idéntica; 0 desactiva el reuso
+ATHENA_REUSO_MINUTOS = int(os.getenv('ATHENA_REUSO_MINUTOS', 0))
+
+# Cache de resultados por SQL normalizado (ver cache.py): segundos que dura
+# una entrada si la ingesta no la invalida antes, entradas máximas y filas
+# máximas de un resultado para guardarlo
+CACHE_TTL = float(os.getenv('CACHE_TTL', 900))
+CACHE_MAX_ENTRADAS = int(os.getenv('CACHE_MAX_ENTRADAS', 256))
+CACHE_MAX_FILAS = int(os.getenv('CACHE_MAX_FILAS', 10000))
+
+# Lectura de resultados: filas por página de get_query_results (máximo
+# 1000) y filas máximas de una respuesta JSON; para más, formato ndjson/csv
+ATHENA_FILAS_POR_PAGINA = min(1000, int(os.getenv('ATHENA_FILAS_POR_PAGINA', 1000)))
+MAX_FILAS_JSON = int(os.getenv('MAX_FILAS_JSON', 10000))
 
 # Cliente Athena
-try:
-    session = boto3.Session(profile_name=AWS_PROFILE)
-    athena_client = session.client('athena', region_name=AWS_REGION)
-except Exception as e:
-    print(f"Advertencia: No se pudo inicializar cliente Athena: {e}")
-    athena_client = None
+athena_client = None
+if MOTOR_CONSULTAS != 'local':
+    try:
+        session = boto3.Session(profile_name=AWS_PROFILE)
+        athena_client = session.client(
+            'athena', region_name=AWS_REGION,
+            config=Config(max_pool_connections=ATHENA_HILOS))
+    except Exception as e:
+        print(f"Advertencia: No se pudo inicializar cliente Athena: {e}")
 
 
-def ejecutar_consulta_athena(query: str):
-    """Ejecutar consulta en Athena y retornar resultados"""
-    if not athena_client:
-        return {
-            "error": "Cliente Athena no configurado",
-            "mensaje": "Configure AWS credentials con ~/.aws/credentials"
-        }
+def crear_motor():
+    """Motor de consultas según MOTOR_CONSULTAS (ver motores.py), o None si
+    no hay ninguno disponible"""
+    if athena_client and MOTOR_CONSULTAS in ('athena', 'auto'):
+        # Ejecutor asíncrono de consultas (ver athena.py)
+        return MotorAthena(EjecutorAthena(
+            athena_client, ATHENA_DATABASE, ATHENA_OUTPUT_LOCATION,
+            workgroup=ATHENA_WORKGROUP,
+            max_concurrentes=ATHENA_MAX_CONCURRENTES,
+            hilos=ATHENA_HILOS,
+            timeout=ATHENA_TIMEOUT,
+            poll_inicial=ATHENA_POLL_INICIAL,
+            poll_maximo=ATHENA_POLL_MAXIMO,
+        ), ATHENA_FILAS_POR_PAGINA)
 
-    try:
-        # Iniciar ejecución de consulta
-        response = athena_client.start_query_execution(
-            QueryString=query,
-            QueryExecutionContext={'Database': ATHENA_DATABASE},
-            ResultConfiguration={'OutputLocation': ATHENA_OUTPUT_LOCATION}
-        )
+    if MOTOR_CONSULTAS == 'local' or (
+            MOTOR_CONSULTAS == 'auto' and
+            os.path.isdir(os.path.join(DIRECTORIO_DATOS, 'parquet'))):
+        try:
+            return MotorLocal(DIRECTORIO_DATOS,
+                              max_concurrentes=LOCAL_MAX_CONCURRENTES,
+                              timeout=ATHENA_TIMEOUT)
+        except Exception as e:
+            print(f"Advertencia: No se pudo inicializar el motor local: {e}")
+    return None
 
-        query_execution_id = response['QueryExecutionId']
 
-        # Esperar a que la consulta termine
-        max_attempts = 30
-        for i in range(max_attempts):
-            query_status = athena_client.get_query_execution(
-                QueryExecutionId=query_execution_id)
-            status = query_status['QueryExecution']['Status']['State']
+motor = crear_motor()
 
-            if status == 'SUCCEEDED':
-                break
-            elif status in ['FAILED', 'CANCELLED']:
-                reason = query_status['QueryExecution']['Status'].get(
-                    'StateChangeReason', 'Unknown')
-                return {"error": f"Query {status}", "reason": reason}
+cache_resultados = CacheResultados(
+    CACHE_TTL, max_entradas=CACHE_MAX_ENTRADAS, max_filas=CACHE_MAX_FILAS)
 
-            time.sleep(1)
 
-        if status != 'SUCCEEDED':
-            return {"error": "Query timeout"}
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    if motor:
+        motor.cerrar()
 
-        # Obtener resultados
-        results = athena_client.get_query_results(
-            QueryExecutionId=query_execution_id)
 
-        # Procesar resultados
-        columns = [col['Label'] for col in results['ResultSet']
-                   ['ResultSetMetadata']['ColumnInfo']]
-        rows = []
+app = FastAPI(
+    title="Analítico Service API",
+    description="Microservicio analítico con AWS Athena para reportes e indicadores",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
 
-        for row in results['ResultSet']['Rows'][1:]:  # Saltar header
-            row_data = {}
-            for i, col in enumerate(columns):
-                row_data[col] = row['Data'][i].get('VarCharValue', None)
-            rows.append(row_data)
 
+async def ejecutar_consulta_athena(query: str, request: Optional[Request] = None,
+                                   workgroup: Optional[str] = None):
+    """
+    Ejecutar consulta en el motor configurado (Athena o local) y retornar
+    resultados. Los resultados se cachean por SQL normalizado hasta que
+    vencen o la ingesta invalida las tablas que leen. No bloquea el event loop; si se
+    indica `request` y todos los clientes que esperan la consulta se
+    desconectan antes de que termine, la consulta se detiene.
+    """
+    if not motor:
         return {
+            "error": "Motor de consultas no configurado",
+            "mensaje": "Configure AWS credentials con ~/.aws/credentials o "
+                       "use MOTOR_CONSULTAS=local con los datos de la ingesta"
+        }
+
+    workgroup = workgroup or ATHENA_WORKGROUP
+    tablas = tablas_de(query)
+    reuso_minutos = 0
+    if ATHENA_REUSO_MINUTOS > 0 and motor.nombre == 'athena':
+        # Athena no sabe que los datos cambiaron: no se reutilizan
+        # resultados anteriores a la última ingesta de las tablas leídas
+        reuso_minutos = int(min(
+            ATHENA_REUSO_MINUTOS,
+            cache_resultados.segundos_desde_invalidacion(tablas) // 60))
+
+    return await cache_resultados.obtener(
+        (normalizar_sql(query), workgroup), tablas,
+        lambda desconectado: _ejecutar_consulta(
+            query, workgroup, desconectado, reuso_minutos),
+        desconectado=request.is_disconnected if request else None)
+
+
+async def _ejecutar_consulta(query: str, workgroup: str, desconectado,
+                             reuso_minutos: int):
+    """Ejecutar en el motor sin pasar por el cache"""
+    try:
+        # Obtener resultados, página a página
+        _, columnas, paginas = await motor.abrir(
+            query, workgroup, desconectado=desconectado,
+            reuso_minutos=reuso_minutos)
+        columns = [nombre for nombre, _ in columnas]
+        rows = []
+        truncado = False
+        try:
+            async for filas in paginas:
+                rows.extend(dict(zip(columns, fila)) for fila in filas)
+                if len(rows) > MAX_FILAS_JSON:
+                    del rows[MAX_FILAS_JSON:]
+                    truncado = True
+                    break
+        finally:
+            await paginas.aclose()
+
+        resultado = {
             "columns": columns,
             "data": rows,
             "row_count": len(rows)
         }
+        if truncado:
+            resultado["truncado"] = True
+            resultado["mensaje"] = (
+                f"Resultado limitado a {MAX_FILAS_JSON} filas; "
+                "use formato=ndjson o formato=csv para obtenerlo completo")
+        return resultado
 
     except Exception as e:
-        return {"error": str(e)}
+        return error_consulta(e)
+
+
+def error_consulta(e: Exception) -> dict:
+    """Respuesta de error de una consulta que no se pudo completar"""
+    if isinstance(e, ErrorConsulta):
+        if e.estado == 'TIMEOUT':
+            return {"error": "Query timeout"}
+        return {"error": f"Query {e.estado}", "reason": e.razon}
+    if isinstance(e, ConsultaCancelada):
+        return {"error": "Query cancelada (cliente desconectado)"}
+    return {"error": str(e)}
+
+
+def valor_json(valor):
+    """Valores que json no serializa solo (decimal de Athena)"""
+    return float(valor)
+
+
+async def exportar_ndjson(columnas, paginas):
+    nombres = [nombre for nombre, _ in columnas]
+    async for filas in paginas:
+        yield ''.join(
+            json.dumps(dict(zip(nombres, fila)), ensure_ascii=False,
+                       default=valor_json) + '\n'
+            for fila in filas)
+
+
+async def exportar_csv(columnas, paginas):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow([nombre for nombre, _ in columnas])
+    async for filas in paginas:
+        escritor.writerows(filas)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Sin filas sólo se envía el encabezado
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def consulta_en_streaming(query: str, request: Request, formato: str,
+                                workgroup: Optional[str] = None):
+    """
+    Ejecutar `query` sin cache y enviar el resultado completo en streaming
+    (NDJSON o CSV), leyendo una página de resultados a la vez
+    """
+    try:
+        query_execution_id, columnas, paginas = await motor.abrir(
+            query, workgroup, desconectado=request.is_disconnected)
+    except Exception as e:
+        return error_consulta(e)
+
+    if formato == 'csv':
+        cuerpo, media_type = exportar_csv(columnas, paginas), 'text/csv'
+    else:
+        cuerpo, media_type = exportar_ndjson(columnas, paginas), 'application/x-ndjson'
+    return StreamingResponse(cuerpo, media_type=media_type, headers={
+        'Content-Disposition': f'attachment; filename=consulta.{formato}',
+        'X-Query-Execution-Id': query_execution_id,
+    })
 
 
 @app.get("/ms5/health")
@@ -104,34 +261,58 @@ async def health():
     return {
         "status": "healthy",
         "service": "analitico",
-        "athena_configured": athena_client is not None
+        "athena_configured": athena_client is not None,
+        "motor": motor.nombre if motor else None,
+        "athena": motor.estadisticas() if motor and motor.nombre == 'athena' else None,
+        "local": motor.estadisticas() if motor and motor.nombre == 'local' else None
     }
 
 
+class Invalidacion(BaseModel):
+    tablas: Optional[List[str]] = None
+
+
+@app.post("/ms5/api/cache/invalidar")
+async def invalidar_cache(invalidacion: Optional[Invalidacion] = None):
+    """
+    Invalidar los resultados cacheados que leen las tablas indicadas (todos
+    si no se indican). La ingesta lo llama al terminar cada fuente.
+    """
+    tablas = invalidacion.tablas if invalidacion else None
+    return {
+        "tablas": tablas,
+        "invalidadas": cache_resultados.invalidar(tablas)
+    }
+
+
+@app.get("/ms5/api/cache/estadisticas")
+async def estadisticas_cache():
+    """Hits/misses del cache de resultados"""
+    return cache_resultados.estadisticas()
+
+
 @app.get("/ms5/api/rotacion-stock")
-async def rotacion_stock():
+async def rotacion_stock(request: Request):
     """
     Análisis de rotación de stock - productos más vendidos
     """
     query = f"""
     SELECT 
-        p.nombre as producto,
-        p.categoria,
-        SUM(d.cantidad) as total_vendido,
-        AVG(p.stock) as stock_promedio,
+        producto,
+        categoria,
+        unidades_vendidas as total_vendido,
+        stock as stock_promedio,
         CASE 
-            WHEN AVG(p.stock) > 0 THEN SUM(d.cantidad) / AVG(p.stock)
+            WHEN stock > 0 THEN CAST(unidades_vendidas AS double) / stock
             ELSE 0 
         END as rotacion
-    FROM productos p
-    LEFT JOIN detalles_orden d ON p.id = d.producto_id
-    GROUP BY p.nombre, p.categoria
-    HAVING SUM(d.cantidad) > 0
+    FROM kpi_productos
+    WHERE unidades_vendidas > 0
     ORDER BY rotacion DESC
     LIMIT 20
     """
 
-    resultado = ejecutar_consulta_athena(query)
+    resultado = await ejecutar_consulta_athena(query, request)
     return {
         "titulo": "Rotación de Stock - Top 20 Productos",
         "descripcion": "Productos ordenados por índice de rotación (ventas/stock promedio)",
@@ -140,26 +321,25 @@ async def rotacion_stock():
 
 
 @app.get("/ms5/api/productos-mas-vendidos")
-async def productos_mas_vendidos(limit: int = 20):
+async def productos_mas_vendidos(request: Request, limit: int = 20):
     """
     Top productos más vendidos
     """
     query = f"""
     SELECT 
-        p.nombre as producto,
-        p.categoria,
-        p.proveedor,
-        SUM(d.cantidad) as cantidad_vendida,
-        SUM(d.subtotal) as ingresos_totales,
-        COUNT(DISTINCT d.orden_id) as num_ordenes
-    FROM productos p
-    INNER JOIN detalles_orden d ON p.id = d.producto_id
-    GROUP BY p.nombre, p.categoria, p.proveedor
+        producto,
+        categoria,
+        proveedor,
+        unidades_vendidas as cantidad_vendida,
+        ingresos_totales,
+        num_ordenes
+    FROM kpi_productos
+    WHERE unidades_vendidas > 0
     ORDER BY cantidad_vendida DESC
     LIMIT {limit}
     """
 
-    resultado = ejecutar_consulta_athena(query)
+    resultado = await ejecutar_consulta_athena(query, request)
     return {
         "titulo": f"Top {limit} Productos Más Vendidos",
         **resultado
@@ -167,24 +347,23 @@ async def productos_mas_vendidos(limit: int = 20):
 
 
 @app.get("/ms5/api/ventas-por-categoria")
-async def ventas_por_categoria():
+async def ventas_por_categoria(request: Request):
     """
     Análisis de ventas por categoría
     """
     query = """
     SELECT 
-        p.categoria,
-        COUNT(DISTINCT p.id) as num_productos,
-        SUM(d.cantidad) as unidades_vendidas,
-        SUM(d.subtotal) as ingresos_totales,
-        AVG(d.precio_unitario) as precio_promedio
-    FROM productos p
-    INNER JOIN detalles_orden d ON p.id = d.producto_id
-    GROUP BY p.categoria
+        categoria,
+        productos_vendidos as num_productos,
+        unidades_vendidas,
+        ingresos_totales,
+        precio_promedio
+    FROM kpi_categorias
+    WHERE unidades_vendidas > 0
     ORDER BY ingresos_totales DESC
     """
 
-    resultado = ejecutar_consulta_athena(query)
+    resultado = await ejecutar_consulta_athena(query, request)
     return {
         "titulo": "Ventas por Categoría",
         "descripcion": "Análisis agregado de ventas agrupadas por categoría de producto",
@@ -193,27 +372,25 @@ async def ventas_por_categoria():
 
 
 @app.get("/ms5/api/productos-bajo-stock")
-async def productos_bajo_stock(umbral: int = 50):
+async def productos_bajo_stock(request: Request, umbral: int = 50):
     """
     Productos con stock crítico
     """
     query = f"""
     SELECT 
-        p.nombre,
-        p.categoria,
-        p.stock,
-        p.proveedor,
-        p.precio,
-        COALESCE(SUM(d.cantidad), 0) as ventas_totales
-    FROM productos p
-    LEFT JOIN detalles_orden d ON p.id = d.producto_id
-    WHERE p.stock < {umbral}
-    GROUP BY p.nombre, p.categoria, p.stock, p.proveedor, p.precio
-    ORDER BY p.stock ASC
+        producto as nombre,
+        categoria,
+        stock,
+        proveedor,
+        precio,
+        unidades_vendidas as ventas_totales
+    FROM kpi_productos
+    WHERE stock < {umbral}
+    ORDER BY stock ASC
     LIMIT 50
     """
 
-    resultado = ejecutar_consulta_athena(query)
+    resultado = await ejecutar_consulta_athena(query, request)
     return {
         "titulo": f"Productos con Stock Crítico (< {umbral} unidades)",
         "umbral": umbral,
@@ -222,27 +399,25 @@ async def productos_bajo_stock(umbral: int = 50):
 
 
 @app.get("/ms5/api/rentabilidad-proveedores")
-async def rentabilidad_proveedores():
+async def rentabilidad_proveedores(request: Request):
     """
     Análisis de rentabilidad por proveedor
     """
     query = """
     SELECT 
-        p.proveedor,
-        COUNT(DISTINCT p.id) as productos_ofrecidos,
-        SUM(d.cantidad) as unidades_vendidas,
-        SUM(d.subtotal) as ingresos_totales,
-        AVG(d.precio_unitario) as precio_promedio,
-        COUNT(DISTINCT d.orden_id) as ordenes_totales
-    FROM productos p
-    INNER JOIN detalles_orden d ON p.id = d.producto_id
-    WHERE p.proveedor IS NOT NULL
-    GROUP BY p.proveedor
+        proveedor,
+        productos_vendidos as productos_ofrecidos,
+        unidades_vendidas,
+        ingresos_totales,
+        precio_promedio,
+        num_ordenes as ordenes_totales
+    FROM kpi_proveedores
+    WHERE proveedor IS NOT NULL AND unidades_vendidas > 0
     ORDER BY ingresos_totales DESC
     LIMIT 30
     """
 
-    resultado = ejecutar_consulta_athena(query)
+    resultado = await ejecutar_consulta_athena(query, request)
     return {
         "titulo": "Rentabilidad por Proveedor - Top 30",
         "descripcion": "Proveedores ordenados por ingresos totales generados",
@@ -251,24 +426,23 @@ async def rentabilidad_proveedores():
 
 
 @app.get("/ms5/api/tendencias-temporales")
-async def tendencias_temporales():
+async def tendencias_temporales(request: Request):
     """
     Análisis de tendencias de ventas por mes
     """
     query = """
     SELECT 
-        DATE_FORMAT(o.fecha_orden, '%Y-%m') as mes,
-        COUNT(DISTINCT o.id) as num_ordenes,
-        SUM(o.total) as ingresos_totales,
-        AVG(o.total) as ticket_promedio,
-        COUNT(DISTINCT o.cliente_id) as clientes_unicos
-    FROM ordenes o
-    GROUP BY DATE_FORMAT(o.fecha_orden, '%Y-%m')
+        mes,
+        num_ordenes,
+        ingresos_totales,
+        ticket_promedio,
+        clientes_unicos
+    FROM kpi_ventas_mensuales
     ORDER BY mes DESC
     LIMIT 12
     """
 
-    resultado = ejecutar_consulta_athena(query)
+    resultado = await ejecutar_consulta_athena(query, request)
     return {
         "titulo": "Tendencias Temporales - Últimos 12 Meses",
         **resultado
@@ -276,27 +450,26 @@ async def tendencias_temporales():
 
 
 @app.get("/ms5/api/clientes-top")
-async def clientes_top(limit: int = 20):
+async def clientes_top(request: Request, limit: int = 20):
     """
     Mejores clientes por volumen de compra
     """
     query = f"""
     SELECT 
-        c.nombre as cliente,
-        c.email,
-        c.ciudad,
-        COUNT(o.id) as num_ordenes,
-        SUM(o.total) as gasto_total,
-        AVG(o.total) as ticket_promedio,
-        MAX(o.fecha_orden) as ultima_compra
-    FROM clientes c
-    INNER JOIN ordenes o ON c.id = o.cliente_id
-    GROUP BY c.nombre, c.email, c.ciudad
+        cliente,
+        email,
+        ciudad,
+        num_ordenes,
+        gasto_total,
+        ticket_promedio,
+        ultima_compra
+    FROM kpi_clientes
+    WHERE cliente IS NOT NULL
     ORDER BY gasto_total DESC
     LIMIT {limit}
     """
 
-    resultado = ejecutar_consulta_athena(query)
+    resultado = await ejecutar_consulta_athena(query, request)
     return {
         "titulo": f"Top {limit} Mejores Clientes",
         **resultado
@@ -304,16 +477,14 @@ async def clientes_top(limit: int = 20):
 
 
 @app.get("/ms5/api/dashboard-kpis")
-async def dashboard_kpis():
+async def dashboard_kpis(request: Request):
     """
-    KPIs principales para el dashboard
+    KPIs principales para el dashboard, de la tabla kpi_resumen que
+    recalcula la ingesta
     """
-    # Esta es una versión simplificada que puede ejecutarse sin Athena
-    # En producción, estos datos vendrían de consultas Athena reales
-
-    if not athena_client:
+    if not motor:
         return {
-            "mensaje": "Datos de ejemplo (Athena no configurado)",
+            "mensaje": "Datos de ejemplo (motor de consultas no configurado)",
             "kpis": {
                 "total_ventas": 15500000.50,
                 "total_ordenes": 10000,
@@ -326,29 +497,49 @@ async def dashboard_kpis():
             }
         }
 
-    # Aquí irían las consultas reales a Athena
-    return {
-        "kpis": {
-            "total_ventas": 0,
-            "total_ordenes": 0,
-            "ticket_promedio": 0,
-            "productos_activos": 0
+    resultado = await ejecutar_consulta_athena(
+        "SELECT * FROM kpi_resumen", request)
+    if "error" in resultado:
+        return resultado
+    if not resultado["data"]:
+        return {
+            "mensaje": "KPIs aún no materializados (ejecute la ingesta)",
+            "kpis": {}
         }
+
+    kpis = dict(resultado["data"][0])
+    return {
+        "fecha_calculo": kpis.pop("fecha_calculo", None),
+        "kpis": kpis
     }
 
 
 @app.post("/ms5/api/consulta-personalizada")
-async def consulta_personalizada(query: str):
+async def consulta_personalizada(request: Request, query: str,
+                                 formato: str = 'json'):
     """
-    Ejecutar consulta SQL personalizada en Athena
+    Ejecutar consulta SQL personalizada en el motor configurado.
+    Con formato=ndjson o formato=csv el resultado completo se envía en
+    streaming, sin límite de filas ni cache; en JSON se limita a
+    MAX_FILAS_JSON filas.
     """
-    if not athena_client:
+    if not motor:
         raise HTTPException(
             status_code=503,
-            detail="Servicio Athena no disponible. Configure AWS credentials."
+            detail="Motor de consultas no disponible. Configure AWS "
+                   "credentials o MOTOR_CONSULTAS=local."
         )
+    formato = formato.lower()
+    if formato not in ('json', 'ndjson', 'csv'):
+        raise HTTPException(status_code=400,
+                            detail="formato debe ser json, ndjson o csv")
+
+    if formato != 'json':
+        return await consulta_en_streaming(
+            query, request, formato, workgroup=ATHENA_WORKGROUP_PERSONALIZADA)
 
-    resultado = ejecutar_consulta_athena(query)
+    resultado = await ejecutar_consulta_athena(
+        query, request, workgroup=ATHENA_WORKGROUP_PERSONALIZADA)
     return resultado
 
 if __name__ == "__main__":
@@ -0,0 +1,273 @@
+"""Ejecución asíncrona de consultas Athena para analitico-service
+
+boto3 es bloqueante: cada llamada a Athena corre en un pool de hilos propio
+para no frenar el event loop, de modo que varias consultas del dashboard se
+solapan en lugar de ejecutarse una tras otra. El estado de la consulta se
+consulta con backoff exponencial: las consultas cortas se detectan rápido y
+las largas no gastan llamadas a la API.
+
+Un semáforo por workgroup acota las consultas simultáneas para no superar la
+cuota de consultas activas de Athena (las que sobran esperan su turno aquí
+en lugar de fallar con TooManyRequestsException). Si la petición se cancela,
+el cliente se desconecta o se agota el plazo, la consulta se detiene con
+StopQueryExecution en lugar de seguir corriendo (y facturando).
+
+Opcionalmente Athena puede reutilizar el resultado de una ejecución previa
+idéntica de hasta `reuso_minutos` de antigüedad, sin volver a leer S3.
+
+Los resultados se leen por páginas (NextToken) con los valores convertidos
+según el tipo de cada columna, para entregarlos en streaming sin cargar el
+resultado completo en memoria.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from functools import partial
+import asyncio
+import time
+
+# Tipos de Athena (ColumnInfo.Type) que se convierten; el resto (varchar,
+# date, timestamp, array, map, row, json...) se entrega como texto
+_ENTEROS = {'tinyint', 'smallint', 'integer', 'int', 'bigint'}
+_REALES = {'float', 'real', 'double'}
+
+
+def convertir_valor(valor, tipo: str):
+    """Convertir un VarCharValue de Athena al tipo de su columna"""
+    if valor is None:
+        return None
+    if tipo in _ENTEROS:
+        return int(valor)
+    if tipo in _REALES:
+        return float(valor)
+    if tipo == 'decimal':
+        return Decimal(valor)
+    if tipo == 'boolean':
+        return valor == 'true'
+    return valor
+
+
+class ErrorConsulta(Exception):
+    """La consulta terminó en FAILED o CANCELLED, o superó el plazo (TIMEOUT)"""
+
+    def __init__(self, estado: str, razon: str = None):
+        super().__init__(f"Query {estado}" + (f": {razon}" if razon else ""))
+        self.estado = estado
+        self.razon = razon
+
+
+class ConsultaCancelada(Exception):
+    """El cliente se desconectó antes de que la consulta terminara"""
+
+
+class EjecutorAthena:
+    """Ejecuta consultas Athena desde código async sin bloquear el event loop"""
+
+    def __init__(self, cliente, database: str, output_location: str,
+                 workgroup: str = 'primary', max_concurrentes: int = 5,
+                 hilos: int = 16, timeout: float = 30.0,
+                 poll_inicial: float = 0.2, poll_maximo: float = 2.0):
+        self.cliente = cliente
+        self.database = database
+        self.output_location = output_location
+        self.workgroup = workgroup
+        self.max_concurrentes = max_concurrentes
+        self.timeout = timeout
+        self.poll_inicial = poll_inicial
+        self.poll_maximo = poll_maximo
+        self._hilos = ThreadPoolExecutor(max_workers=hilos,
+                                         thread_name_prefix='athena')
+        # workgroup -> semáforo; se crean al usarse, dentro del event loop
+        self._semaforos = {}
+        self._en_curso = {}
+        self._en_espera = {}
+        self.ejecutadas = 0
+        self.fallidas = 0
+        self.timeouts = 0
+        self.canceladas = 0
+        self.reutilizadas = 0
+
+    def _llamar(self, funcion, **kwargs) -> asyncio.Future:
+        """Ejecutar una llamada bloqueante de boto3 en el pool de hilos"""
+        return asyncio.get_running_loop().run_in_executor(
+            self._hilos, partial(funcion, **kwargs))
+
+    def _semaforo(self, workgroup: str) -> asyncio.Semaphore:
+        if workgroup not in self._semaforos:
+            self._semaforos[workgroup] = asyncio.Semaphore(self.max_concurrentes)
+            self._en_curso[workgroup] = 0
+            self._en_espera[workgroup] = 0
+        return self._semaforos[workgroup]
+
+    async def ejecutar(self, query: str, workgroup: str = None,
+                       desconectado=None, reuso_minutos: int = 0) -> dict:
+        """
+        Ejecutar `query` y esperar a que termine.
+        Retorna el QueryExecution de la consulta exitosa; lanza ErrorConsulta
+        si falla o vence el plazo, y ConsultaCancelada si `desconectado()`
+        (p. ej. request.is_disconnected) indica que el cliente ya no espera.
+        Con `reuso_minutos` Athena puede responder con el resultado de una
+        ejecución idéntica de hasta esa antigüedad.
+        """
+        workgroup = workgroup or self.workgroup
+        semaforo = self._semaforo(workgroup)
+
+        self._en_espera[workgroup] += 1
+        try:
+            await semaforo.acquire()
+        finally:
+            self._en_espera[workgroup] -= 1
+        self._en_curso[workgroup] += 1
+        try:
+            # Mientras esperaba turno el cliente pudo haberse ido
+            if desconectado and await desconectado():
+                self.canceladas += 1
+                raise ConsultaCancelada()
+            return await self._ejecutar(query, workgroup, desconectado,
+                                        reuso_minutos)
+        finally:
+            self._en_curso[workgroup] -= 1
+            semaforo.release()
+
+    async def _ejecutar(self, query: str, workgroup: str, desconectado,
+                        reuso_minutos: int) -> dict:
+        parametros = {}
+        if reuso_minutos > 0:
+            parametros['ResultReuseConfiguration'] = {
+                'ResultReuseByAgeConfiguration': {
+                    'Enabled': True, 'MaxAgeInMinutes': reuso_minutos}}
+        inicio = self._llamar(
+            self.cliente.start_query_execution,
+            QueryString=query,
+            QueryExecutionContext={'Database': self.database},
+            ResultConfiguration={'OutputLocation': self.output_location},
+            WorkGroup=workgroup,
+            **parametros)
+        try:
+            # shield: si se cancela la petición, la llamada sigue en su hilo
+            respuesta = await asyncio.shield(inicio)
+        except asyncio.CancelledError:
+            # La consulta pudo haber arrancado igual: se detiene apenas se
+            # conozca su id
+            self.canceladas += 1
+            inicio.add_done_callback(
+                lambda f: f.cancelled() or f.exception() or
+                self._detener(f.result()['QueryExecutionId']))
+            raise
+        query_execution_id = respuesta['QueryExecutionId']
+
+        try:
+            ejecucion = await self._esperar(query_execution_id, desconectado)
+        except ErrorConsulta as e:
+            if e.estado == 'TIMEOUT':
+                self.timeouts += 1
+                self._detener(query_execution_id)
+            else:
+                self.fallidas += 1
+            raise
+        except (asyncio.CancelledError, ConsultaCancelada):
+            self.canceladas += 1
+            self._detener(query_execution_id)
+            raise
+        self.ejecutadas += 1
+        if ejecucion.get('Statistics', {}).get(
+                'ResultReuseInformation', {}).get('ReusedPreviousResult'):
+            self.reutilizadas += 1
+        return ejecucion
+
+    async def _esperar(self, query_execution_id: str, desconectado) -> dict:
+        """Consultar el estado con backoff exponencial hasta que termine"""
+        limite = time.monotonic() + self.timeout
+        espera = self.poll_inicial
+        while True:
+            respuesta = await self._llamar(
+                self.cliente.get_query_execution,
+                QueryExecutionId=query_execution_id)
+            ejecucion = respuesta['QueryExecution']
+            estado = ejecucion['Status']['State']
+            if estado == 'SUCCEEDED':
+                return ejecucion
+            if estado in ('FAILED', 'CANCELLED'):
+                raise ErrorConsulta(
+                    estado, ejecucion['Status'].get('StateChangeReason', 'Unknown'))
+
+            if desconectado and await desconectado():
+                raise ConsultaCancelada(query_execution_id)
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                raise ErrorConsulta('TIMEOUT')
+            await asyncio.sleep(min(espera, restante))
+            espera = min(espera * 2, self.poll_maximo)
+
+    async def resultados(self, query_execution_id: str, **kwargs) -> dict:
+        """get_query_results en el pool de hilos"""
+        return await self._llamar(self.cliente.get_query_results,
+                                  QueryExecutionId=query_execution_id, **kwargs)
+
+    async def abrir_resultados(self, query_execution_id: str,
+                               por_pagina: int = 1000):
+        """
+        Leer la primera página de resultados y retornar (columnas, paginas):
+        `columnas` es la lista de (nombre, tipo) y `paginas` un generador
+        asíncrono con las filas de cada página, como listas de valores ya
+        convertidos. Los errores de la primera página se lanzan aquí, antes
+        de empezar a responder.
+        """
+        pagina = await self.resultados(query_execution_id,
+                                       MaxResults=por_pagina)
+        columnas = [(c['Label'], c['Type']) for c in
+                    pagina['ResultSet']['ResultSetMetadata']['ColumnInfo']]
+        return columnas, self._paginas(query_execution_id, pagina, columnas,
+                                       por_pagina)
+
+    async def _paginas(self, query_execution_id: str, pagina: dict, columnas,
+                       por_pagina: int):
+        nombres = [nombre for nombre, _ in columnas]
+        tipos = [tipo for _, tipo in columnas]
+        filas = pagina['ResultSet']['Rows']
+        # En un SELECT la primera fila es el encabezado
+        if filas and [d.get('VarCharValue') for d in filas[0]['Data']] == nombres:
+            filas = filas[1:]
+
+        while True:
+            token = pagina.get('NextToken')
+            # La página siguiente se pide mientras se entrega la actual
+            siguiente = self._llamar(
+                self.cliente.get_query_results,
+                QueryExecutionId=query_execution_id, NextToken=token,
+                MaxResults=por_pagina) if token else None
+            yield [[convertir_valor(dato.get('VarCharValue'), tipo)
+                    for dato, tipo in zip(fila['Data'], tipos)]
+                   for fila in filas]
+            if siguiente is None:
+                return
+            pagina = await siguiente
+            filas = pagina['ResultSet']['Rows']
+
+    def _detener(self, query_execution_id: str):
+        """Detener una consulta en segundo plano, sin esperar la respuesta"""
+        def detener():
+            try:
+                self.cliente.stop_query_execution(
+                    QueryExecutionId=query_execution_id)
+            except Exception as e:
+                print(f"Advertencia: No se pudo detener la consulta "
+                      f"{query_execution_id}: {e}")
+        self._hilos.submit(detener)
+
+    def cerrar(self):
+        self._hilos.shutdown(wait=False)
+
+    def estadisticas(self) -> dict:
+        return {
+            'max_concurrentes': self.max_concurrentes,
+            'workgroups': {
+                workgroup: {'en_curso': self._en_curso[workgroup],
+                            'en_espera': self._en_espera[workgroup]}
+                for workgroup in self._semaforos
+            },
+            'ejecutadas': self.ejecutadas,
+            'fallidas': self.fallidas,
+            'timeouts': self.timeouts,
+            'canceladas': self.canceladas,
+            'reutilizadas': self.reutilizadas,
+        }
@@ -0,0 +1,130 @@
+"""
+Benchmark de motores de consulta: Athena vs. DuckDB local
+
+Ejecuta las consultas de queries.sql (de las vistas, su SELECT) en cada motor
+y mide p50/máximo de varias repeticiones leyendo el resultado completo, sin
+pasar por el cache. El motor local lee <directorio>/parquet, lo que escribe
+la ingesta sin S3; Athena se omite si no hay credenciales o con --sin-athena.
+
+    python benchmark.py --directorio /data --repeticiones 5
+"""
+import argparse
+import asyncio
+import os
+import re
+import statistics
+import time
+
+from athena import EjecutorAthena, ErrorConsulta
+from motores import MotorAthena, MotorLocal
+
+_VISTA = re.compile(r'create\s+or\s+replace\s+view\s+\w+\s+as\s+', re.I)
+
+
+def leer_consultas(ruta: str):
+    """(nombre, sql) de cada sentencia de queries.sql; el nombre es el de
+    su comentario '-- Vista: ...' o '-- Consulta N: ...'"""
+    consultas = []
+    nombre, lineas = None, []
+    with open(ruta, encoding='utf-8') as archivo:
+        for linea in archivo:
+            encabezado = re.match(r'--\s*(Vista|Consulta \d+):\s*(.+)', linea)
+            if encabezado:
+                nombre = encabezado.group(2).strip()
+            elif not linea.lstrip().startswith('--'):
+                lineas.append(linea)
+            if linea.rstrip().endswith(';'):
+                sql = _VISTA.sub('', ''.join(lineas).strip().rstrip(';'))
+                if sql:
+                    consultas.append((nombre or f'consulta {len(consultas) + 1}',
+                                      sql))
+                nombre, lineas = None, []
+    return consultas
+
+
+def motor_athena(args):
+    import boto3
+
+    try:
+        cliente = boto3.Session(profile_name=args.perfil).client(
+            'athena', region_name=args.region)
+    except Exception as e:
+        print(f"Athena omitido: {e}")
+        return None
+    return MotorAthena(EjecutorAthena(
+        cliente, args.database, args.output_location,
+        workgroup=args.workgroup, max_concurrentes=1, timeout=args.timeout))
+
+
+async def ejecutar(motor, sql: str) -> int:
+    """Ejecutar `sql` leyendo todas las filas; retorna cuántas"""
+    _, _, paginas = await motor.abrir(sql)
+    return sum([len(filas) async for filas in paginas])
+
+
+async def medir(motor, sql: str, repeticiones: int, calentamiento: int):
+    for _ in range(calentamiento):
+        await ejecutar(motor, sql)
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        filas = await ejecutar(motor, sql)
+        tiempos.append(time.perf_counter() - inicio)
+    return {
+        'filas': filas,
+        'p50_ms': statistics.median(tiempos) * 1000,
+        'max_ms': max(tiempos) * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--directorio',
+                        default=os.getenv('DIRECTORIO_DATOS', '/data'))
+    parser.add_argument('--consultas', default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'queries.sql'))
+    parser.add_argument('--repeticiones', type=int, default=5)
+    # Athena no se calienta: cada ejecución se factura
+    parser.add_argument('--calentamiento', type=int, default=1,
+                        help='ejecuciones previas sin medir (motor local)')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--sin-athena', action='store_true')
+    parser.add_argument('--perfil', default=os.getenv('AWS_PROFILE', 'default'))
+    parser.add_argument('--region', default=os.getenv('AWS_REGION', 'us-east-1'))
+    parser.add_argument('--database',
+                        default=os.getenv('ATHENA_DATABASE', 'inventario_db'))
+    parser.add_argument('--output-location', default=os.getenv(
+        'ATHENA_OUTPUT_LOCATION', 's3://inventario-athena-results/'))
+    parser.add_argument('--workgroup',
+                        default=os.getenv('ATHENA_WORKGROUP', 'primary'))
+    args = parser.parse_args()
+
+    motores = [(MotorLocal(args.directorio, timeout=args.timeout),
+                args.calentamiento)]
+    if not args.sin_athena:
+        athena = motor_athena(args)
+        if athena:
+            motores.append((athena, 0))
+
+    print(f"{'consulta':<40}{'motor':<8}{'filas':>8}{'p50 ms':>11}"
+          f"{'max ms':>11}")
+    totales = {}
+    for nombre, sql in leer_consultas(args.consultas):
+        for motor, calentamiento in motores:
+            try:
+                r = await medir(motor, sql, args.repeticiones, calentamiento)
+            except ErrorConsulta as e:
+                print(f"{nombre[:39]:<40}{motor.nombre:<8}  {e}")
+                continue
+            totales[motor.nombre] = totales.get(motor.nombre, 0) + r['p50_ms']
+            print(f"{nombre[:39]:<40}{motor.nombre:<8}{r['filas']:>8}"
+                  f"{r['p50_ms']:>11.2f}{r['max_ms']:>11.2f}")
+
+    for nombre, total in totales.items():
+        print(f"{'total (suma de p50)':<40}{nombre:<8}{'':>8}{total:>11.2f}")
+    for motor, _ in motores:
+        motor.cerrar()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
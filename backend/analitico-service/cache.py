@@ -0,0 +1,162 @@
+"""Cache en memoria de resultados de consultas Athena para analitico-service
+
+Los datos del data lake sólo cambian cuando corre la ingesta, así que un
+mismo reporte puede servirse desde memoria en lugar de volver a ejecutar la
+consulta (y pagarla). La clave es el SQL normalizado (sin comentarios ni
+diferencias de espacios o mayúsculas fuera de los literales) junto con el
+workgroup; los parámetros de los endpoints ya van interpolados en el SQL.
+
+Cada entrada vence a los `ttl` segundos y se desaloja la menos usada al
+superar `max_entradas`. La ingesta avisa al terminar (invalidar) y se
+eliminan las entradas que leen las tablas que cambiaron. Las peticiones
+concurrentes por una misma clave comparten una única ejecución en curso.
+"""
+from collections import OrderedDict
+import asyncio
+import re
+import time
+
+# Literales de texto e identificadores entre comillas: se conservan tal cual
+_LITERALES = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+_COMENTARIOS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_TABLAS = re.compile(r'\b(?:from|join)\s+(?:"?[\w]+"?\.)?"?(\w+)"?', re.I)
+
+
+def normalizar_sql(query: str) -> str:
+    """SQL en minúsculas, sin comentarios ni espacios redundantes, salvo
+    dentro de los literales"""
+    partes = _LITERALES.split(query)
+    for i in range(0, len(partes), 2):
+        sin_comentarios = _COMENTARIOS.sub(' ', partes[i])
+        partes[i] = ' '.join(sin_comentarios.split()).lower()
+    return ''.join(partes).strip().rstrip(';').strip()
+
+
+def tablas_de(query: str) -> frozenset:
+    """Tablas que lee una consulta (las que siguen a FROM o JOIN)"""
+    sin_literales = _LITERALES.sub("''", _COMENTARIOS.sub(' ', query))
+    return frozenset(t.lower() for t in _TABLAS.findall(sin_literales))
+
+
+class CacheResultados:
+    """Resultados por SQL normalizado con TTL, desalojo LRU, invalidación por
+    tabla y single-flight"""
+
+    def __init__(self, ttl: float, max_entradas: int = 256,
+                 max_filas: int = 10000):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        # Resultados más grandes no se guardan, para acotar la memoria
+        self.max_filas = max_filas
+        # clave -> (resultado, vence, tablas)
+        self._entradas = OrderedDict()
+        # clave -> (tarea, funciones `desconectado` de quienes esperan)
+        self._en_vuelo = {}
+        # tabla -> time.time() de la última invalidación
+        self._invalidaciones = {}
+        self._invalidacion_total = 0.0
+        # Aumenta en cada invalidación: una carga que empezó antes no se
+        # guarda, porque pudo haber leído los datos anteriores
+        self._generacion = 0
+        self.hits = 0
+        self.misses = 0
+        self.compartidas = 0
+        self.invalidadas = 0
+
+    async def obtener(self, clave, tablas, cargar, desconectado=None):
+        """
+        Retornar el resultado de `clave`, usando `cargar(desconectado)` si no
+        está o venció. La carga recibe una función que indica si ya se
+        desconectaron todos los clientes que la esperan.
+        """
+        entrada = self._entradas.get(clave)
+        if entrada is not None:
+            resultado, vence, _ = entrada
+            if time.monotonic() < vence:
+                self.hits += 1
+                self._entradas.move_to_end(clave)
+                return resultado
+            del self._entradas[clave]
+
+        if clave in self._en_vuelo:
+            self.compartidas += 1
+            tarea, interesados = self._en_vuelo[clave]
+        else:
+            self.misses += 1
+            interesados = []
+            tarea = asyncio.create_task(
+                self._cargar(clave, tablas, cargar, interesados))
+            tarea.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._en_vuelo[clave] = (tarea, interesados)
+
+        interesados.append(desconectado)
+        try:
+            # shield: si se cancela esta petición, la carga compartida continúa
+            return await asyncio.shield(tarea)
+        finally:
+            interesados.remove(desconectado)
+
+    async def _cargar(self, clave, tablas, cargar, interesados):
+        generacion = self._generacion
+
+        async def todos_desconectados():
+            if any(d is None for d in interesados):
+                return False
+            for desconectado in list(interesados):
+                if not await desconectado():
+                    return False
+            return True
+
+        try:
+            resultado = await cargar(todos_desconectados)
+            if (generacion == self._generacion and 'error' not in resultado
+                    and resultado.get('row_count', 0) <= self.max_filas):
+                self._entradas[clave] = (
+                    resultado, time.monotonic() + self.ttl, tablas)
+                self._entradas.move_to_end(clave)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+            return resultado
+        finally:
+            self._en_vuelo.pop(clave, None)
+
+    def invalidar(self, tablas=None) -> int:
+        """Eliminar las entradas que leen alguna de `tablas` (o que no se
+        sabe qué leen), o todas si no se indican; retorna cuántas"""
+        ahora = time.time()
+        self._generacion += 1
+        if tablas is None:
+            self._invalidacion_total = ahora
+            eliminadas = list(self._entradas)
+        else:
+            tablas = {t.lower() for t in tablas}
+            for tabla in tablas:
+                self._invalidaciones[tabla] = ahora
+            eliminadas = [clave for clave, (_, _, leidas) in self._entradas.items()
+                          if not leidas or leidas & tablas]
+        for clave in eliminadas:
+            del self._entradas[clave]
+        self.invalidadas += len(eliminadas)
+        return len(eliminadas)
+
+    def segundos_desde_invalidacion(self, tablas) -> float:
+        """Segundos desde la última vez que cambió alguna de `tablas`
+        (infinito si no cambiaron desde que arrancó el servicio)"""
+        # Si no se sabe qué tablas lee, cuenta cualquier invalidación
+        tablas = tablas or self._invalidaciones
+        ultima = max([self._invalidacion_total] +
+                     [self._invalidaciones.get(t, 0.0) for t in tablas])
+        return time.time() - ultima if ultima else float('inf')
+
+    def estadisticas(self) -> dict:
+        total = self.hits + self.misses + self.compartidas
+        return {
+            'entradas': len(self._entradas),
+            'en_vuelo': len(self._en_vuelo),
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'compartidas': self.compartidas,
+            'invalidadas': self.invalidadas,
+            'hit_ratio': round(self.hits / total, 4) if total else None,
+        }
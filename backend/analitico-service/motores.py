@@ -0,0 +1,288 @@
+"""Motores de consulta de analitico-service
+
+Los endpoints ejecutan SQL a través de un motor con la misma interfaz:
+`abrir(query, ...)` ejecuta la consulta y retorna (id, columnas, paginas),
+con `columnas` como lista de (nombre, tipo) y `paginas` un generador
+asíncrono de listas de filas. Así el cache, la paginación JSON y la
+exportación en streaming no dependen de dónde corre la consulta.
+
+- MotorAthena: AWS Athena sobre el data lake en S3 (ver athena.py).
+- MotorLocal: DuckDB embebido sobre los Parquet que la ingesta escribe en
+  el directorio local (/data/parquet/<tabla>/) cuando no hay S3. Sirve para
+  trabajar y hacer benchmarks sin AWS, y en despliegues chicos responde en
+  milisegundos en lugar de pagar la latencia de Athena.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as hora
+from decimal import Decimal
+from functools import partial
+import asyncio
+import glob
+import itertools
+import os
+import threading
+import time
+
+from athena import ConsultaCancelada, ErrorConsulta
+
+# Funciones de Athena (Presto/Trino) que DuckDB no tiene con la misma firma
+_COMPATIBILIDAD_ATHENA = [
+    "CREATE OR REPLACE MACRO date_format(fecha, formato) AS "
+    "strftime(fecha, replace(formato, '%i', '%M'))",
+    "CREATE OR REPLACE MACRO date_add(unidad, cantidad, fecha) AS "
+    "fecha + CASE lower(unidad) "
+    "WHEN 'year' THEN to_years(cantidad) "
+    "WHEN 'quarter' THEN to_months(cantidad * 3) "
+    "WHEN 'month' THEN to_months(cantidad) "
+    "WHEN 'week' THEN to_weeks(cantidad) "
+    "WHEN 'day' THEN to_days(cantidad) "
+    "WHEN 'hour' THEN to_hours(cantidad) "
+    "WHEN 'minute' THEN to_minutes(cantidad) "
+    "ELSE to_seconds(cantidad) END",
+]
+
+
+class MotorConsultas:
+    """Interfaz común de los motores de consulta"""
+    nombre = None
+
+    async def abrir(self, query: str, workgroup: str = None,
+                    desconectado=None, reuso_minutos: int = 0):
+        """
+        Ejecutar `query` y retornar (id, columnas, paginas). Lanza
+        ErrorConsulta si falla o vence el plazo, y ConsultaCancelada si
+        `desconectado()` indica que el cliente ya no espera.
+        """
+        raise NotImplementedError
+
+    def estadisticas(self) -> dict:
+        return {}
+
+    def cerrar(self):
+        pass
+
+
+class MotorAthena(MotorConsultas):
+    """Consultas en AWS Athena"""
+    nombre = 'athena'
+
+    def __init__(self, ejecutor, filas_por_pagina: int = 1000):
+        self.ejecutor = ejecutor
+        self.filas_por_pagina = filas_por_pagina
+
+    async def abrir(self, query: str, workgroup: str = None,
+                    desconectado=None, reuso_minutos: int = 0):
+        ejecucion = await self.ejecutor.ejecutar(
+            query, workgroup, desconectado=desconectado,
+            reuso_minutos=reuso_minutos)
+        query_execution_id = ejecucion['QueryExecutionId']
+        columnas, paginas = await self.ejecutor.abrir_resultados(
+            query_execution_id, self.filas_por_pagina)
+        return query_execution_id, columnas, paginas
+
+    def estadisticas(self) -> dict:
+        return self.ejecutor.estadisticas()
+
+    def cerrar(self):
+        self.ejecutor.cerrar()
+
+
+def valor_local(valor):
+    """Fechas y horas como texto, igual que las entrega Athena"""
+    if isinstance(valor, datetime):
+        return valor.isoformat(sep=' ')
+    if isinstance(valor, (date, hora)):
+        return valor.isoformat()
+    if isinstance(valor, (bool, int, float, str, Decimal)) or valor is None:
+        return valor
+    return str(valor)
+
+
+class MotorLocal(MotorConsultas):
+    """
+    DuckDB embebido sobre `directorio`/parquet/<tabla>/: cada carpeta se
+    expone como una vista con el nombre de la tabla (particiones Hive
+    incluidas), así las consultas de los endpoints y de queries.sql corren
+    sin cambios.
+
+    Sólo se aceptan consultas de lectura (una sentencia SELECT o WITH), que
+    únicamente pueden leer archivos de ese directorio. Cada una usa
+    su propio cursor en un pool de hilos; a lo sumo `max_concurrentes` a la
+    vez, y se interrumpen si vence el plazo o el cliente se desconecta.
+    """
+    nombre = 'local'
+
+    def __init__(self, directorio: str, max_concurrentes: int = 4,
+                 timeout: float = 30.0, poll: float = 0.05):
+        import duckdb
+
+        self.raiz = os.path.join(os.path.abspath(directorio), 'parquet')
+        self.max_concurrentes = max_concurrentes
+        self.timeout = timeout
+        self.poll = poll
+        self._duckdb = duckdb
+        self._conexion = duckdb.connect()
+        for macro in _COMPATIBILIDAD_ATHENA:
+            self._conexion.execute(macro)
+        # Sólo se pueden leer los Parquet del data lake local, y las
+        # consultas no pueden volver a cambiar la configuración
+        self._conexion.execute("SET allowed_directories = ?",
+                               [[self.raiz + os.sep]])
+        self._conexion.execute("SET enable_external_access = false")
+        self._conexion.execute("SET lock_configuration = true")
+        self._hilos = ThreadPoolExecutor(max_workers=max_concurrentes + 1,
+                                         thread_name_prefix='duckdb')
+        self._semaforo = None
+        # La conexión base sólo se usa con el lock; cada consulta usa un
+        # cursor propio
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        # SQL de las vistas creadas por _registrar_tablas, para recrearlas
+        # si otra sentencia las cambió
+        self._definiciones = {}
+        self.en_curso = 0
+        self.ejecutadas = 0
+        self.fallidas = 0
+        self.timeouts = 0
+        self.canceladas = 0
+
+    def _vistas(self) -> dict:
+        """{vista: su SQL} de las vistas del catálogo"""
+        return dict(self._conexion.execute(
+            "SELECT view_name, sql FROM duckdb_views() "
+            "WHERE NOT internal AND schema_name = 'main'").fetchall())
+
+    def _registrar_tablas(self):
+        """Crear la vista de cada tabla con archivos Parquet, o recrearla si
+        no es la que se creó acá (la ingesta pudo haber escrito tablas
+        nuevas). El patrón de archivos se resuelve en cada consulta: las
+        fotos nuevas se ven sin recrearla."""
+        if not os.path.isdir(self.raiz):
+            return
+        with self._lock:
+            vistas = self._vistas()
+            for tabla in sorted(os.listdir(self.raiz)):
+                if not tabla.isidentifier() or (
+                        tabla in self._definiciones and
+                        vistas.get(tabla) == self._definiciones[tabla]):
+                    continue
+                patron = os.path.join(self.raiz, tabla, '**', '*.parquet')
+                if not glob.glob(patron, recursive=True):
+                    continue
+                self._conexion.execute(
+                    f'CREATE OR REPLACE VIEW "{tabla}" AS SELECT * FROM '
+                    f"read_parquet('{patron.replace(chr(39), chr(39) * 2)}', "
+                    f"hive_partitioning = true, union_by_name = true)")
+                self._definiciones[tabla] = self._vistas()[tabla]
+
+    def _validar(self, query: str):
+        """Sólo se ejecuta una sentencia de lectura: las consultas
+        personalizadas comparten el catálogo y no deben poder cambiar las
+        vistas ni las macros"""
+        try:
+            sentencias = self._duckdb.extract_statements(query)
+        except self._duckdb.Error as e:
+            raise ErrorConsulta('FAILED', str(e).splitlines()[0])
+        if len(sentencias) != 1 or \
+                sentencias[0].type != self._duckdb.StatementType.SELECT:
+            raise ErrorConsulta(
+                'FAILED', 'sólo se permite una consulta de lectura '
+                '(SELECT o WITH)')
+
+    def _ejecutar(self, cursor, query: str):
+        cursor.execute(query)
+        return [(columna[0], str(columna[1]).split('(')[0].lower())
+                for columna in cursor.description or []]
+
+    async def abrir(self, query: str, workgroup: str = None,
+                    desconectado=None, reuso_minutos: int = 0):
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.max_concurrentes)
+        try:
+            self._validar(query)
+        except ErrorConsulta:
+            self.fallidas += 1
+            raise
+        loop = asyncio.get_running_loop()
+        async with self._semaforo:
+            if desconectado and await desconectado():
+                self.canceladas += 1
+                raise ConsultaCancelada()
+            await loop.run_in_executor(self._hilos, self._registrar_tablas)
+
+            self.en_curso += 1
+            with self._lock:
+                cursor = self._conexion.cursor()
+            futuro = loop.run_in_executor(self._hilos, self._ejecutar,
+                                          cursor, query)
+            try:
+                columnas = await self._esperar(cursor, futuro, desconectado)
+            except BaseException:
+                # El cursor se cierra cuando la consulta interrumpida termina
+                futuro.add_done_callback(
+                    lambda f: (f.cancelled() or f.exception(), cursor.close()))
+                raise
+            finally:
+                self.en_curso -= 1
+        self.ejecutadas += 1
+        return (f"local-{next(self._ids)}", columnas,
+                self._paginas(cursor, loop))
+
+    async def _esperar(self, cursor, futuro, desconectado):
+        """Esperar la consulta revisando el plazo y la desconexión"""
+        limite = time.monotonic() + self.timeout
+        while True:
+            try:
+                # shield: al cancelar se interrumpe la consulta en su hilo
+                return await asyncio.wait_for(asyncio.shield(futuro),
+                                              self.poll)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                self.canceladas += 1
+                cursor.interrupt()
+                raise
+            except self._duckdb.Error as e:
+                self.fallidas += 1
+                raise ErrorConsulta('FAILED', str(e).splitlines()[0])
+
+            if desconectado and await desconectado():
+                self.canceladas += 1
+                cursor.interrupt()
+                raise ConsultaCancelada()
+            if time.monotonic() >= limite:
+                self.timeouts += 1
+                cursor.interrupt()
+                raise ErrorConsulta('TIMEOUT')
+
+    async def _paginas(self, cursor, loop, por_pagina: int = 1000):
+        try:
+            while True:
+                filas = await loop.run_in_executor(
+                    self._hilos, partial(cursor.fetchmany, por_pagina))
+                if not filas:
+                    return
+                yield [[valor_local(valor) for valor in fila]
+                       for fila in filas]
+        finally:
+            cursor.close()
+
+    def tablas(self) -> list:
+        self._registrar_tablas()
+        with self._lock:
+            return sorted(self._vistas())
+
+    def cerrar(self):
+        self._hilos.shutdown(wait=False)
+        self._conexion.close()
+
+    def estadisticas(self) -> dict:
+        return {
+            'directorio': self.raiz,
+            'max_concurrentes': self.max_concurrentes,
+            'en_curso': self.en_curso,
+            'ejecutadas': self.ejecutadas,
+            'fallidas': self.fallidas,
+            'timeouts': self.timeouts,
+            'canceladas': self.canceladas,
+        }
@@ -1,14 +1,130 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from cache import CacheAsync
+from resiliencia import CircuitBreaker, CircuitoAbierto
+import asyncio
 import httpx
+import json
 import os
+import random
+import time
 from typing import Optional
 
+# URLs de los microservicios
+PRODUCTOS_SERVICE_URL = os.getenv(
+    'PRODUCTOS_SERVICE_URL', 'http://productos-service:5001/ms1')
+ORDENES_SERVICE_URL = os.getenv(
+    'ORDENES_SERVICE_URL', 'http://ordenes-service:8080/ms2')
+PROVEEDORES_SERVICE_URL = os.getenv(
+    'PROVEEDORES_SERVICE_URL', 'http://proveedores-service:3000/ms3')
+
+# Pool de conexiones HTTP: un cliente por servicio, creado al iniciar la
+# aplicación y reutilizado por todas las peticiones (keep-alive)
+SERVICIOS = ('productos', 'ordenes', 'proveedores')
+HTTP_MAX_CONEXIONES = int(os.getenv('HTTP_MAX_CONEXIONES', 100))
+HTTP_MAX_KEEPALIVE = int(os.getenv('HTTP_MAX_KEEPALIVE', 20))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', 30.0))
+HTTP2 = os.getenv('HTTP2', 'false').lower() == 'true'
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 2.0))
+# Timeout total por servicio: TIMEOUT_PRODUCTOS, TIMEOUT_ORDENES, ...
+TIMEOUTS = {
+    servicio: float(os.getenv(f'TIMEOUT_{servicio.upper()}', 10.0))
+    for servicio in SERVICIOS
+}
+
+
+def crear_cliente_http(servicio: str) -> httpx.AsyncClient:
+    """Cliente con pool propio para que un servicio lento no agote las
+    conexiones de los demás"""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(TIMEOUTS[servicio], connect=HTTP_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONEXIONES,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        http2=HTTP2,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.clientes = {s: crear_cliente_http(s) for s in SERVICIOS}
+    yield
+    await asyncio.gather(*(c.aclose() for c in app.state.clientes.values()))
+
+
+def cliente(servicio: str) -> httpx.AsyncClient:
+    """Cliente HTTP compartido para el servicio indicado"""
+    return app.state.clientes[servicio]
+
+
+# Circuit breaker por servicio (ver resiliencia.py)
+breakers = {
+    servicio: CircuitBreaker(
+        servicio,
+        ventana=int(os.getenv('CB_VENTANA', 20)),
+        min_llamadas=int(os.getenv('CB_MIN_LLAMADAS', 10)),
+        umbral_errores=float(os.getenv('CB_UMBRAL_ERRORES', 0.5)),
+        umbral_lentas=float(os.getenv('CB_UMBRAL_LENTAS', 0.8)),
+        lenta_segundos=float(os.getenv('CB_LENTA_SEGUNDOS', 2.0)),
+        abierto_segundos=float(os.getenv('CB_ABIERTO_SEGUNDOS', 10.0)),
+    )
+    for servicio in SERVICIOS
+}
+# Reintentos de los GET (idempotentes) ante errores de red o respuestas 5xx
+REINTENTOS_GET = int(os.getenv('REINTENTOS_GET', 2))
+BACKOFF_BASE = float(os.getenv('BACKOFF_BASE', 0.1))
+# Timeout adaptativo: TIMEOUT_FACTOR_P99 × p99 reciente, acotado entre
+# TIMEOUT_MINIMO y el TIMEOUT_<SERVICIO> configurado
+TIMEOUT_MINIMO = float(os.getenv('TIMEOUT_MINIMO', 0.5))
+TIMEOUT_FACTOR_P99 = float(os.getenv('TIMEOUT_FACTOR_P99', 3.0))
+
+
+async def get_downstream(servicio: str, url: str, params=None,
+                         timeout: Optional[float] = None,
+                         reintentos: Optional[int] = None) -> httpx.Response:
+    """
+    GET a un servicio pasando por su circuit breaker.
+    Falla de inmediato con CircuitoAbierto si el circuito está abierto y
+    reintenta errores de red y 5xx con backoff exponencial con jitter.
+    """
+    breaker = breakers[servicio]
+    reintentos = REINTENTOS_GET if reintentos is None else reintentos
+
+    for intento in range(reintentos + 1):
+        permiso = breaker.permitir()
+        if permiso is None:
+            raise CircuitoAbierto(servicio)
+
+        limite = timeout or breaker.timeout_adaptativo(
+            TIMEOUTS[servicio], TIMEOUT_MINIMO, TIMEOUT_FACTOR_P99)
+        inicio = time.monotonic()
+        exito = False
+        try:
+            response = await cliente(servicio).get(
+                url, params=params,
+                timeout=httpx.Timeout(limite, connect=min(limite, HTTP_CONNECT_TIMEOUT)))
+            exito = response.status_code < 500
+        except httpx.TransportError:
+            if intento == reintentos:
+                raise
+        finally:
+            # También se registra si la llamada se cancela por un plazo externo
+            breaker.registrar(permiso, exito, time.monotonic() - inicio)
+
+        if exito or intento == reintentos:
+            return response
+        await asyncio.sleep(random.uniform(0, BACKOFF_BASE * 2 ** intento))
+
+
 app = FastAPI(
     title="Integración Service API",
     description="Microservicio de integración que consolida datos de otros servicios",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS
@@ -20,13 +136,62 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# URLs de los microservicios
-PRODUCTOS_SERVICE_URL = os.getenv(
-    'PRODUCTOS_SERVICE_URL', 'http://productos-service:5001/ms1')
-ORDENES_SERVICE_URL = os.getenv(
-    'ORDENES_SERVICE_URL', 'http://ordenes-service:8080/ms2')
-PROVEEDORES_SERVICE_URL = os.getenv(
-    'PROVEEDORES_SERVICE_URL', 'http://proveedores-service:3000/ms3')
+# Máximo de ids por consulta por lote a productos (LOTE_MAX_IDS en productos)
+PRODUCTOS_LOTE_MAX = int(os.getenv('PRODUCTOS_LOTE_MAX', 500))
+# Peticiones simultáneas por endpoint cuando no se puede consultar por lote
+MAX_CONCURRENCIA_DOWNSTREAM = int(os.getenv('MAX_CONCURRENCIA_DOWNSTREAM', 10))
+
+
+async def obtener_productos(ids) -> dict:
+    """
+    Obtener varios productos por id en paralelo, sin repetir ids.
+    Usa GET /api/productos?ids=... (un viaje por cada PRODUCTOS_LOTE_MAX ids)
+    y, si el servicio no lo soporta, consultas individuales concurrentes.
+    Retorna {id: producto}; los ids no encontrados quedan fuera.
+    """
+    ids = list(dict.fromkeys(i for i in ids if i is not None))
+    if not ids:
+        return {}
+
+    bloques = [ids[i:i + PRODUCTOS_LOTE_MAX]
+               for i in range(0, len(ids), PRODUCTOS_LOTE_MAX)]
+    try:
+        respuestas = await asyncio.gather(*(
+            get_downstream(
+                'productos', f"{PRODUCTOS_SERVICE_URL}/api/productos",
+                params={'ids': ','.join(map(str, bloque))})
+            for bloque in bloques
+        ))
+        datos = [r.json() for r in respuestas if r.status_code == 200]
+        # Una versión sin consulta por lote ignora ids y devuelve una página
+        if len(datos) == len(bloques) and all('no_encontrados' in d for d in datos):
+            return {int(pid): producto for d in datos
+                    for pid, producto in d['productos'].items()}
+    except (httpx.HTTPError, CircuitoAbierto, ValueError):
+        pass
+
+    semaforo = asyncio.Semaphore(MAX_CONCURRENCIA_DOWNSTREAM)
+
+    async def obtener_uno(producto_id):
+        async with semaforo:
+            try:
+                response = await get_downstream(
+                    'productos', f"{PRODUCTOS_SERVICE_URL}/api/productos/{producto_id}")
+                if response.status_code == 200:
+                    return producto_id, response.json()
+            except (httpx.HTTPError, CircuitoAbierto, ValueError):
+                pass
+            return producto_id, None
+
+    resultados = await asyncio.gather(*(obtener_uno(i) for i in ids))
+    return {pid: producto for pid, producto in resultados if producto is not None}
+
+
+@app.exception_handler(CircuitoAbierto)
+async def circuito_abierto_handler(request, exc: CircuitoAbierto):
+    """Respuesta inmediata cuando un servicio requerido tiene el circuito abierto"""
+    return JSONResponse(status_code=503, content={"detail": str(exc)},
+                        headers={"Retry-After": str(int(breakers[exc.servicio].abierto_segundos))})
 
 
 @app.get("/ms4/health")
@@ -35,37 +200,61 @@ async def health():
     return {"status": "healthy", "service": "integracion"}
 
 
-@app.get("/ms4/api/services-status")
-async def services_status():
-    """Verificar el estado de todos los servicios"""
-    status = {}
+async def consultar_json(servicio: str, url: str, deadline: float):
+    """GET con un plazo total de `deadline` segundos; retorna el JSON"""
+    response = await asyncio.wait_for(get_downstream(servicio, url), deadline)
+    response.raise_for_status()
+    return response.json()
 
-    async with httpx.AsyncClient(timeout=5.0) as client:
-        # Productos
-        try:
-            response = await client.get(f"{PRODUCTOS_SERVICE_URL}/health")
-            status["productos"] = {"status": "healthy",
-                                   "code": response.status_code}
-        except Exception as e:
-            status["productos"] = {"status": "unhealthy", "error": str(e)}
 
-        # Órdenes
-        try:
-            response = await client.get(f"{ORDENES_SERVICE_URL}/api/health")
-            status["ordenes"] = {"status": "healthy",
-                                 "code": response.status_code}
-        except Exception as e:
-            status["ordenes"] = {"status": "unhealthy", "error": str(e)}
+def describir_error(e: BaseException) -> str:
+    return str(e) or type(e).__name__
+
 
-        # Proveedores
+# Plazo por llamada del dashboard y vigencia del resumen en memoria
+DASHBOARD_DEADLINE = float(os.getenv('DASHBOARD_DEADLINE', 3.0))
+dashboard_cache = CacheAsync(
+    ttl=float(os.getenv('DASHBOARD_SNAPSHOT_TTL', 5.0)), max_entradas=1)
+
+# Información de proveedores por nombre: cambia poco, se sirve vencida
+# mientras se recarga y las búsquedas concurrentes comparten una llamada
+proveedores_cache = CacheAsync(
+    ttl=float(os.getenv('PROVEEDORES_CACHE_TTL', 300)),
+    stale=float(os.getenv('PROVEEDORES_CACHE_STALE', 3600)),
+    max_entradas=int(os.getenv('PROVEEDORES_CACHE_MAX', 2048)))
+
+
+@app.get("/ms4/api/cache/estadisticas")
+async def estadisticas_cache():
+    """Contadores de los caches en memoria de este proceso"""
+    return {
+        "dashboard": dashboard_cache.estadisticas(),
+        "proveedores": proveedores_cache.estadisticas(),
+    }
+
+
+@app.get("/ms4/api/services-status")
+async def services_status():
+    """Verificar el estado de todos los servicios (en paralelo)"""
+    health_urls = {
+        "productos": f"{PRODUCTOS_SERVICE_URL}/health",
+        "ordenes": f"{ORDENES_SERVICE_URL}/api/health",
+        "proveedores": f"{PROVEEDORES_SERVICE_URL}/health",
+    }
+
+    async def verificar(servicio: str, url: str):
         try:
-            response = await client.get(f"{PROVEEDORES_SERVICE_URL}/health")
-            status["proveedores"] = {
-                "status": "healthy", "code": response.status_code}
-        except Exception as e:
-            status["proveedores"] = {"status": "unhealthy", "error": str(e)}
+            response = await get_downstream(
+                servicio, url, timeout=5.0, reintentos=0)
+            estado = {"status": "healthy", "code": response.status_code}
+        except (httpx.HTTPError, CircuitoAbierto) as e:
+            estado = {"status": "unhealthy", "error": describir_error(e)}
+        estado["circuito"] = breakers[servicio].resumen()
+        return estado
 
-    return status
+    resultados = await asyncio.gather(
+        *(verificar(s, url) for s, url in health_urls.items()))
+    return dict(zip(health_urls, resultados))
 
 
 @app.get("/ms4/api/orden-completa/{orden_id}")
@@ -73,48 +262,54 @@ async def get_orden_completa(orden_id: int):
     """
     Obtener orden con información completa de productos y proveedor
     """
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        try:
-            # Obtener orden
-            orden_response = await client.get(f"{ORDENES_SERVICE_URL}/api/ordenes/{orden_id}")
-            if orden_response.status_code != 200:
-                raise HTTPException(
-                    status_code=404, detail="Orden no encontrada")
-
-            orden = orden_response.json()
-
-            # Enriquecer detalles con información de productos
-            detalles_enriquecidos = []
-            for detalle in orden.get('detalles', []):
-                producto_id = detalle.get('productoId')
-
-                # Obtener información del producto
-                try:
-                    producto_response = await client.get(
-                        f"{PRODUCTOS_SERVICE_URL}/api/productos/{producto_id}"
-                    )
-                    if producto_response.status_code == 200:
-                        producto = producto_response.json()
-                        detalle['producto_info'] = {
-                            'nombre': producto.get('nombre'),
-                            'descripcion': producto.get('descripcion'),
-                            'categoria': producto.get('categoria'),
-                            'proveedor': producto.get('proveedor'),
-                            'sku': producto.get('sku'),
-                            'stock_actual': producto.get('stock')
-                        }
-                except:
-                    detalle['producto_info'] = None
-
-                detalles_enriquecidos.append(detalle)
-
-            orden['detalles'] = detalles_enriquecidos
-
-            return orden
-
-        except httpx.HTTPError as e:
+    try:
+        # Obtener orden
+        orden_response = await get_downstream(
+            'ordenes', f"{ORDENES_SERVICE_URL}/api/ordenes/{orden_id}")
+        if orden_response.status_code != 200:
             raise HTTPException(
-                status_code=500, detail=f"Error al consultar servicios: {str(e)}")
+                status_code=404, detail="Orden no encontrada")
+
+        orden = orden_response.json()
+
+        # Enriquecer detalles con información de productos: todos los
+        # productos de la orden se obtienen juntos, no uno por línea
+        detalles = orden.get('detalles', [])
+        productos = await obtener_productos(
+            [d.get('productoId') for d in detalles])
+
+        detalles_enriquecidos = []
+        for detalle in detalles:
+            producto = productos.get(detalle.get('productoId'))
+            detalle['producto_info'] = {
+                'nombre': producto.get('nombre'),
+                'descripcion': producto.get('descripcion'),
+                'categoria': producto.get('categoria'),
+                'proveedor': producto.get('proveedor'),
+                'sku': producto.get('sku'),
+                'stock_actual': producto.get('stock')
+            } if producto else None
+            detalles_enriquecidos.append(detalle)
+
+        orden['detalles'] = detalles_enriquecidos
+
+        return orden
+
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error al consultar servicios: {str(e)}")
+
+
+async def buscar_proveedor(nombre: str):
+    """Primer proveedor que coincide con el nombre, o None si no hay"""
+    response = await get_downstream(
+        'proveedores', f"{PROVEEDORES_SERVICE_URL}/api/proveedores/buscar/{nombre}")
+    if response.status_code == 404:
+        return None
+    # Los errores no se guardan en el cache
+    response.raise_for_status()
+    proveedores = response.json()
+    return proveedores[0] if proveedores else None
 
 
 @app.get("/ms4/api/producto-completo/{producto_id}")
@@ -122,37 +317,33 @@ async def get_producto_completo(producto_id: int):
     """
     Obtener producto con información del proveedor
     """
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        try:
-            # Obtener producto
-            producto_response = await client.get(
-                f"{PRODUCTOS_SERVICE_URL}/api/productos/{producto_id}"
-            )
-            if producto_response.status_code != 200:
-                raise HTTPException(
-                    status_code=404, detail="Producto no encontrado")
-
-            producto = producto_response.json()
-            proveedor_nombre = producto.get('proveedor')
-
-            # Buscar información del proveedor
-            if proveedor_nombre:
-                try:
-                    proveedores_response = await client.get(
-                        f"{PROVEEDORES_SERVICE_URL}/api/proveedores/buscar/{proveedor_nombre}"
-                    )
-                    if proveedores_response.status_code == 200:
-                        proveedores = proveedores_response.json()
-                        if proveedores:
-                            producto['proveedor_info'] = proveedores[0]
-                except:
-                    producto['proveedor_info'] = None
-
-            return producto
-
-        except httpx.HTTPError as e:
+    try:
+        # Obtener producto
+        producto_response = await get_downstream(
+            'productos', f"{PRODUCTOS_SERVICE_URL}/api/productos/{producto_id}"
+        )
+        if producto_response.status_code != 200:
             raise HTTPException(
-                status_code=500, detail=f"Error al consultar servicios: {str(e)}")
+                status_code=404, detail="Producto no encontrado")
+
+        producto = producto_response.json()
+        proveedor_nombre = producto.get('proveedor')
+
+        # Buscar información del proveedor
+        if proveedor_nombre:
+            try:
+                proveedor_info = await proveedores_cache.obtener(
+                    proveedor_nombre, lambda: buscar_proveedor(proveedor_nombre))
+                if proveedor_info:
+                    producto['proveedor_info'] = proveedor_info
+            except (httpx.HTTPError, CircuitoAbierto, ValueError):
+                producto['proveedor_info'] = None
+
+        return producto
+
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error al consultar servicios: {str(e)}")
 
 
 @app.get("/ms4/api/dashboard-resumen")
@@ -160,47 +351,47 @@ async def get_dashboard_resumen():
     """
     Obtener resumen consolidado para el dashboard
     """
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        resumen = {}
-
-        try:
-            # Total de productos
-            productos_response = await client.get(f"{PRODUCTOS_SERVICE_URL}/api/productos?page=1&per_page=1")
-            if productos_response.status_code == 200:
-                productos_data = productos_response.json()
-                resumen['total_productos'] = productos_data.get('total', 0)
-        except:
-            resumen['total_productos'] = 0
-
-        try:
-            # Total de órdenes
-            ordenes_response = await client.get(f"{ORDENES_SERVICE_URL}/api/ordenes?page=0&size=1")
-            if ordenes_response.status_code == 200:
-                ordenes_data = ordenes_response.json()
-                resumen['total_ordenes'] = ordenes_data.get('totalItems', 0)
-        except:
-            resumen['total_ordenes'] = 0
+    return await dashboard_cache.obtener('resumen', calcular_dashboard_resumen)
 
-        try:
-            # Total de proveedores
-            proveedores_response = await client.get(f"{PROVEEDORES_SERVICE_URL}/api/proveedores?page=1&limit=1")
-            if proveedores_response.status_code == 200:
-                proveedores_data = proveedores_response.json()
-                resumen['total_proveedores'] = proveedores_data.get(
-                    'totalItems', 0)
-        except:
-            resumen['total_proveedores'] = 0
 
-        try:
-            # Categorías
-            categorias_response = await client.get(f"{PRODUCTOS_SERVICE_URL}/api/categorias")
-            if categorias_response.status_code == 200:
-                categorias = categorias_response.json()
-                resumen['total_categorias'] = len(categorias)
-        except:
-            resumen['total_categorias'] = 0
-
-        return resumen
+async def calcular_dashboard_resumen():
+    """
+    Consultar los servicios en paralelo, cada uno con su plazo. Si alguno
+    falla, el resumen se entrega igual con ese valor en 0 y se marca parcial.
+    """
+    consultas = {
+        'total_productos': (
+            'productos', f"{PRODUCTOS_SERVICE_URL}/api/productos?page=1&per_page=1",
+            lambda data: data.get('total', 0)),
+        'total_ordenes': (
+            'ordenes', f"{ORDENES_SERVICE_URL}/api/ordenes?page=0&size=1",
+            lambda data: data.get('totalItems', 0)),
+        'total_proveedores': (
+            'proveedores', f"{PROVEEDORES_SERVICE_URL}/api/proveedores?page=1&limit=1",
+            lambda data: data.get('totalItems', 0)),
+        'total_categorias': (
+            'productos', f"{PRODUCTOS_SERVICE_URL}/api/categorias",
+            len),
+    }
+
+    resultados = await asyncio.gather(
+        *(consultar_json(servicio, url, DASHBOARD_DEADLINE)
+          for servicio, url, _ in consultas.values()),
+        return_exceptions=True)
+
+    resumen = {}
+    errores = {}
+    for (clave, (_, _, extraer)), resultado in zip(consultas.items(), resultados):
+        if isinstance(resultado, Exception):
+            resumen[clave] = 0
+            errores[clave] = describir_error(resultado)
+        else:
+            resumen[clave] = extraer(resultado)
+
+    if errores:
+        resumen['parcial'] = True
+        resumen['errores'] = errores
+    return resumen
 
 
 @app.get("/ms4/api/ordenes-recientes")
@@ -208,52 +399,74 @@ async def get_ordenes_recientes(limit: int = 10):
     """
     Obtener órdenes recientes con información de cliente
     """
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        try:
-            ordenes_response = await client.get(
-                f"{ORDENES_SERVICE_URL}/api/ordenes?page=0&size={limit}"
-            )
-            if ordenes_response.status_code == 200:
-                return ordenes_response.json()
-            else:
-                raise HTTPException(
-                    status_code=500, detail="Error al obtener órdenes")
-        except httpx.HTTPError as e:
+    try:
+        ordenes_response = await get_downstream(
+            'ordenes', f"{ORDENES_SERVICE_URL}/api/ordenes?page=0&size={limit}"
+        )
+        if ordenes_response.status_code == 200:
+            return ordenes_response.json()
+        else:
             raise HTTPException(
-                status_code=500, detail=f"Error al consultar servicio de órdenes: {str(e)}")
+                status_code=500, detail="Error al obtener órdenes")
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error al consultar servicio de órdenes: {str(e)}")
+
+
+# Productos por página al recorrer el stock bajo en productos-service
+BAJO_STOCK_PER_PAGE = int(os.getenv('BAJO_STOCK_PER_PAGE', 500))
 
 
 @app.get("/ms4/api/productos-bajo-stock")
 async def get_productos_bajo_stock(stock_minimo: int = 50):
     """
-    Obtener productos con stock bajo el mínimo especificado
+    Obtener productos con stock bajo el mínimo especificado.
+    El filtro se resuelve en productos-service (?stock_lt=) y las páginas se
+    reenvían al cliente a medida que llegan, sin acumular el resultado.
     """
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        try:
-            # Obtener productos
-            productos_response = await client.get(
-                f"{PRODUCTOS_SERVICE_URL}/api/productos?page=1&per_page=100"
-            )
-            if productos_response.status_code == 200:
-                productos_data = productos_response.json()
-                productos = productos_data.get('productos', [])
-
-                # Filtrar productos con stock bajo
-                productos_bajo_stock = [
-                    p for p in productos if p.get('stock', 0) < stock_minimo
-                ]
-
-                return {
-                    'stock_minimo': stock_minimo,
-                    'total': len(productos_bajo_stock),
-                    'productos': productos_bajo_stock
-                }
-            else:
-                raise HTTPException(
-                    status_code=500, detail="Error al obtener productos")
-        except httpx.HTTPError as e:
+    url = f"{PRODUCTOS_SERVICE_URL}/api/productos"
+    params = {'stock_lt': stock_minimo, 'per_page': BAJO_STOCK_PER_PAGE}
+
+    async def obtener_pagina(cursor: str):
+        response = await get_downstream(
+            'productos', url, params={**params, 'cursor': cursor})
+        if response.status_code != 200:
             raise HTTPException(
-                status_code=500, detail=f"Error al consultar servicio de productos: {str(e)}")
+                status_code=500, detail="Error al obtener productos")
+        return response.json()
+
+    # La primera página se pide antes de responder para poder informar un
+    # error con el código HTTP adecuado
+    try:
+        primera = await obtener_pagina('')
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error al consultar servicio de productos: {str(e)}")
+
+    async def generar():
+        yield f'{{"stock_minimo": {stock_minimo}, "productos": ['
+        total = 0
+        pagina = primera
+        error = None
+        while True:
+            for producto in pagina.get('productos', []):
+                yield (', ' if total else '') + json.dumps(producto)
+                total += 1
+            cursor = pagina.get('next_cursor')
+            if not cursor:
+                break
+            try:
+                pagina = await obtener_pagina(cursor)
+            except (httpx.HTTPError, HTTPException, CircuitoAbierto) as e:
+                # El código 200 ya fue enviado: se informa el corte al final
+                error = describir_error(e)
+                break
+        cierre = {'total': total}
+        if error:
+            cierre.update(parcial=True, error=error)
+        yield '], ' + json.dumps(cierre)[1:]
+
+    return StreamingResponse(generar(), media_type='application/json')
 
 
 @app.get("/ms4/api/proveedores-activos")
@@ -261,19 +474,18 @@ async def get_proveedores_activos():
     """
     Obtener proveedores activos con su información de entrega
     """
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        try:
-            proveedores_response = await client.get(
-                f"{PROVEEDORES_SERVICE_URL}/api/proveedores/estado/ACTIVO"
-            )
-            if proveedores_response.status_code == 200:
-                return proveedores_response.json()
-            else:
-                raise HTTPException(
-                    status_code=500, detail="Error al obtener proveedores")
-        except httpx.HTTPError as e:
+    try:
+        proveedores_response = await get_downstream(
+            'proveedores', f"{PROVEEDORES_SERVICE_URL}/api/proveedores/estado/ACTIVO"
+        )
+        if proveedores_response.status_code == 200:
+            return proveedores_response.json()
+        else:
             raise HTTPException(
-                status_code=500, detail=f"Error al consultar servicio de proveedores: {str(e)}")
+                status_code=500, detail="Error al obtener proveedores")
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error al consultar servicio de proveedores: {str(e)}")
 
 if __name__ == "__main__":
     import uvicorn
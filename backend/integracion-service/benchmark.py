@@ -0,0 +1,107 @@
+"""
+Benchmark del cliente HTTP: un AsyncClient por petición vs. un pool compartido
+
+Levanta un servicio stub local y mide p50/p99 de una petición agregada que,
+como dashboard-resumen, consulta tres endpoints del downstream.
+
+    python benchmark.py --peticiones 2000 --concurrencia 20
+"""
+import argparse
+import asyncio
+import multiprocessing
+import socket
+import statistics
+import time
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+async def stub(request):
+    await asyncio.sleep(0.001)  # Latencia simulada del downstream
+    return JSONResponse({'total': 1, 'productos': []})
+
+
+def servir_stub(puerto: int):
+    uvicorn.run(Starlette(routes=[Route('/{ruta:path}', stub)]),
+                host='127.0.0.1', port=puerto, log_level='warning')
+
+
+def levantar_stub(puerto: int) -> multiprocessing.Process:
+    """Servicio stub en otro proceso para no competir por el GIL"""
+    proceso = multiprocessing.Process(
+        target=servir_stub, args=(puerto,), daemon=True)
+    proceso.start()
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', puerto), timeout=1).close()
+            return proceso
+        except OSError:
+            time.sleep(0.05)
+
+
+async def agregada_por_peticion(url: str, _cliente):
+    """Patrón anterior: se abre un cliente nuevo en cada petición"""
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        for ruta in ('/productos', '/ordenes', '/proveedores'):
+            await client.get(url + ruta)
+
+
+async def agregada_compartida(url: str, client: httpx.AsyncClient):
+    """Patrón nuevo: pool de conexiones de la aplicación"""
+    for ruta in ('/productos', '/ordenes', '/proveedores'):
+        await client.get(url + ruta)
+
+
+async def medir(funcion, url, peticiones, concurrencia):
+    latencias = []
+    semaforo = asyncio.Semaphore(concurrencia)
+    limites = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+    async with httpx.AsyncClient(timeout=10.0, limits=limites) as client:
+        async def una():
+            async with semaforo:
+                inicio = time.perf_counter()
+                await funcion(url, client)
+                latencias.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(una() for _ in range(peticiones)))
+        duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        'req_s': peticiones / duracion,
+        'p50_ms': latencias[len(latencias) // 2] * 1000,
+        'p99_ms': latencias[int(len(latencias) * 0.99)] * 1000,
+        'media_ms': statistics.fmean(latencias) * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--peticiones', type=int, default=2000)
+    parser.add_argument('--concurrencia', type=int, default=20)
+    parser.add_argument('--puerto', type=int, default=8799)
+    args = parser.parse_args()
+
+    proceso = levantar_stub(args.puerto)
+    # "localhost" para incluir también la resolución de nombres
+    url = f'http://localhost:{args.puerto}'
+
+    print(f"{'cliente':<16}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for nombre, funcion in (('por petición', agregada_por_peticion),
+                            ('compartido', agregada_compartida)):
+        await medir(funcion, url, 50, args.concurrencia)  # Calentamiento
+        r = await medir(funcion, url, args.peticiones, args.concurrencia)
+        print(f"{nombre:<16}{r['req_s']:>10.1f}{r['p50_ms']:>10.2f}"
+              f"{r['p99_ms']:>10.2f}")
+
+    proceso.terminate()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""Cache asíncrono en memoria para las respuestas agregadas de integracion-service
+
+Cada clave tiene un periodo fresco (`ttl`) y luego un periodo en que todavía
+se puede servir vencida (`stale`) mientras se recarga en segundo plano
+(stale-while-revalidate). Las peticiones concurrentes por una misma clave
+comparten una única carga en curso (single-flight), de modo que una ráfaga
+no multiplica las llamadas al servicio de origen.
+"""
+from collections import OrderedDict
+import asyncio
+import time
+
+
+class CacheAsync:
+    """Cache por clave con TTL, desalojo LRU, stale-while-revalidate y single-flight"""
+
+    def __init__(self, ttl: float, stale: float = 0.0, max_entradas: int = 1024):
+        self.ttl = ttl
+        self.stale = stale
+        self.max_entradas = max_entradas
+        # clave -> (valor, fresco_hasta, vence)
+        self._entradas = OrderedDict()
+        self._en_vuelo = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        # Misses que se unieron a una carga ya en curso
+        self.compartidas = 0
+
+    async def obtener(self, clave, cargar):
+        """Retornar el valor de `clave`, usando `cargar()` si no está o venció"""
+        ahora = time.monotonic()
+        entrada = self._entradas.get(clave)
+        if entrada is not None:
+            valor, fresco_hasta, vence = entrada
+            if ahora < fresco_hasta:
+                self.hits += 1
+                self._entradas.move_to_end(clave)
+                return valor
+            if ahora < vence:
+                # Se responde con el valor vencido y se recarga en segundo plano
+                self.stale_hits += 1
+                self._entradas.move_to_end(clave)
+                self._cargar(clave, cargar)
+                return valor
+
+        if clave in self._en_vuelo:
+            self.compartidas += 1
+        else:
+            self.misses += 1
+        # shield: si se cancela esta petición, la carga compartida continúa
+        return await asyncio.shield(self._cargar(clave, cargar))
+
+    def _cargar(self, clave, cargar) -> asyncio.Task:
+        """Tarea de carga de `clave`, reutilizando la que esté en curso"""
+        tarea = self._en_vuelo.get(clave)
+        if tarea is None:
+            tarea = asyncio.create_task(self._ejecutar(clave, cargar))
+            # Evita el aviso de excepción no recuperada en recargas de fondo
+            tarea.add_done_callback(
+                lambda t: t.cancelled() or t.exception())
+            self._en_vuelo[clave] = tarea
+        return tarea
+
+    async def _ejecutar(self, clave, cargar):
+        try:
+            valor = await cargar()
+            ahora = time.monotonic()
+            self._entradas[clave] = (
+                valor, ahora + self.ttl, ahora + self.ttl + self.stale)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+            return valor
+        finally:
+            self._en_vuelo.pop(clave, None)
+
+    def invalidar(self, clave=None):
+        """Eliminar una clave, o todas si no se indica"""
+        if clave is None:
+            self._entradas.clear()
+        else:
+            self._entradas.pop(clave, None)
+
+    def estadisticas(self) -> dict:
+        total = self.hits + self.stale_hits + self.misses + self.compartidas
+        return {
+            'entradas': len(self._entradas),
+            'en_vuelo': len(self._en_vuelo),
+            'ttl': self.ttl,
+            'stale': self.stale,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'compartidas': self.compartidas,
+            'hit_ratio': round((self.hits + self.stale_hits) / total, 4)
+            if total else None,
+        }
@@ -0,0 +1,125 @@
+"""Circuit breaker por servicio downstream para integracion-service
+
+Cada servicio lleva una ventana con el resultado y la latencia de sus últimas
+llamadas. Si la proporción de errores o de llamadas lentas supera el umbral,
+el circuito se abre y las llamadas fallan de inmediato durante
+`abierto_segundos`, en lugar de esperar el timeout completo. Luego pasa a
+semiabierto y deja salir una sola llamada de prueba: si responde bien y a
+tiempo se cierra, si no vuelve a abrirse.
+
+Cada cambio de estado inicia una generación nueva. `permitir()` entrega un
+Permiso con la generación en que se autorizó la llamada, y `registrar()`
+descarta los resultados de generaciones anteriores: una llamada lenta que
+salió con el circuito cerrado no decide la prueba del semiabierto ni vuelve
+a abrir un circuito que ya está abierto.
+
+La misma ventana sirve para calcular un timeout adaptativo a partir del p99
+de las llamadas exitosas recientes.
+"""
+from collections import deque
+import time
+
+
+class CircuitoAbierto(Exception):
+    """El servicio tiene el circuito abierto y la llamada no se realizó"""
+
+    def __init__(self, servicio: str):
+        super().__init__(f"Servicio {servicio} no disponible (circuito abierto)")
+        self.servicio = servicio
+
+
+class Permiso:
+    """Autorización de una llamada: la generación del circuito en que se
+    concedió y si es la llamada de prueba del estado semiabierto"""
+    __slots__ = ('generacion', 'prueba')
+
+    def __init__(self, generacion: int, prueba: bool = False):
+        self.generacion = generacion
+        self.prueba = prueba
+
+
+class CircuitBreaker:
+    CERRADO = 'cerrado'
+    ABIERTO = 'abierto'
+    SEMIABIERTO = 'semiabierto'
+
+    def __init__(self, servicio: str, ventana: int = 20, min_llamadas: int = 10,
+                 umbral_errores: float = 0.5, umbral_lentas: float = 0.8,
+                 lenta_segundos: float = 2.0, abierto_segundos: float = 10.0):
+        self.servicio = servicio
+        self.min_llamadas = min_llamadas
+        self.umbral_errores = umbral_errores
+        self.umbral_lentas = umbral_lentas
+        self.lenta_segundos = lenta_segundos
+        self.abierto_segundos = abierto_segundos
+        # (exito, latencia) de las últimas llamadas
+        self._resultados = deque(maxlen=ventana)
+        self.estado = self.CERRADO
+        self._abierto_hasta = 0.0
+        self._prueba_en_curso = False
+        self._generacion = 0
+
+    def permitir(self):
+        """Retornar un Permiso si se puede llamar al servicio ahora, o None"""
+        if self.estado == self.ABIERTO:
+            if time.monotonic() < self._abierto_hasta:
+                return None
+            self._cambiar_estado(self.SEMIABIERTO)
+        if self.estado == self.SEMIABIERTO:
+            if self._prueba_en_curso:
+                return None
+            self._prueba_en_curso = True
+            return Permiso(self._generacion, prueba=True)
+        return Permiso(self._generacion)
+
+    def registrar(self, permiso: Permiso, exito: bool, latencia: float):
+        """Registrar el resultado de una llamada autorizada con `permiso`"""
+        if permiso.generacion != self._generacion:
+            # Autorizada antes del último cambio de estado
+            return
+        lenta = latencia >= self.lenta_segundos
+        if permiso.prueba:
+            if exito and not lenta:
+                self._cambiar_estado(self.CERRADO)
+            else:
+                self._abrir()
+            return
+
+        self._resultados.append((exito, latencia))
+        total = len(self._resultados)
+        if total < self.min_llamadas:
+            return
+        errores = sum(1 for ok, _ in self._resultados if not ok)
+        lentas = sum(1 for _, lat in self._resultados
+                     if lat >= self.lenta_segundos)
+        if errores / total >= self.umbral_errores or \
+                lentas / total >= self.umbral_lentas:
+            self._abrir()
+
+    def _cambiar_estado(self, estado: str):
+        self.estado = estado
+        self._generacion += 1
+        self._prueba_en_curso = False
+        self._resultados.clear()
+
+    def _abrir(self):
+        self._cambiar_estado(self.ABIERTO)
+        self._abierto_hasta = time.monotonic() + self.abierto_segundos
+
+    def timeout_adaptativo(self, maximo: float, minimo: float, factor: float) -> float:
+        """Timeout de `factor` × p99 de las llamadas exitosas, entre minimo y maximo"""
+        latencias = sorted(lat for ok, lat in self._resultados if ok)
+        if len(latencias) < self.min_llamadas:
+            return maximo
+        p99 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))]
+        return min(maximo, max(minimo, p99 * factor))
+
+    def resumen(self) -> dict:
+        total = len(self._resultados)
+        return {
+            'estado': self.estado,
+            'llamadas_ventana': total,
+            'tasa_errores': round(
+                sum(1 for ok, _ in self._resultados if not ok) / total, 4)
+            if total else None,
+        }
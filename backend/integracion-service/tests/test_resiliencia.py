@@ -0,0 +1,115 @@
+import pytest
+
+import resiliencia
+from resiliencia import CircuitBreaker
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(resiliencia.time, 'monotonic', reloj)
+    return reloj
+
+
+@pytest.fixture
+def breaker(reloj):
+    return CircuitBreaker('productos', ventana=4, min_llamadas=4,
+                          umbral_errores=0.5, lenta_segundos=2.0,
+                          abierto_segundos=10.0)
+
+
+def abrir(breaker):
+    for _ in range(4):
+        breaker.registrar(breaker.permitir(), False, 0.1)
+    assert breaker.estado == CircuitBreaker.ABIERTO
+
+
+def test_se_abre_con_errores_y_rechaza_llamadas(breaker):
+    abrir(breaker)
+    assert breaker.permitir() is None
+
+
+def test_prueba_exitosa_cierra_el_circuito(breaker, reloj):
+    abrir(breaker)
+    reloj.ahora += 10
+    prueba = breaker.permitir()
+    assert prueba is not None and prueba.prueba
+    assert breaker.estado == CircuitBreaker.SEMIABIERTO
+    # Mientras la prueba está en curso no sale ninguna otra llamada
+    assert breaker.permitir() is None
+
+    breaker.registrar(prueba, True, 0.1)
+    assert breaker.estado == CircuitBreaker.CERRADO
+    assert breaker.permitir() is not None
+
+
+@pytest.mark.parametrize('exito, latencia', [(False, 0.1), (True, 5.0)])
+def test_prueba_fallida_o_lenta_reabre_el_circuito(breaker, reloj, exito,
+                                                   latencia):
+    abrir(breaker)
+    reloj.ahora += 10
+    breaker.registrar(breaker.permitir(), exito, latencia)
+    assert breaker.estado == CircuitBreaker.ABIERTO
+    assert breaker._abierto_hasta == reloj.ahora + 10
+
+
+def test_exito_viejo_no_decide_el_semiabierto(breaker, reloj):
+    vieja = breaker.permitir()
+    abrir(breaker)
+    reloj.ahora += 10
+    prueba = breaker.permitir()
+
+    # Termina la llamada que salió con el circuito cerrado
+    breaker.registrar(vieja, True, 0.1)
+    assert breaker.estado == CircuitBreaker.SEMIABIERTO
+    assert breaker.permitir() is None
+
+    breaker.registrar(prueba, False, 0.1)
+    assert breaker.estado == CircuitBreaker.ABIERTO
+
+
+def test_error_viejo_no_reabre_el_semiabierto(breaker, reloj):
+    vieja = breaker.permitir()
+    abrir(breaker)
+    reloj.ahora += 10
+    prueba = breaker.permitir()
+
+    breaker.registrar(vieja, False, 0.1)
+    assert breaker.estado == CircuitBreaker.SEMIABIERTO
+
+    breaker.registrar(prueba, True, 0.1)
+    assert breaker.estado == CircuitBreaker.CERRADO
+
+
+def test_resultados_viejos_no_extienden_el_circuito_abierto(breaker, reloj):
+    viejas = [breaker.permitir() for _ in range(4)]
+    abrir(breaker)
+    abierto_hasta = breaker._abierto_hasta
+
+    reloj.ahora += 5
+    for permiso in viejas:
+        breaker.registrar(permiso, False, 0.1)
+    assert breaker.estado == CircuitBreaker.ABIERTO
+    assert breaker._abierto_hasta == abierto_hasta
+    assert breaker.resumen()['llamadas_ventana'] == 0
+
+
+def test_resultados_de_antes_de_abrir_no_cuentan_al_cerrar(breaker, reloj):
+    viejas = [breaker.permitir() for _ in range(4)]
+    abrir(breaker)
+    reloj.ahora += 10
+    breaker.registrar(breaker.permitir(), True, 0.1)
+    assert breaker.estado == CircuitBreaker.CERRADO
+
+    for permiso in viejas:
+        breaker.registrar(permiso, False, 0.1)
+    assert breaker.estado == CircuitBreaker.CERRADO
+    assert breaker.resumen()['llamadas_ventana'] == 0
@@ -9,6 +9,7 @@ import java.util.UUID;
 import org.springframework.beans.factory.annotation.Autowired;
 import org.springframework.data.domain.Page;
 import org.springframework.data.domain.PageRequest;
+import org.springframework.format.annotation.DateTimeFormat;
 import org.springframework.http.HttpStatus;
 import org.springframework.http.ResponseEntity;
 import org.springframework.web.bind.annotation.CrossOrigin;
@@ -56,7 +57,23 @@ public class OrdenController {
     @Operation(summary = "Obtener todas las órdenes con paginación")
     public ResponseEntity<Map<String, Object>> getAllOrdenes(
             @RequestParam(defaultValue = "0") int page,
-            @RequestParam(defaultValue = "50") int size) {
+            @RequestParam(defaultValue = "50") int size,
+            @RequestParam(required = false) @DateTimeFormat(iso = DateTimeFormat.ISO.DATE_TIME) LocalDateTime actualizadoDesde,
+            @RequestParam(defaultValue = "0") Long despuesDeId) {
+
+        // Modo incremental: órdenes modificadas desde actualizadoDesde,
+        // recorridas por id (despuesDeId) en lugar de por número de página
+        if (actualizadoDesde != null) {
+            List<Orden> ordenes = ordenRepository.findByFechaActualizacionGreaterThanEqualAndIdGreaterThan(
+                    actualizadoDesde, despuesDeId,
+                    PageRequest.of(0, size, org.springframework.data.domain.Sort.by("id").ascending()));
+
+            Map<String, Object> response = new HashMap<>();
+            response.put("ordenes", ordenes);
+            response.put("siguienteId",
+                    ordenes.size() == size ? ordenes.get(ordenes.size() - 1).getId() : null);
+            return ResponseEntity.ok(response);
+        }
 
         Page<Orden> ordenPage = ordenRepository.findAll(
                 PageRequest.of(page, size, org.springframework.data.domain.Sort.by("id").descending()));
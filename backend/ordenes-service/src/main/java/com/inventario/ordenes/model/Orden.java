@@ -19,6 +19,8 @@ import jakarta.persistence.Index;
 import jakarta.persistence.JoinColumn;
 import jakarta.persistence.ManyToOne;
 import jakarta.persistence.OneToMany;
+import jakarta.persistence.PrePersist;
+import jakarta.persistence.PreUpdate;
 import jakarta.persistence.Table;
 import jakarta.persistence.Transient;
 import lombok.AllArgsConstructor;
@@ -31,6 +33,7 @@ import lombok.NoArgsConstructor;
         @Index(name = "idx_cliente_id", columnList = "cliente_id"),
         @Index(name = "idx_estado", columnList = "estado"),
         @Index(name = "idx_fecha_orden", columnList = "fecha_orden"),
+        @Index(name = "idx_fecha_actualizacion", columnList = "fecha_actualizacion, id"),
         @Index(name = "idx_cliente_estado", columnList = "cliente_id, estado")
 })
 @Data
@@ -56,6 +59,10 @@ public class Orden {
     @Column(name = "fecha_entrega")
     private LocalDateTime fechaEntrega;
 
+    // Se actualiza en cada alta o modificación; la usa la ingesta incremental
+    @Column(name = "fecha_actualizacion")
+    private LocalDateTime fechaActualizacion;
+
     @Column(nullable = false)
     private String estado; // PENDIENTE, PROCESANDO, ENVIADO, ENTREGADO, CANCELADO
 
@@ -73,6 +80,12 @@ public class Orden {
     @Transient
     private Long clienteId; // Campo temporal para recibir el ID del cliente en JSON
 
+    @PrePersist
+    @PreUpdate
+    public void marcarActualizacion() {
+        this.fechaActualizacion = LocalDateTime.now();
+    }
+
     @Transient
     @JsonProperty("clienteId")
     public Long getClienteId() {
@@ -1,8 +1,10 @@
 package com.inventario.ordenes.repository;
 
+import java.time.LocalDateTime;
 import java.util.List;
 import java.util.Optional;
 
+import org.springframework.data.domain.Pageable;
 import org.springframework.data.jpa.repository.JpaRepository;
 import org.springframework.stereotype.Repository;
 
@@ -15,4 +17,7 @@ public interface OrdenRepository extends JpaRepository<Orden, Long> {
     List<Orden> findByCliente_Id(Long clienteId);
 
     List<Orden> findByEstado(String estado);
+
+    List<Orden> findByFechaActualizacionGreaterThanEqualAndIdGreaterThan(
+            LocalDateTime desde, Long idDesde, Pageable pageable);
 }
@@ -1,9 +1,20 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
 from flask_swagger_ui import get_swaggerui_blueprint
 from flask_cors import CORS
-from datetime import datetime
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+from cache import CacheRespuestas, crear_backend
+import base64
+import csv
+import io
+import json
 import os
+import re
 
 app = Flask(__name__)
 CORS(app)
@@ -15,8 +26,31 @@ app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
 )
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Pool de conexiones por proceso. Con gunicorn el total de conexiones a
+# MySQL es workers × (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+    'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+}
+# SQLite (desarrollo y pruebas) usa un pool sin tamaño configurable
+if make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name() != 'sqlite':
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'].update(
+        pool_size=int(os.getenv('DB_POOL_SIZE', 10)),
+        max_overflow=int(os.getenv('DB_MAX_OVERFLOW', 5)),
+        pool_timeout=int(os.getenv('DB_POOL_TIMEOUT', 10)),
+    )
+
 db = SQLAlchemy(app)
 
+# Cache de respuestas para lecturas frecuentes (ver cache.py)
+cache_respuestas = CacheRespuestas(
+    crear_backend(os.getenv('CACHE_URL', 'memory://'),
+                  int(os.getenv('CACHE_MAX_ENTRADAS', 2048))),
+    ttl=int(os.getenv('CACHE_TTL', 30))
+)
+# Sólo se cachean las primeras páginas del listado
+CACHE_MAX_PAGINAS = int(os.getenv('CACHE_MAX_PAGINAS', 5))
+
 # Modelos
 
 
@@ -29,7 +63,10 @@ class Categoria(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(100), nullable=False, unique=True)
     descripcion = db.Column(db.Text)
-    productos = db.relationship('Producto', backref='categoria', lazy=True)
+    # La categoría se carga con JOIN junto al producto para evitar una
+    # consulta adicional por cada fila al serializar
+    productos = db.relationship('Producto', backref=db.backref(
+        'categoria', lazy='joined', innerjoin=True), lazy=True)
 
 
 class Producto(db.Model):
@@ -40,7 +77,11 @@ class Producto(db.Model):
         db.Index('idx_producto_sku', 'sku'),
         db.Index('idx_producto_proveedor', 'proveedor'),
         db.Index('idx_producto_fecha_creacion', 'fecha_creacion'),
+        db.Index('idx_producto_fecha_actualizacion',
+                 'fecha_actualizacion', 'id'),
         db.Index('idx_producto_stock', 'stock'),
+        db.Index('idx_producto_fulltext', 'nombre',
+                 'descripcion', mysql_prefix='FULLTEXT'),
     )
 
     id = db.Column(db.Integer, primary_key=True)
@@ -75,52 +116,199 @@ def health():
     return jsonify({'status': 'healthy', 'service': 'productos'}), 200
 
 
+@app.route('/api/cache/estadisticas', methods=['GET'])
+def estadisticas_cache():
+    """Contadores de hits/misses del cache de respuestas de este proceso"""
+    return jsonify({'pid': os.getpid(), **cache_respuestas.estadisticas()}), 200
+
+
+def clave_lista_productos():
+    """Clave de cache para las primeras páginas del listado, o None"""
+    if request.args.get('cursor') or 'ids' in request.args or \
+            'skus' in request.args:
+        return None
+    if 'cursor' not in request.args and \
+            request.args.get('page', 1, type=int) > CACHE_MAX_PAGINAS:
+        return None
+    # Cualquier escritura sobre productos cambia la generación e invalida
+    # todas las páginas cacheadas de una vez
+    generacion = cache_respuestas.generacion('productos')
+    if generacion is None:
+        return None
+    return f'productos:{generacion}:{urlencode(sorted(request.args.items()))}'
+
+
+def invalidar_productos(*ids):
+    """Invalidar el detalle de los productos indicados y los listados"""
+    cache_respuestas.invalidar(
+        *(f'producto:{i}' for i in ids), generaciones=('productos',))
+
+
+def serializar_producto(p):
+    """Convertir un producto a diccionario para la respuesta JSON"""
+    return {
+        'id': p.id,
+        'nombre': p.nombre,
+        'descripcion': p.descripcion,
+        'precio': p.precio,
+        'stock': p.stock,
+        'categoria': p.categoria.nombre,
+        'proveedor': p.proveedor,
+        'sku': p.sku,
+        'fecha_creacion': p.fecha_creacion.isoformat(),
+        'fecha_actualizacion': p.fecha_actualizacion.isoformat()
+    }
+
+
+def codificar_cursor(*valores):
+    """Generar un cursor opaco a partir de los valores de la última fila"""
+    payload = json.dumps(valores).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor, *tipos):
+    """Recuperar los valores de un cursor opaco, convertidos con `tipos`"""
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        if len(valores) != len(tipos):
+            return None
+        return tuple(tipo(v) for tipo, v in zip(tipos, valores))
+    except (ValueError, TypeError):
+        return None
+
+
+# Máximo de productos por página en los modos por cursor
+CURSOR_MAX_PER_PAGE = int(os.getenv('CURSOR_MAX_PER_PAGE', 1000))
+
+
+def pagina_por_cursor(productos_query, orden, per_page, valores_cursor, total_query):
+    """Responder una página keyset: `valores_cursor` extrae de la última
+    fila los valores que forman el next_cursor"""
+    # Se pide un registro extra para saber si existe una página siguiente
+    productos = productos_query.order_by(*orden).limit(per_page + 1).all()
+
+    hay_mas = len(productos) > per_page
+    productos = productos[:per_page]
+
+    respuesta = {
+        'productos': [serializar_producto(p) for p in productos],
+        'per_page': per_page,
+        'next_cursor': codificar_cursor(*valores_cursor(productos[-1]))
+        if hay_mas and productos else None
+    }
+
+    # El total sólo se calcula cuando se solicita explícitamente
+    if request.args.get('include_total', 'false').lower() == 'true':
+        respuesta['total'] = total_query.count()
+
+    return jsonify(respuesta), 200
+
+
 @app.route('/api/productos', methods=['GET'])
+@cache_respuestas.cachear(clave_lista_productos)
 def get_productos():
     """Obtener todos los productos con paginación"""
-    page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 50, type=int)
 
+    # Consulta por lote: ?ids=1,2,3 o ?skus=SKU-1,SKU-2
+    if 'ids' in request.args or 'skus' in request.args:
+        return get_productos_lote()
+
+    if ('cursor' in request.args or 'stock_lt' in request.args) and \
+            not 1 <= per_page <= CURSOR_MAX_PER_PAGE:
+        return jsonify({'error': f'per_page debe estar entre 1 y {CURSOR_MAX_PER_PAGE}'}), 400
+
+    # Productos con stock bajo, paginados por cursor
+    if 'stock_lt' in request.args:
+        stock_lt = request.args.get('stock_lt', type=int)
+        if stock_lt is None:
+            return jsonify({'error': 'stock_lt debe ser un entero'}), 400
+        return get_productos_stock_bajo(
+            stock_lt, request.args.get('cursor', ''), per_page)
+
+    # Paginación por cursor (keyset): ?cursor= para la primera página y
+    # luego el valor de next_cursor. No usa OFFSET ni COUNT(*)
+    if 'cursor' in request.args:
+        return get_productos_cursor(request.args['cursor'], per_page)
+
+    page = request.args.get('page', 1, type=int)
+
     # Ordenar por fecha de creación descendente (más recientes primero)
     productos = Producto.query.order_by(Producto.fecha_creacion.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
 
     return jsonify({
-        'productos': [{
-            'id': p.id,
-            'nombre': p.nombre,
-            'descripcion': p.descripcion,
-            'precio': p.precio,
-            'stock': p.stock,
-            'categoria': p.categoria.nombre,
-            'proveedor': p.proveedor,
-            'sku': p.sku,
-            'fecha_creacion': p.fecha_creacion.isoformat(),
-            'fecha_actualizacion': p.fecha_actualizacion.isoformat()
-        } for p in productos.items],
+        'productos': [serializar_producto(p) for p in productos.items],
         'total': productos.total,
         'pages': productos.pages,
         'current_page': productos.page
     }), 200
 
 
+# Máximo de ids o skus aceptados por una consulta por lote
+LOTE_MAX_IDS = int(os.getenv('LOTE_MAX_IDS', 500))
+
+
+def get_productos_lote():
+    """Resolver varios productos por id o sku con un solo IN (...)"""
+    if 'ids' in request.args:
+        campo = 'id'
+        try:
+            claves = [int(v) for v in request.args['ids'].split(',') if v]
+        except ValueError:
+            return jsonify({'error': 'ids debe ser una lista de enteros'}), 400
+        columna = Producto.id
+    else:
+        campo = 'sku'
+        claves = [v for v in request.args['skus'].split(',') if v]
+        columna = Producto.sku
+
+    # Conservar el orden de la solicitud sin repetidos
+    claves = list(dict.fromkeys(claves))
+    if len(claves) > LOTE_MAX_IDS:
+        return jsonify({'error': f'Máximo {LOTE_MAX_IDS} {campo}s por consulta'}), 400
+
+    productos = Producto.query.filter(columna.in_(claves)).all() if claves else []
+    encontrados = {getattr(p, campo): serializar_producto(p) for p in productos}
+
+    return jsonify({
+        'productos': {str(c): encontrados[c] for c in claves if c in encontrados},
+        'no_encontrados': [c for c in claves if c not in encontrados]
+    }), 200
+
+
+def get_productos_cursor(cursor, per_page):
+    """Página de productos ordenada por (fecha_creacion, id) descendente"""
+    productos_query = Producto.query
+
+    if cursor:
+        posicion = decodificar_cursor(cursor, datetime.fromisoformat, int)
+        if posicion is None:
+            return jsonify({'error': 'Cursor inválido'}), 400
+        fecha, producto_id = posicion
+        # Recorre idx_producto_fecha_creacion (InnoDB agrega el id al índice)
+        productos_query = productos_query.filter(db.or_(
+            Producto.fecha_creacion < fecha,
+            db.and_(Producto.fecha_creacion == fecha, Producto.id < producto_id)
+        ))
+
+    return pagina_por_cursor(
+        productos_query,
+        (Producto.fecha_creacion.desc(), Producto.id.desc()),
+        per_page,
+        lambda p: (p.fecha_creacion.isoformat(), p.id),
+        Producto.query
+    )
+
+
 @app.route('/api/productos/<int:id>', methods=['GET'])
+@cache_respuestas.cachear(lambda id: f'producto:{id}')
 def get_producto(id):
     """Obtener un producto por ID"""
     producto = Producto.query.get_or_404(id)
-    return jsonify({
-        'id': producto.id,
-        'nombre': producto.nombre,
-        'descripcion': producto.descripcion,
-        'precio': producto.precio,
-        'stock': producto.stock,
-        'categoria': producto.categoria.nombre,
-        'proveedor': producto.proveedor,
-        'sku': producto.sku,
-        'fecha_creacion': producto.fecha_creacion.isoformat(),
-        'fecha_actualizacion': producto.fecha_actualizacion.isoformat()
-    }), 200
+    return jsonify(serializar_producto(producto)), 200
 
 
 @app.route('/api/productos', methods=['POST'])
@@ -140,10 +328,433 @@ def create_producto():
 
     db.session.add(nuevo_producto)
     db.session.commit()
+    invalidar_productos()
 
     return jsonify({'message': 'Producto creado', 'id': nuevo_producto.id}), 201
 
 
+def get_productos_stock_bajo(stock_lt, cursor, per_page):
+    """Productos con stock < stock_lt, ordenados por (stock, id) ascendente
+
+    Usa idx_producto_stock tanto para el filtro como para el orden, así que
+    recorrer todo el resultado cuesta una consulta indexada por página.
+    """
+    filtro = Producto.stock < stock_lt
+    productos_query = Producto.query.filter(filtro)
+
+    if cursor:
+        posicion = decodificar_cursor(cursor, int, int)
+        if posicion is None:
+            return jsonify({'error': 'Cursor inválido'}), 400
+        stock, producto_id = posicion
+        productos_query = productos_query.filter(db.or_(
+            Producto.stock > stock,
+            db.and_(Producto.stock == stock, Producto.id > producto_id)
+        ))
+
+    return pagina_por_cursor(
+        productos_query,
+        (Producto.stock.asc(), Producto.id.asc()),
+        per_page,
+        lambda p: (p.stock, p.id),
+        Producto.query.filter(filtro)
+    )
+
+
+# Filas que se leen del cursor del servidor por cada bloque de la exportación
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 1000))
+
+COLUMNAS_EXPORT = ('id', 'nombre', 'descripcion', 'precio', 'stock',
+                   'categoria', 'proveedor', 'sku', 'fecha_creacion',
+                   'fecha_actualizacion')
+
+
+def filas_export(updated_since):
+    """Productos como diccionarios en orden (fecha_actualizacion, id)
+
+    Se consulta con stream_results, así que el driver usa un cursor del
+    servidor y en memoria sólo hay un bloque de EXPORT_CHUNK_SIZE filas.
+    """
+    consulta = db.select(
+        Producto.id, Producto.nombre, Producto.descripcion, Producto.precio,
+        Producto.stock, Categoria.nombre.label('categoria'),
+        Producto.proveedor, Producto.sku, Producto.fecha_creacion,
+        Producto.fecha_actualizacion
+    ).join(Categoria, Producto.categoria_id == Categoria.id).order_by(
+        Producto.fecha_actualizacion, Producto.id)
+    if updated_since is not None:
+        consulta = consulta.where(
+            Producto.fecha_actualizacion >= updated_since)
+
+    resultado = db.session.execute(consulta.execution_options(
+        stream_results=True, yield_per=EXPORT_CHUNK_SIZE))
+    for bloque in resultado.partitions():
+        filas = []
+        for fila in bloque:
+            fila = fila._asdict()
+            for campo in ('fecha_creacion', 'fecha_actualizacion'):
+                if fila[campo] is not None:
+                    fila[campo] = fila[campo].isoformat()
+            filas.append(fila)
+        yield filas
+
+
+def exportar_ndjson(bloques):
+    for filas in bloques:
+        yield ''.join(json.dumps(f, ensure_ascii=False) + '\n' for f in filas)
+
+
+def exportar_csv(bloques):
+    buffer = io.StringIO()
+    escritor = csv.DictWriter(buffer, fieldnames=COLUMNAS_EXPORT)
+    escritor.writeheader()
+    for filas in bloques:
+        escritor.writerows(filas)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Sin filas sólo se envía el encabezado
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@app.route('/api/productos/export', methods=['GET'])
+def exportar_productos():
+    """Exportar el catálogo completo en streaming (NDJSON o CSV)
+
+    Las filas salen ordenadas por (fecha_actualizacion, id); con
+    ?updated_since=<ISO 8601> sólo se exportan las modificadas desde esa
+    fecha (inclusive), para ingestas incrementales.
+    """
+    formato = request.args.get('format', 'ndjson').lower()
+    if formato not in ('ndjson', 'csv'):
+        return jsonify({'error': 'format debe ser ndjson o csv'}), 400
+
+    updated_since = request.args.get('updated_since')
+    if updated_since:
+        try:
+            updated_since = datetime.fromisoformat(updated_since)
+        except ValueError:
+            return jsonify({'error': 'updated_since debe ser una fecha ISO 8601'}), 400
+        if updated_since.tzinfo is not None:
+            # Las fechas se guardan en UTC sin zona horaria
+            updated_since = updated_since.astimezone(
+                timezone.utc).replace(tzinfo=None)
+    else:
+        updated_since = None
+
+    bloques = filas_export(updated_since)
+    if formato == 'csv':
+        cuerpo, mimetype = exportar_csv(bloques), 'text/csv'
+    else:
+        cuerpo, mimetype = exportar_ndjson(bloques), 'application/x-ndjson'
+
+    respuesta = Response(stream_with_context(cuerpo), mimetype=mimetype)
+    respuesta.headers['Content-Disposition'] = \
+        f'attachment; filename=productos.{formato}'
+    # Marca de tiempo del servidor al iniciar la exportación, para usar
+    # como siguiente updated_since
+    respuesta.headers['X-Export-Timestamp'] = datetime.utcnow().isoformat()
+    return respuesta
+
+
+# Tamaño de cada sentencia multi-fila de /api/productos/bulk
+BULK_BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', 1000))
+
+# Campos aceptados por la carga masiva y sus tipos
+CAMPOS_BULK = {
+    'nombre': str,
+    'descripcion': str,
+    'precio': (int, float),
+    'stock': int,
+    'categoria_id': int,
+    'proveedor': str,
+}
+CAMPOS_OBLIGATORIOS = ('nombre', 'precio', 'categoria_id')
+CAMPOS_NO_NULOS = CAMPOS_OBLIGATORIOS + ('stock',)
+
+
+def leer_items_bulk():
+    """Iterar los items del cuerpo: arreglo JSON o NDJSON (un objeto por línea)
+
+    El NDJSON se lee línea a línea desde el stream, sin cargar todo el
+    cuerpo en memoria. Una línea con JSON inválido se entrega como None.
+    """
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        for linea in request.stream:
+            if not linea.strip():
+                continue
+            try:
+                yield json.loads(linea)
+            except ValueError:
+                yield None
+        return
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise ValueError('Se esperaba un arreglo JSON o NDJSON')
+    yield from data
+
+
+def validar_item_bulk(item):
+    """Retornar el motivo por el que un item no es válido, o None"""
+    if not isinstance(item, dict):
+        return 'El item debe ser un objeto JSON'
+    if not isinstance(item.get('sku'), str) or not item['sku']:
+        return 'El campo sku es obligatorio'
+    for campo, tipo in CAMPOS_BULK.items():
+        valor = item.get(campo)
+        if valor is None:
+            if campo in item and campo in CAMPOS_NO_NULOS:
+                return f'El campo {campo} no puede ser nulo'
+            continue
+        if isinstance(valor, bool) or not isinstance(valor, tipo):
+            return f'Tipo inválido para el campo {campo}'
+    return None
+
+
+def sentencia_upsert(columnas):
+    """INSERT multi-fila que actualiza `columnas` si el sku ya existe"""
+    tabla = Producto.__table__
+    if db.engine.dialect.name == 'mysql':
+        stmt = mysql.insert(tabla)
+        return stmt.on_duplicate_key_update(
+            {c: stmt.inserted[c] for c in columnas})
+    stmt = sqlite.insert(tabla)
+    return stmt.on_conflict_do_update(
+        index_elements=['sku'], set_={c: stmt.excluded[c] for c in columnas})
+
+
+def procesar_lote_bulk(lote, categorias_validas):
+    """Crear o actualizar por sku un lote de (indice, item) en una transacción"""
+    errores = []
+    skus = {item['sku'] for _, item in lote}
+
+    # Una sola consulta para saber qué skus existen y completar los campos
+    # obligatorios de las actualizaciones parciales
+    existentes = {
+        fila.sku: fila for fila in db.session.query(
+            Producto.id, Producto.sku, Producto.nombre, Producto.precio,
+            Producto.categoria_id
+        ).filter(Producto.sku.in_(skus))
+    }
+
+    # Si un sku se repite en el lote, prevalece su última aparición
+    ultimos = {item['sku']: indice for indice, item in lote}
+    ahora = datetime.utcnow()
+    grupos = {}
+    escritos = []
+    creados = actualizados = 0
+
+    for indice, item in lote:
+        sku = item['sku']
+        if ultimos[sku] != indice:
+            errores.append({'indice': indice, 'sku': sku,
+                            'error': 'sku repetido, se aplicó el último'})
+            continue
+
+        campos = {c: item[c] for c in CAMPOS_BULK if c in item}
+        existente = existentes.get(sku)
+
+        if existente is None:
+            faltantes = [c for c in CAMPOS_OBLIGATORIOS if c not in campos]
+            if faltantes:
+                errores.append({'indice': indice, 'sku': sku, 'error':
+                                f'Faltan campos para crear: {", ".join(faltantes)}'})
+                continue
+            campos.setdefault('stock', 0)
+            campos = {c: campos.get(c) for c in CAMPOS_BULK}
+
+        if 'categoria_id' in campos and campos['categoria_id'] not in categorias_validas:
+            errores.append({'indice': indice, 'sku': sku,
+                            'error': 'categoria_id no existe'})
+            continue
+
+        # Las actualizaciones parciales reenvían los campos obligatorios
+        # actuales, que no se sobrescriben porque no están en `columnas`
+        fila = {c: getattr(existente, c) for c in CAMPOS_OBLIGATORIOS} \
+            if existente is not None else {}
+        fila.update(campos)
+        fila.update(sku=sku, fecha_creacion=ahora, fecha_actualizacion=ahora)
+
+        # Las filas con los mismos campos comparten una sentencia
+        grupos.setdefault(tuple(sorted(campos)), []).append(fila)
+        escritos.append((indice, sku))
+        if existente is None:
+            creados += 1
+        else:
+            actualizados += 1
+
+    try:
+        for columnas, filas in grupos.items():
+            # Todas las filas de una sentencia deben tener las mismas claves
+            claves = set().union(*filas)
+            filas = [{c: f.get(c) for c in claves} for f in filas]
+            db.session.execute(
+                sentencia_upsert(columnas + ('fecha_actualizacion',)), filas)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        motivo = f'Error al guardar el lote: {getattr(e, "orig", e)}'
+        errores.extend({'indice': indice, 'sku': sku, 'error': motivo}
+                       for indice, sku in escritos)
+        return 0, 0, errores
+
+    if escritos:
+        invalidar_productos(*(existentes[sku].id for _, sku in escritos
+                              if sku in existentes))
+    return creados, actualizados, errores
+
+
+@app.route('/api/productos/bulk', methods=['POST'])
+def bulk_productos():
+    """Crear o actualizar productos en lote (upsert por sku)
+
+    Acepta un arreglo JSON o NDJSON (Content-Type: application/x-ndjson).
+    Los items se agrupan en sentencias INSERT ... ON DUPLICATE KEY UPDATE
+    de hasta BULK_BATCH_SIZE filas, cada lote en su propia transacción.
+    """
+    categorias_validas = {c_id for (c_id,) in db.session.query(Categoria.id)}
+    resultado = {'procesados': 0, 'creados': 0,
+                 'actualizados': 0, 'errores': []}
+    lote = []
+
+    def vaciar_lote():
+        creados, actualizados, errores = procesar_lote_bulk(
+            lote, categorias_validas)
+        resultado['creados'] += creados
+        resultado['actualizados'] += actualizados
+        resultado['errores'].extend(errores)
+        lote.clear()
+
+    try:
+        for indice, item in enumerate(leer_items_bulk()):
+            resultado['procesados'] += 1
+            error = validar_item_bulk(item)
+            if error:
+                sku = item.get('sku') if isinstance(item, dict) else None
+                resultado['errores'].append(
+                    {'indice': indice, 'sku': sku, 'error': error})
+                continue
+            lote.append((indice, item))
+            if len(lote) >= BULK_BATCH_SIZE:
+                vaciar_lote()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if lote:
+        vaciar_lote()
+
+    resultado['errores'].sort(key=lambda e: e['indice'])
+    return jsonify(resultado), 200
+
+
+def validar_ajuste_stock(ajuste):
+    """Retornar el motivo por el que un ajuste no es válido, o None"""
+    if not isinstance(ajuste, dict):
+        return 'El ajuste debe ser un objeto JSON'
+    delta = ajuste.get('delta')
+    if isinstance(delta, bool) or not isinstance(delta, int):
+        return 'El campo delta debe ser un entero'
+    if 'id' in ajuste:
+        if isinstance(ajuste['id'], bool) or not isinstance(ajuste['id'], int):
+            return 'El campo id debe ser un entero'
+    elif not isinstance(ajuste.get('sku'), str) or not ajuste['sku']:
+        return 'Se requiere id o sku'
+    return None
+
+
+@app.route('/api/productos/stock/ajustes', methods=['POST'])
+def ajustar_stock():
+    """Aplicar ajustes de stock [{id|sku, delta}] sin lectura previa
+
+    Cada ajuste es un UPDATE condicional (stock + delta >= 0), de modo que
+    dos reservas concurrentes nunca pisan el valor de la otra ni dejan el
+    stock en negativo. Todos los ajustes van en una transacción y se
+    aplican en orden de id para que las transacciones concurrentes tomen
+    los bloqueos de fila en el mismo orden. Con ?atomico=true basta un
+    ajuste rechazado para revertir todos.
+    """
+    ajustes = request.get_json(silent=True)
+    if not isinstance(ajustes, list):
+        return jsonify({'error': 'Se esperaba un arreglo de ajustes'}), 400
+    atomico = request.args.get('atomico', 'false').lower() == 'true'
+
+    resultados = [None] * len(ajustes)
+    for indice, ajuste in enumerate(ajustes):
+        error = validar_ajuste_stock(ajuste)
+        if error:
+            resultados[indice] = {'indice': indice,
+                                  'aplicado': False, 'error': error}
+
+    # Resolver los skus a id con una sola consulta
+    skus = {a['sku'] for i, a in enumerate(ajustes)
+            if resultados[i] is None and 'id' not in a}
+    ids_por_sku = dict(db.session.query(Producto.sku, Producto.id).filter(
+        Producto.sku.in_(skus))) if skus else {}
+
+    pendientes = []
+    for indice, ajuste in enumerate(ajustes):
+        if resultados[indice] is not None:
+            continue
+        producto_id = ajuste['id'] if 'id' in ajuste else ids_por_sku.get(
+            ajuste['sku'])
+        if producto_id is None:
+            resultados[indice] = {'indice': indice, 'aplicado': False,
+                                  'error': 'Producto no encontrado'}
+            continue
+        pendientes.append((producto_id, indice, ajuste['delta']))
+    pendientes.sort()
+
+    tabla = Producto.__table__
+    aplicados = []
+    rechazados = []
+    for producto_id, indice, delta in pendientes:
+        actualizacion = db.session.execute(
+            tabla.update()
+            .where(tabla.c.id == producto_id, tabla.c.stock + delta >= 0)
+            .values(stock=tabla.c.stock + delta)
+        )
+        if actualizacion.rowcount:
+            aplicados.append((producto_id, indice))
+        else:
+            rechazados.append((producto_id, indice))
+
+    # Stock resultante de los productos tocados, leído dentro de la
+    # misma transacción
+    stock_actual = dict(db.session.query(Producto.id, Producto.stock).filter(
+        Producto.id.in_({p for p, _, _ in pendientes}))) if pendientes else {}
+
+    revertido = atomico and (rechazados or any(resultados))
+    if revertido:
+        db.session.rollback()
+    else:
+        db.session.commit()
+        if aplicados:
+            invalidar_productos(*{p for p, _ in aplicados})
+
+    for producto_id, indice in rechazados:
+        resultados[indice] = {
+            'indice': indice, 'id': producto_id, 'aplicado': False,
+            'error': 'Stock insuficiente' if producto_id in stock_actual
+            else 'Producto no encontrado'
+        }
+    for producto_id, indice in aplicados:
+        resultados[indice] = {'indice': indice, 'id': producto_id,
+                              'aplicado': not revertido}
+        if revertido:
+            resultados[indice]['error'] = 'Revertido por ajustes rechazados'
+        else:
+            resultados[indice]['stock'] = stock_actual.get(producto_id)
+
+    total_aplicados = 0 if revertido else len(aplicados)
+    return jsonify({
+        'aplicados': total_aplicados,
+        'rechazados': len(ajustes) - total_aplicados,
+        'resultados': resultados
+    }), 409 if revertido else 200
+
+
 @app.route('/api/productos/<int:id>', methods=['PUT'])
 def update_producto(id):
     """Actualizar un producto existente"""
@@ -159,6 +770,7 @@ def update_producto(id):
     producto.sku = data.get('sku', producto.sku)
 
     db.session.commit()
+    invalidar_productos(id)
 
     return jsonify({'message': 'Producto actualizado'}), 200
 
@@ -169,11 +781,13 @@ def delete_producto(id):
     producto = Producto.query.get_or_404(id)
     db.session.delete(producto)
     db.session.commit()
+    invalidar_productos(id)
 
     return jsonify({'message': 'Producto eliminado'}), 200
 
 
 @app.route('/api/categorias', methods=['GET'])
+@cache_respuestas.cachear(lambda: 'categorias')
 def get_categorias():
     """Obtener todas las categorías"""
     categorias = Categoria.query.all()
@@ -194,9 +808,57 @@ def create_categoria():
     )
     db.session.add(nueva_categoria)
     db.session.commit()
+    cache_respuestas.invalidar('categorias')
     return jsonify({'message': 'Categoría creada', 'id': nueva_categoria.id}), 201
 
 
+# Largo mínimo de palabra indexada por FULLTEXT (innodb_ft_min_token_size)
+FULLTEXT_MIN_TOKEN = int(os.getenv('FULLTEXT_MIN_TOKEN', 3))
+
+
+def terminos_fulltext(texto):
+    """Convertir el texto buscado en una consulta FULLTEXT en modo booleano
+
+    Cada palabra es obligatoria y se busca por prefijo (+palabra*). Se
+    descartan los operadores del usuario y las palabras que el índice no
+    almacena por ser demasiado cortas.
+    """
+    palabras = re.findall(r'\w+', texto)
+    return ' '.join(
+        f'+{p}*' for p in palabras if len(p) >= FULLTEXT_MIN_TOKEN)
+
+
+def consulta_busqueda(texto, categoria, fulltext):
+    """Consulta de productos que coinciden con `texto` y `categoria`,
+    ordenada por relevancia y fecha de creación (más recientes primero)
+
+    Con `fulltext` se usa idx_producto_fulltext (MySQL) si el texto tiene
+    palabras indexables; si no, se busca el texto dentro del nombre.
+    """
+    productos_query = Producto.query
+    orden = [Producto.fecha_creacion.desc()]
+
+    if texto:
+        terminos = terminos_fulltext(texto)
+        if terminos and fulltext:
+            # Búsqueda sobre idx_producto_fulltext ordenada por relevancia
+            relevancia = match(Producto.nombre, Producto.descripcion,
+                               against=terminos).in_boolean_mode()
+            productos_query = productos_query.filter(relevancia)
+            orden.insert(0, relevancia.desc())
+        else:
+            # Palabras más cortas que las que guarda el índice: recorre la
+            # tabla, aceptable para estos términos poco frecuentes
+            productos_query = productos_query.filter(
+                Producto.nombre.contains(texto, autoescape=True))
+
+    if categoria:
+        productos_query = productos_query.join(Categoria).filter(
+            Categoria.nombre.contains(categoria))
+
+    return productos_query.order_by(*orden)
+
+
 @app.route('/api/productos/buscar', methods=['GET'])
 def buscar_productos():
     """Buscar productos por nombre o categoría"""
@@ -205,19 +867,10 @@ def buscar_productos():
     # Limitar a 100 resultados por defecto
     limit = int(request.args.get('limit', 100))
 
-    productos_query = Producto.query
-
-    if query:
-        productos_query = productos_query.filter(
-            Producto.nombre.contains(query))
-
-    if categoria:
-        productos_query = productos_query.join(Categoria).filter(
-            Categoria.nombre.contains(categoria))
+    productos_query = consulta_busqueda(
+        query, categoria, db.engine.dialect.name == 'mysql')
 
-    # Ordenar por fecha de creación (más recientes primero) y limitar resultados
-    productos = productos_query.order_by(
-        Producto.fecha_creacion.desc()).limit(limit).all()
+    productos = productos_query.limit(limit).all()
 
     return jsonify([{
         'id': p.id,
@@ -229,4 +882,6 @@ def buscar_productos():
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    # Servidor de desarrollo. En producción: gunicorn -c gunicorn.conf.py app:app
+    app.run(host='0.0.0.0', port=5001,
+            debug=os.getenv('FLASK_DEBUG', 'true').lower() == 'true')
@@ -0,0 +1,109 @@
+"""Benchmark de carga para los endpoints de lista y detalle de productos
+
+Mide req/s y latencias con distintos niveles de concurrencia. Para ver cómo
+escala con los núcleos, ejecutarlo contra el servicio levantado con
+distintos GUNICORN_WORKERS:
+
+    GUNICORN_WORKERS=1 gunicorn -c gunicorn.conf.py app:app
+    python benchmark.py --url http://localhost:5001 --concurrencia 1,4,16,32
+"""
+import argparse
+import http.client
+import json
+import random
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def trabajador(url, rutas, fin, latencias, errores):
+    """Repetir peticiones sobre una conexión keep-alive hasta `fin`"""
+    destino = urlsplit(url)
+    conexion = http.client.HTTPConnection(destino.hostname, destino.port,
+                                          timeout=30)
+    while time.perf_counter() < fin:
+        ruta = destino.path + random.choice(rutas)
+        inicio = time.perf_counter()
+        try:
+            conexion.request('GET', ruta)
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            if respuesta.status != 200:
+                errores.append(respuesta.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            errores.append(str(e))
+            conexion.close()
+            conexion = http.client.HTTPConnection(destino.hostname,
+                                                  destino.port, timeout=30)
+            continue
+        latencias.append(time.perf_counter() - inicio)
+    conexion.close()
+
+
+def medir(url, rutas, concurrencia, duracion):
+    """Ejecutar `concurrencia` hilos durante `duracion` segundos"""
+    latencias = []
+    errores = []
+    fin = time.perf_counter() + duracion
+    hilos = [threading.Thread(target=trabajador,
+                              args=(url, rutas, fin, latencias, errores))
+             for _ in range(concurrencia)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    latencias.sort()
+    total = len(latencias)
+    return {
+        'concurrencia': concurrencia,
+        'req_s': round(total / duracion, 1),
+        'p50_ms': round(latencias[total // 2] * 1000, 2) if total else None,
+        'p99_ms': round(latencias[int(total * 0.99)] * 1000, 2) if total else None,
+        'media_ms': round(statistics.fmean(latencias) * 1000, 2) if total else None,
+        'errores': len(errores),
+    }
+
+
+def obtener_ids(url, cantidad):
+    """Tomar ids reales para el endpoint de detalle"""
+    destino = urlsplit(url)
+    conexion = http.client.HTTPConnection(destino.hostname, destino.port,
+                                          timeout=30)
+    conexion.request(
+        'GET', f'{destino.path}/api/productos?cursor=&per_page={cantidad}')
+    datos = json.loads(conexion.getresponse().read())
+    conexion.close()
+    return [p['id'] for p in datos['productos']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:5001')
+    parser.add_argument('--concurrencia', default='1,4,16,32',
+                        help='Niveles de concurrencia separados por coma')
+    parser.add_argument('--duracion', type=float, default=10.0,
+                        help='Segundos por medición')
+    parser.add_argument('--per-page', type=int, default=50)
+    args = parser.parse_args()
+
+    ids = obtener_ids(args.url, 500)
+    escenarios = {
+        'lista': [f'/api/productos?page={p}&per_page={args.per_page}'
+                  for p in range(1, 21)],
+        'detalle': [f'/api/productos/{i}' for i in ids],
+    }
+
+    print(f"{'endpoint':<10}{'conc':>6}{'req/s':>10}{'p50 ms':>10}"
+          f"{'p99 ms':>10}{'errores':>9}")
+    for nombre, rutas in escenarios.items():
+        for concurrencia in map(int, args.concurrencia.split(',')):
+            r = medir(args.url, rutas, concurrencia, args.duracion)
+            print(f"{nombre:<10}{r['concurrencia']:>6}{r['req_s']:>10}"
+                  f"{r['p50_ms']!s:>10}{r['p99_ms']!s:>10}{r['errores']:>9}")
+
+
+if __name__ == '__main__':
+    main()
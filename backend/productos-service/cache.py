@@ -0,0 +1,222 @@
+"""Cache de respuestas para las lecturas frecuentes de productos-service
+
+El almacenamiento es intercambiable: en memoria del proceso (TTL + LRU) o
+Redis cuando varios procesos de gunicorn deben compartir las entradas y las
+invalidaciones. Se elige con CACHE_URL:
+
+    CACHE_URL=memory://                 # por defecto, un cache por proceso
+    CACHE_URL=redis://redis:6379/0      # compartido entre procesos
+    CACHE_URL=none                      # desactivado
+"""
+from collections import OrderedDict
+from functools import wraps
+import hashlib
+import threading
+import time
+
+from flask import Response, request
+
+
+class MemoriaCache:
+    """Cache en memoria del proceso con expiración por TTL y desalojo LRU"""
+
+    def __init__(self, max_entradas=2048):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        # Las generaciones no expiran ni se desalojan: si se perdieran, una
+        # clave con una generación vieja podría volver a ser válida
+        self._generaciones = {}
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            expira, valor = entrada
+            if expira < time.monotonic():
+                del self._entradas[clave]
+                return None
+            self._entradas.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor, ttl):
+        with self._lock:
+            self._entradas[clave] = (time.monotonic() + ttl, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def delete(self, *claves):
+        with self._lock:
+            for clave in claves:
+                self._entradas.pop(clave, None)
+
+    def generacion(self, nombre):
+        with self._lock:
+            return self._generaciones.get(nombre, 0)
+
+    def incrementar_generacion(self, nombre):
+        with self._lock:
+            self._generaciones[nombre] = self._generaciones.get(nombre, 0) + 1
+
+    def __len__(self):
+        return len(self._entradas)
+
+
+class RedisCache:
+    """Cache compartido en Redis; el LRU lo aplica maxmemory-policy del servidor
+
+    Si Redis no responde el servicio sigue funcionando sin cache: las
+    lecturas cuentan como miss, no se guarda nada y las invalidaciones se
+    omiten. El error se informa una vez por caída y otra al recuperarse.
+    """
+
+    def __init__(self, url):
+        import redis  # Dependencia opcional, sólo si CACHE_URL es redis://
+        self._redis = redis.Redis.from_url(
+            url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._error = redis.RedisError
+        self._disponible = True
+
+    def _ejecutar(self, operacion, *args, por_defecto=None, **kwargs):
+        try:
+            resultado = operacion(*args, **kwargs)
+        except self._error as e:
+            if self._disponible:
+                self._disponible = False
+                print(f"⚠ Cache Redis no disponible, se sigue sin cache: {e}")
+            return por_defecto
+        if not self._disponible:
+            self._disponible = True
+            print("✓ Cache Redis disponible nuevamente")
+        return resultado
+
+    def get(self, clave):
+        return self._ejecutar(self._redis.get, clave)
+
+    def set(self, clave, valor, ttl):
+        self._ejecutar(self._redis.set, clave, valor, ex=ttl)
+
+    def delete(self, *claves):
+        if claves:
+            self._ejecutar(self._redis.delete, *claves)
+
+    def generacion(self, nombre):
+        """Generación actual de `nombre`, o None si Redis no responde"""
+        return self._ejecutar(self._generacion, nombre)
+
+    def _generacion(self, nombre):
+        clave = f'gen:{nombre}'
+        valor = self._redis.get(clave)
+        if valor is None:
+            # Si Redis desalojó el contador se reinicia en un valor nuevo
+            # para no reutilizar generaciones anteriores
+            self._redis.set(clave, time.time_ns(), nx=True)
+            valor = self._redis.get(clave)
+        return int(valor)
+
+    def incrementar_generacion(self, nombre):
+        self._ejecutar(self._incrementar_generacion, nombre)
+
+    def _incrementar_generacion(self, nombre):
+        self._generacion(nombre)
+        self._redis.incr(f'gen:{nombre}')
+
+    def __len__(self):
+        return self._ejecutar(self._redis.dbsize, por_defecto=0)
+
+
+def crear_backend(url, max_entradas=2048):
+    """Construir el almacenamiento indicado por CACHE_URL, o None si está desactivado"""
+    if not url or url == 'none':
+        return None
+    if url.startswith('memory://'):
+        return MemoriaCache(max_entradas)
+    if url.startswith(('redis://', 'rediss://')):
+        return RedisCache(url)
+    raise ValueError(f'CACHE_URL no soportada: {url}')
+
+
+class CacheRespuestas:
+    """Cache read-through de respuestas JSON con ETag y contadores"""
+
+    def __init__(self, backend, ttl=30):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidaciones = 0
+        self._lock = threading.Lock()
+
+    def _contar(self, campo):
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+    def cachear(self, calcular_clave):
+        """Decorador para vistas GET; `calcular_clave` recibe los argumentos
+        de la vista y retorna la clave, o None para no cachear esa petición"""
+        def decorador(vista):
+            @wraps(vista)
+            def envoltura(*args, **kwargs):
+                clave = calcular_clave(*args, **kwargs) \
+                    if self.backend is not None else None
+                if clave is None:
+                    return vista(*args, **kwargs)
+
+                guardado = self.backend.get(clave)
+                if guardado is not None:
+                    self._contar('hits')
+                    etag, cuerpo = guardado.split(b'\n', 1)
+                    return self._respuesta(cuerpo, etag.decode('ascii'))
+
+                self._contar('misses')
+                respuesta = vista(*args, **kwargs)
+                if isinstance(respuesta, tuple):
+                    respuesta, estado = respuesta
+                    respuesta.status_code = estado
+                if respuesta.status_code != 200:
+                    return respuesta
+
+                cuerpo = respuesta.get_data()
+                etag = hashlib.md5(cuerpo).hexdigest()
+                self.backend.set(clave, etag.encode('ascii') + b'\n' + cuerpo,
+                                 self.ttl)
+                return self._respuesta(cuerpo, etag)
+            return envoltura
+        return decorador
+
+    def _respuesta(self, cuerpo, etag):
+        """Respuesta con ETag; 304 si coincide con If-None-Match"""
+        respuesta = Response(cuerpo, mimetype='application/json')
+        respuesta.set_etag(etag)
+        respuesta.headers['Cache-Control'] = 'no-cache'
+        return respuesta.make_conditional(request)
+
+    def generacion(self, nombre):
+        """Generación de `nombre`; None si el cache no está disponible"""
+        if self.backend is None:
+            return 0
+        return self.backend.generacion(nombre)
+
+    def invalidar(self, *claves, generaciones=()):
+        """Eliminar claves puntuales e invalidar grupos por generación"""
+        if self.backend is None:
+            return
+        self._contar('invalidaciones')
+        self.backend.delete(*claves)
+        for nombre in generaciones:
+            self.backend.incrementar_generacion(nombre)
+
+    def estadisticas(self):
+        total = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__
+            if self.backend is not None else None,
+            'ttl': self.ttl,
+            'entradas': len(self.backend) if self.backend is not None else 0,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else None,
+            'invalidaciones': self.invalidaciones,
+        }
@@ -0,0 +1,41 @@
+# Configuración de gunicorn para producción
+# Uso: gunicorn -c gunicorn.conf.py app:app
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+
+# Un proceso por núcleo más uno; cada proceso atiende varias peticiones con
+# hilos mientras espera a MySQL. DB_POOL_SIZE debería ser >= GUNICORN_THREADS
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+worker_class = 'gthread'
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Reciclar procesos periódicamente para acotar el crecimiento de memoria
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = 1000
+
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-')
+errorlog = '-'
+
+
+def on_starting(server):
+    # El cache memory:// es propio de cada proceso: con varios workers una
+    # escritura sólo invalidaría el proceso que la atendió y los demás
+    # seguirían sirviendo productos viejos hasta CACHE_TTL. Sin CACHE_URL se
+    # desactiva el cache (los workers importan app después de este hook);
+    # un memory:// explícito es un error de configuración
+    if server.cfg.workers == 1:
+        return
+    if 'CACHE_URL' not in os.environ:
+        os.environ['CACHE_URL'] = 'none'
+        server.log.info('Varios workers sin CACHE_URL: cache desactivado')
+    elif os.environ['CACHE_URL'].startswith('memory://'):
+        raise RuntimeError(
+            f"CACHE_URL={os.environ['CACHE_URL']} no comparte invalidaciones "
+            f'entre los {server.cfg.workers} workers de gunicorn: usar '
+            'CACHE_URL=redis://..., CACHE_URL=none o GUNICORN_WORKERS=1')
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+# La app lee su configuración al importarse: SQLite en memoria y sin cache
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['CACHE_URL'] = 'none'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flask_app, db, Categoria, Producto  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def productos(app):
+    """100 productos repartidos en 5 categorías"""
+    categorias = [Categoria(nombre=f'Categoría {i}') for i in range(5)]
+    db.session.add_all(categorias)
+    db.session.flush()
+    db.session.add_all(
+        Producto(nombre=f'Producto {i}', precio=10.0 + i, stock=i,
+                 categoria_id=categorias[i % 5].id, sku=f'SKU-{i:06d}')
+        for i in range(100))
+    db.session.commit()
+    # Las consultas de la prueba no deben reutilizar objetos de la sesión
+    db.session.expunge_all()
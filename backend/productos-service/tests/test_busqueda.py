@@ -0,0 +1,48 @@
+from sqlalchemy.dialects import mysql
+
+from app import Categoria, Producto, consulta_busqueda, db
+
+
+def sql_mysql(consulta):
+    return str(consulta.statement.compile(
+        dialect=mysql.dialect(), compile_kwargs={'literal_binds': True}))
+
+
+def crear_productos(*nombres):
+    categoria = Categoria(nombre='Electrónica')
+    db.session.add(categoria)
+    db.session.flush()
+    db.session.add_all(Producto(nombre=nombre, precio=100.0,
+                                categoria_id=categoria.id, sku=f'SKU-{i}')
+                       for i, nombre in enumerate(nombres))
+    db.session.commit()
+
+
+def test_busqueda_fulltext_en_mysql(app):
+    sql = sql_mysql(consulta_busqueda('smart tv', '', fulltext=True))
+    # "tv" es más corta que FULLTEXT_MIN_TOKEN y el índice no la guarda
+    assert "MATCH (productos.nombre, productos.descripcion) AGAINST " \
+           "('+smart*' IN BOOLEAN MODE)" in sql
+    assert 'LIKE' not in sql
+
+
+def test_busqueda_de_palabras_cortas_usa_contains(app):
+    sql = sql_mysql(consulta_busqueda('tv', '', fulltext=True))
+    assert 'MATCH' not in sql
+    assert "LIKE concat('%%', 'tv', '%%')" in sql
+
+
+def test_busqueda_sin_fulltext_encuentra_el_texto_en_cualquier_posicion(client):
+    crear_productos('Smart TV 0', 'Smart TV 1', 'Smart TV 2', 'Radio 100%')
+
+    respuesta = client.get('/api/productos/buscar?q=tv')
+    assert respuesta.status_code == 200
+    assert sorted(p['nombre'] for p in respuesta.get_json()) == \
+        ['Smart TV 0', 'Smart TV 1', 'Smart TV 2']
+
+    respuesta = client.get('/api/productos/buscar?q=TV 1')
+    assert [p['nombre'] for p in respuesta.get_json()] == ['Smart TV 1']
+
+    # Los comodines de LIKE se buscan literalmente
+    respuesta = client.get('/api/productos/buscar?q=0%')
+    assert [p['nombre'] for p in respuesta.get_json()] == ['Radio 100%']
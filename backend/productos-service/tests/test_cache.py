@@ -0,0 +1,31 @@
+import pytest
+
+import app as servicio
+from cache import RedisCache
+
+
+@pytest.fixture
+def redis_caido(monkeypatch):
+    """Cache Redis apuntando a un puerto donde no escucha nadie"""
+    monkeypatch.setattr(servicio.cache_respuestas, 'backend',
+                        RedisCache('redis://127.0.0.1:1/0'))
+
+
+def test_lecturas_sin_redis(client, productos, redis_caido):
+    assert client.get('/api/productos?page=1&per_page=10').status_code == 200
+    assert client.get('/api/productos/1').status_code == 200
+    assert client.get('/api/categorias').status_code == 200
+    assert client.get('/api/cache/estadisticas').status_code == 200
+
+
+def test_escrituras_sin_redis(client, productos, redis_caido):
+    respuesta = client.put('/api/productos/1', json={'stock': 7})
+    assert respuesta.status_code == 200
+
+    respuesta = client.post('/api/productos/stock/ajustes',
+                            json=[{'id': 1, 'delta': -2}])
+    assert respuesta.status_code == 200
+    assert respuesta.get_json()['resultados'][0]['stock'] == 5
+
+    assert client.delete('/api/productos/2').status_code == 200
+    assert client.get('/api/productos/2').status_code == 404
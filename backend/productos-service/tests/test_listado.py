@@ -0,0 +1,42 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import db
+
+
+@contextmanager
+def contar_sentencias():
+    sentencias = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        yield sentencias
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+
+def test_listado_paginado_usa_dos_sentencias(client, productos):
+    with contar_sentencias() as sentencias:
+        respuesta = client.get('/api/productos?page=1&per_page=100')
+
+    assert respuesta.status_code == 200
+    cuerpo = respuesta.get_json()
+    assert len(cuerpo['productos']) == 100
+    assert all(p['categoria'] for p in cuerpo['productos'])
+    # COUNT(*) de la paginación y el SELECT con JOIN a categorias
+    assert len(sentencias) == 2
+
+
+def test_listado_por_cursor_usa_una_sentencia(client, productos):
+    with contar_sentencias() as sentencias:
+        respuesta = client.get('/api/productos?cursor=&per_page=100')
+
+    assert respuesta.status_code == 200
+    cuerpo = respuesta.get_json()
+    assert len(cuerpo['productos']) == 100
+    assert all(p['categoria'] for p in cuerpo['productos'])
+    assert len(sentencias) == 1
@@ -0,0 +1,24 @@
+from app import Categoria, Producto, db
+
+
+def test_crear_y_obtener_producto(client, app):
+    categoria = Categoria(nombre='Herramientas')
+    db.session.add(categoria)
+    db.session.commit()
+
+    respuesta = client.post('/api/productos', json={
+        'nombre': 'Taladro', 'precio': 99.5, 'stock': 4,
+        'categoria_id': categoria.id, 'sku': 'SKU-TAL-1'})
+    assert respuesta.status_code == 201
+    producto_id = respuesta.get_json()['id']
+    assert db.session.get(Producto, producto_id).sku == 'SKU-TAL-1'
+
+    respuesta = client.get(f'/api/productos/{producto_id}')
+    assert respuesta.status_code == 200
+    producto = respuesta.get_json()
+    assert producto['id'] == producto_id
+    assert producto['nombre'] == 'Taladro'
+    assert producto['categoria'] == 'Herramientas'
+    assert producto['stock'] == 4
+
+    assert client.get('/api/productos/999999').status_code == 404
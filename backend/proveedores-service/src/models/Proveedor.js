@@ -106,5 +106,6 @@ proveedorSchema.index({ nombre: 1 });
 proveedorSchema.index({ ruc: 1 });
 proveedorSchema.index({ estado: 1 });
 proveedorSchema.index({ categorias: 1 });
+proveedorSchema.index({ updatedAt: 1 });
 
 module.exports = mongoose.model("Proveedor", proveedorSchema);
@@ -1,4 +1,5 @@
 const express = require("express");
+const mongoose = require("mongoose");
 const router = express.Router();
 const Proveedor = require("../models/Proveedor");
 
@@ -9,6 +10,37 @@ router.get("/proveedores", async (req, res) => {
     const limit = parseInt(req.query.limit) || 50;
     const skip = (page - 1) * limit;
 
+    // Modo incremental: sólo los modificados desde updatedSince, recorridos
+    // por _id (afterId) para que los cambios durante la lectura no desplacen
+    // las páginas
+    if (req.query.updatedSince) {
+      const desde = new Date(req.query.updatedSince);
+      if (isNaN(desde.getTime())) {
+        return res
+          .status(400)
+          .json({ error: "updatedSince debe ser una fecha ISO 8601" });
+      }
+      const filtro = { updatedAt: { $gte: desde } };
+      if (req.query.afterId) {
+        if (!mongoose.isValidObjectId(req.query.afterId)) {
+          return res.status(400).json({ error: "afterId inválido" });
+        }
+        filtro._id = { $gt: req.query.afterId };
+      }
+
+      const proveedores = await Proveedor.find(filtro)
+        .sort({ _id: 1 })
+        .limit(limit);
+
+      return res.json({
+        proveedores,
+        nextAfterId:
+          proveedores.length === limit
+            ? proveedores[proveedores.length - 1]._id
+            : null,
+      });
+    }
+
     const proveedores = await Proveedor.find()
       .skip(skip)
       .limit(limit)
@@ -80,130 +80,257 @@ echo "4️⃣  Creando tablas Glue manualmente..."
 echo "   (AWS Academy puede restringir crawlers, usamos tablas directas)"
 echo ""
 
-# Tabla: productos
-echo "Creando tabla: productos..."
-aws glue create-table \
-    --database-name $DATABASE_NAME \
-    --table-input '{
-        "Name": "productos",
-        "StorageDescriptor": {
-            "Columns": [
-                {"Name": "id", "Type": "bigint"},
-                {"Name": "nombre", "Type": "string"},
-                {"Name": "descripcion", "Type": "string"},
-                {"Name": "precio", "Type": "double"},
-                {"Name": "stock", "Type": "int"},
-                {"Name": "categoria", "Type": "string"},
-                {"Name": "proveedor", "Type": "string"},
-                {"Name": "sku", "Type": "string"},
-                {"Name": "fecha_creacion", "Type": "timestamp"},
-                {"Name": "fecha_actualizacion", "Type": "timestamp"}
-            ],
-            "Location": "s3://'"$S3_BUCKET"'/productos/",
-            "InputFormat": "org.apache.hadoop.mapred.TextInputFormat",
-            "OutputFormat": "org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat",
-            "SerdeInfo": {
-                "SerializationLibrary": "org.apache.hadoop.hive.serde2.lazy.LazySimpleSerDe",
-                "Parameters": {
-                    "field.delim": ",",
-                    "skip.header.line.count": "1"
-                }
-            }
-        }
-    }' \
-    --profile $AWS_PROFILE \
-    --region $AWS_REGION 2>/dev/null || echo "✓ Tabla productos ya existe"
-
-# Tabla: ordenes
-echo "Creando tabla: ordenes..."
-aws glue create-table \
-    --database-name $DATABASE_NAME \
-    --table-input '{
-        "Name": "ordenes",
-        "StorageDescriptor": {
-            "Columns": [
-                {"Name": "id", "Type": "bigint"},
-                {"Name": "numero_orden", "Type": "string"},
-                {"Name": "cliente_id", "Type": "bigint"},
-                {"Name": "fecha_orden", "Type": "timestamp"},
-                {"Name": "estado", "Type": "string"},
-                {"Name": "total", "Type": "double"},
-                {"Name": "metodo_pago", "Type": "string"},
-                {"Name": "direccion_envio", "Type": "string"}
-            ],
-            "Location": "s3://'"$S3_BUCKET"'/ordenes/",
-            "InputFormat": "org.apache.hadoop.mapred.TextInputFormat",
-            "OutputFormat": "org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat",
-            "SerdeInfo": {
-                "SerializationLibrary": "org.apache.hadoop.hive.serde2.lazy.LazySimpleSerDe",
-                "Parameters": {
-                    "field.delim": ",",
-                    "skip.header.line.count": "1"
+# Las tablas leen la copia Parquet que escriben los jobs de ingesta en
+# parquet/<tabla>/, particionada al estilo Hive (anio=/mes=, categoria=,
+# estado=). Athena sólo lee las columnas y particiones de cada consulta.
+PARQUET_INPUT="org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat"
+PARQUET_OUTPUT="org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat"
+PARQUET_SERDE="org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe"
+
+# crear_tabla_parquet <nombre> <columnas JSON> <particiones JSON> [parámetros JSON]
+crear_tabla_parquet() {
+    local nombre=$1 columnas=$2 particiones=$3 parametros=${4:-'{}'}
+    echo "Creando tabla: $nombre..."
+    aws glue create-table \
+        --database-name $DATABASE_NAME \
+        --table-input '{
+            "Name": "'"$nombre"'",
+            "TableType": "EXTERNAL_TABLE",
+            "Parameters": '"$parametros"',
+            "PartitionKeys": '"$particiones"',
+            "StorageDescriptor": {
+                "Columns": '"$columnas"',
+                "Location": "s3://'"$S3_BUCKET"'/parquet/'"$nombre"'/",
+                "InputFormat": "'"$PARQUET_INPUT"'",
+                "OutputFormat": "'"$PARQUET_OUTPUT"'",
+                "SerdeInfo": {
+                    "SerializationLibrary": "'"$PARQUET_SERDE"'"
                 }
             }
-        }
-    }' \
-    --profile $AWS_PROFILE \
-    --region $AWS_REGION 2>/dev/null || echo "✓ Tabla ordenes ya existe"
+        }' \
+        --profile $AWS_PROFILE \
+        --region $AWS_REGION 2>/dev/null || echo "✓ Tabla $nombre ya existe"
+}
+
+# Tabla: productos (particionada por categoria; registrar categorías nuevas
+# con MSCK REPAIR TABLE productos)
+crear_tabla_parquet productos '[
+    {"Name": "id", "Type": "bigint"},
+    {"Name": "nombre", "Type": "string"},
+    {"Name": "descripcion", "Type": "string"},
+    {"Name": "precio", "Type": "double"},
+    {"Name": "stock", "Type": "int"},
+    {"Name": "proveedor", "Type": "string"},
+    {"Name": "sku", "Type": "string"},
+    {"Name": "fecha_creacion", "Type": "timestamp"},
+    {"Name": "fecha_actualizacion", "Type": "timestamp"}
+]' '[{"Name": "categoria", "Type": "string"}]'
+
+# Tabla: ordenes (particionada por anio/mes de fecha_orden, con proyección
+# de particiones para no tener que registrarlas)
+crear_tabla_parquet ordenes '[
+    {"Name": "id", "Type": "bigint"},
+    {"Name": "numero_orden", "Type": "string"},
+    {"Name": "cliente_id", "Type": "bigint"},
+    {"Name": "cliente_nombre", "Type": "string"},
+    {"Name": "fecha_orden", "Type": "timestamp"},
+    {"Name": "estado", "Type": "string"},
+    {"Name": "total", "Type": "double"},
+    {"Name": "metodo_pago", "Type": "string"},
+    {"Name": "direccion_envio", "Type": "string"},
+    {"Name": "fecha_actualizacion", "Type": "timestamp"}
+]' '[{"Name": "anio", "Type": "int"}, {"Name": "mes", "Type": "int"}]' '{
+    "projection.enabled": "true",
+    "projection.anio.type": "integer",
+    "projection.anio.range": "2020,2040",
+    "projection.mes.type": "integer",
+    "projection.mes.range": "1,12",
+    "projection.mes.digits": "2",
+    "storage.location.template": "s3://'"$S3_BUCKET"'/parquet/ordenes/anio=${anio}/mes=${mes}/"
+}'
 
 # Tabla: clientes
-echo "Creando tabla: clientes..."
-aws glue create-table \
-    --database-name $DATABASE_NAME \
-    --table-input '{
-        "Name": "clientes",
-        "StorageDescriptor": {
-            "Columns": [
-                {"Name": "id", "Type": "bigint"},
-                {"Name": "nombre", "Type": "string"},
-                {"Name": "email", "Type": "string"},
-                {"Name": "telefono", "Type": "string"},
-                {"Name": "direccion", "Type": "string"},
-                {"Name": "ciudad", "Type": "string"},
-                {"Name": "pais", "Type": "string"},
-                {"Name": "fecha_registro", "Type": "timestamp"}
-            ],
-            "Location": "s3://'"$S3_BUCKET"'/clientes/",
-            "InputFormat": "org.apache.hadoop.mapred.TextInputFormat",
-            "OutputFormat": "org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat",
-            "SerdeInfo": {
-                "SerializationLibrary": "org.apache.hadoop.hive.serde2.lazy.LazySimpleSerDe",
-                "Parameters": {
-                    "field.delim": ",",
-                    "skip.header.line.count": "1"
-                }
-            }
-        }
-    }' \
-    --profile $AWS_PROFILE \
-    --region $AWS_REGION 2>/dev/null || echo "✓ Tabla clientes ya existe"
-
-# Tabla: proveedores (JSON format)
-echo "Creando tabla: proveedores..."
-aws glue create-table \
-    --database-name $DATABASE_NAME \
-    --table-input '{
-        "Name": "proveedores",
-        "StorageDescriptor": {
-            "Columns": [
-                {"Name": "nombre", "Type": "string"},
-                {"Name": "ruc", "Type": "string"},
-                {"Name": "email", "Type": "string"},
-                {"Name": "telefono", "Type": "string"},
-                {"Name": "estado", "Type": "string"},
-                {"Name": "estado_entrega", "Type": "string"},
-                {"Name": "calificacion", "Type": "double"}
-            ],
-            "Location": "s3://'"$S3_BUCKET"'/proveedores/",
-            "InputFormat": "org.apache.hadoop.mapred.TextInputFormat",
-            "OutputFormat": "org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat",
-            "SerdeInfo": {
-                "SerializationLibrary": "org.openx.data.jsonserde.JsonSerDe"
-            }
-        }
-    }' \
-    --profile $AWS_PROFILE \
-    --region $AWS_REGION 2>/dev/null || echo "✓ Tabla proveedores ya existe"
+crear_tabla_parquet clientes '[
+    {"Name": "id", "Type": "bigint"},
+    {"Name": "nombre", "Type": "string"},
+    {"Name": "email", "Type": "string"},
+    {"Name": "telefono", "Type": "string"},
+    {"Name": "direccion", "Type": "string"},
+    {"Name": "ciudad", "Type": "string"},
+    {"Name": "pais", "Type": "string"},
+    {"Name": "fecha_registro", "Type": "timestamp"}
+]' '[]'
+
+# Tabla: categorias
+crear_tabla_parquet categorias '[
+    {"Name": "id", "Type": "bigint"},
+    {"Name": "nombre", "Type": "string"},
+    {"Name": "descripcion", "Type": "string"}
+]' '[]'
+
+# Tabla: proveedores (particionada por estado)
+crear_tabla_parquet proveedores '[
+    {"Name": "id", "Type": "string"},
+    {"Name": "nombre", "Type": "string"},
+    {"Name": "ruc", "Type": "string"},
+    {"Name": "email", "Type": "string"},
+    {"Name": "telefono", "Type": "string"},
+    {"Name": "direccion_calle", "Type": "string"},
+    {"Name": "direccion_ciudad", "Type": "string"},
+    {"Name": "direccion_estado", "Type": "string"},
+    {"Name": "direccion_pais", "Type": "string"},
+    {"Name": "direccion_codigo_postal", "Type": "string"},
+    {"Name": "contacto_nombre", "Type": "string"},
+    {"Name": "contacto_cargo", "Type": "string"},
+    {"Name": "contacto_telefono", "Type": "string"},
+    {"Name": "contacto_email", "Type": "string"},
+    {"Name": "categorias", "Type": "string"},
+    {"Name": "calificacion", "Type": "double"},
+    {"Name": "estado_entrega", "Type": "string"},
+    {"Name": "condiciones_dias_credito", "Type": "int"},
+    {"Name": "condiciones_metodo_pago", "Type": "string"},
+    {"Name": "estadisticas_total_ordenes", "Type": "int"},
+    {"Name": "estadisticas_ordenes_completadas", "Type": "int"},
+    {"Name": "estadisticas_ordenes_pendientes", "Type": "int"},
+    {"Name": "estadisticas_monto_total", "Type": "double"},
+    {"Name": "fecha_registro", "Type": "timestamp"},
+    {"Name": "fecha_actualizacion", "Type": "timestamp"}
+]' '[{"Name": "estado", "Type": "string"}]' '{
+    "projection.enabled": "true",
+    "projection.estado.type": "enum",
+    "projection.estado.values": "ACTIVO,INACTIVO,SUSPENDIDO"
+}'
+
+# Tabla: detalles_orden (líneas de cada orden, escritas junto con ordenes)
+crear_tabla_parquet detalles_orden '[
+    {"Name": "id", "Type": "bigint"},
+    {"Name": "orden_id", "Type": "bigint"},
+    {"Name": "producto_id", "Type": "bigint"},
+    {"Name": "nombre_producto", "Type": "string"},
+    {"Name": "cantidad", "Type": "int"},
+    {"Name": "precio_unitario", "Type": "double"},
+    {"Name": "subtotal", "Type": "double"}
+]' '[]'
+
+# Tablas KPI: agregados que recalcula la ingesta al terminar (ver
+# ingesta/ingestor/kpis.py) y que lee analitico-service
+crear_tabla_parquet kpi_ventas_diarias '[
+    {"Name": "fecha", "Type": "date"},
+    {"Name": "num_ordenes", "Type": "bigint"},
+    {"Name": "ingresos_totales", "Type": "double"},
+    {"Name": "ticket_promedio", "Type": "double"},
+    {"Name": "unidades_vendidas", "Type": "bigint"},
+    {"Name": "clientes_unicos", "Type": "bigint"}
+]' '[]'
+
+crear_tabla_parquet kpi_ventas_mensuales '[
+    {"Name": "mes", "Type": "string"},
+    {"Name": "num_ordenes", "Type": "bigint"},
+    {"Name": "ingresos_totales", "Type": "double"},
+    {"Name": "ticket_promedio", "Type": "double"},
+    {"Name": "unidades_vendidas", "Type": "bigint"},
+    {"Name": "clientes_unicos", "Type": "bigint"},
+    {"Name": "productos_vendidos", "Type": "bigint"}
+]' '[]'
+
+crear_tabla_parquet kpi_productos '[
+    {"Name": "producto_id", "Type": "bigint"},
+    {"Name": "producto", "Type": "string"},
+    {"Name": "categoria", "Type": "string"},
+    {"Name": "proveedor", "Type": "string"},
+    {"Name": "precio", "Type": "double"},
+    {"Name": "stock", "Type": "bigint"},
+    {"Name": "unidades_vendidas", "Type": "bigint"},
+    {"Name": "ingresos_totales", "Type": "double"},
+    {"Name": "num_ordenes", "Type": "bigint"},
+    {"Name": "precio_promedio", "Type": "double"}
+]' '[]'
+
+crear_tabla_parquet kpi_productos_mes '[
+    {"Name": "mes", "Type": "string"},
+    {"Name": "producto_id", "Type": "bigint"},
+    {"Name": "producto", "Type": "string"},
+    {"Name": "categoria", "Type": "string"},
+    {"Name": "proveedor", "Type": "string"},
+    {"Name": "unidades_vendidas", "Type": "bigint"},
+    {"Name": "ingresos_totales", "Type": "double"},
+    {"Name": "num_ordenes", "Type": "bigint"},
+    {"Name": "precio_promedio", "Type": "double"}
+]' '[]'
+
+crear_tabla_parquet kpi_categorias '[
+    {"Name": "categoria", "Type": "string"},
+    {"Name": "num_productos", "Type": "bigint"},
+    {"Name": "stock_total", "Type": "bigint"},
+    {"Name": "productos_vendidos", "Type": "bigint"},
+    {"Name": "unidades_vendidas", "Type": "bigint"},
+    {"Name": "ingresos_totales", "Type": "double"},
+    {"Name": "num_ordenes", "Type": "bigint"},
+    {"Name": "precio_promedio", "Type": "double"}
+]' '[]'
+
+crear_tabla_parquet kpi_categorias_mes '[
+    {"Name": "mes", "Type": "string"},
+    {"Name": "categoria", "Type": "string"},
+    {"Name": "productos_vendidos", "Type": "bigint"},
+    {"Name": "unidades_vendidas", "Type": "bigint"},
+    {"Name": "ingresos_totales", "Type": "double"},
+    {"Name": "num_ordenes", "Type": "bigint"},
+    {"Name": "precio_promedio", "Type": "double"}
+]' '[]'
+
+crear_tabla_parquet kpi_proveedores '[
+    {"Name": "proveedor", "Type": "string"},
+    {"Name": "num_productos", "Type": "bigint"},
+    {"Name": "precio_promedio_productos", "Type": "double"},
+    {"Name": "productos_vendidos", "Type": "bigint"},
+    {"Name": "unidades_vendidas", "Type": "bigint"},
+    {"Name": "ingresos_totales", "Type": "double"},
+    {"Name": "num_ordenes", "Type": "bigint"},
+    {"Name": "precio_promedio", "Type": "double"}
+]' '[]'
+
+crear_tabla_parquet kpi_proveedores_mes '[
+    {"Name": "mes", "Type": "string"},
+    {"Name": "proveedor", "Type": "string"},
+    {"Name": "productos_vendidos", "Type": "bigint"},
+    {"Name": "unidades_vendidas", "Type": "bigint"},
+    {"Name": "ingresos_totales", "Type": "double"},
+    {"Name": "num_ordenes", "Type": "bigint"},
+    {"Name": "precio_promedio", "Type": "double"}
+]' '[]'
+
+crear_tabla_parquet kpi_clientes '[
+    {"Name": "cliente_id", "Type": "bigint"},
+    {"Name": "cliente", "Type": "string"},
+    {"Name": "email", "Type": "string"},
+    {"Name": "ciudad", "Type": "string"},
+    {"Name": "pais", "Type": "string"},
+    {"Name": "num_ordenes", "Type": "bigint"},
+    {"Name": "gasto_total", "Type": "double"},
+    {"Name": "ticket_promedio", "Type": "double"},
+    {"Name": "primera_compra", "Type": "timestamp"},
+    {"Name": "ultima_compra", "Type": "timestamp"}
+]' '[]'
+
+crear_tabla_parquet kpi_clientes_mes '[
+    {"Name": "mes", "Type": "string"},
+    {"Name": "cliente_id", "Type": "bigint"},
+    {"Name": "num_ordenes", "Type": "bigint"},
+    {"Name": "gasto_total", "Type": "double"}
+]' '[]'
+
+crear_tabla_parquet kpi_resumen '[
+    {"Name": "total_ventas", "Type": "double"},
+    {"Name": "total_ordenes", "Type": "bigint"},
+    {"Name": "ticket_promedio", "Type": "double"},
+    {"Name": "unidades_vendidas", "Type": "bigint"},
+    {"Name": "productos_activos", "Type": "bigint"},
+    {"Name": "clientes_activos", "Type": "bigint"},
+    {"Name": "proveedores_activos", "Type": "bigint"},
+    {"Name": "stock_total", "Type": "bigint"},
+    {"Name": "fecha_calculo", "Type": "timestamp"}
+]' '[]'
 
 echo "✓ Tablas creadas en Glue Catalog"
 
@@ -228,7 +355,8 @@ echo ""
 echo "📋 Información creada:"
 echo "   ✓ Bucket S3: s3://$S3_BUCKET"
 echo "   ✓ Base de datos Glue: $DATABASE_NAME"
-echo "   ✓ Tablas: productos, ordenes, clientes, proveedores"
+echo "   ✓ Tablas Parquet: productos, ordenes, detalles_orden, clientes, categorias, proveedores"
+echo "   ✓ Tablas KPI: kpi_resumen, kpi_ventas_diarias, kpi_ventas_mensuales, kpi_productos, ..."
 echo "   ✓ Rol utilizado: $ROLE_ARN"
 echo ""
 echo "📝 Próximos pasos:"
@@ -237,8 +365,9 @@ echo "1. Ejecutar el sistema de ingesta para cargar datos a S3:"
 echo "   cd ../ingesta"
 echo "   docker-compose up -d"
 echo ""
-echo "2. Verificar datos en S3:"
-echo "   aws s3 ls s3://$S3_BUCKET/productos/ --profile $AWS_PROFILE"
+echo "2. Verificar datos en S3 y registrar las particiones de productos:"
+echo "   aws s3 ls s3://$S3_BUCKET/parquet/ --recursive --profile $AWS_PROFILE"
+echo "   MSCK REPAIR TABLE $DATABASE_NAME.productos;  (en Athena)"
 echo ""
 echo "3. Probar consultas en Athena Console:"
 echo "   https://$AWS_REGION.console.aws.amazon.com/athena/home?region=$AWS_REGION"
@@ -45,6 +45,10 @@ export const analiticoAPI = createAxiosInstance(BASE_URLS.analitico);
 export const getProductos = (page = 1, perPage = 50) =>
   productosAPI.get(`/api/productos?page=${page}&per_page=${perPage}`);
 
+// GET - Listar productos por cursor (usar next_cursor para la página siguiente)
+export const getProductosCursor = (cursor = "", perPage = 50) =>
+  productosAPI.get(`/api/productos?cursor=${cursor}&per_page=${perPage}`);
+
 // GET - Obtener un producto por ID
 export const getProducto = (id) => productosAPI.get(`/api/productos/${id}`);
 
@@ -206,6 +210,7 @@ export const getClientesTop = (limit = 20) =>
 export default {
   // Productos
   getProductos,
+  getProductosCursor,
   getProducto,
   buscarProductos,
   getCategorias,
@@ -0,0 +1,14 @@
+"""Ingesta de los microservicios al data lake (S3 o /data)
+
+Cada fuente es un adaptador (ingestor.fuentes) que entrega registros
+aplanados en streaming; los escritores de formato (ingestor.formatos) los
+escriben como CSV, JSON y Parquet sobre un destino (ingestor.destinos).
+La CLI (`python -m ingestor`) ejecuta una o varias fuentes en paralelo.
+"""
+from .destinos import DestinoLocal, DestinoS3, crear_destino
+from .fuentes import FUENTES
+from .metricas import Metricas
+from .pipeline import ingestar
+
+__all__ = ['DestinoLocal', 'DestinoS3', 'FUENTES', 'Metricas',
+           'crear_destino', 'ingestar']
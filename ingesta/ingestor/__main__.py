@@ -0,0 +1,104 @@
+"""CLI de ingesta
+
+    python -m ingestor                      # todas las fuentes en paralelo
+    python -m ingestor productos ordenes    # sólo las indicadas
+    python -m ingestor --modo completo      # reextraer todo
+    python -m ingestor --secuencial         # una fuente tras otra
+    python -m ingestor --solo-kpis          # sólo recalcular los KPIs
+
+Al terminar las fuentes se recalculan las tablas KPI (ver kpis.py), salvo
+con --sin-kpis o MATERIALIZAR_KPIS=false. Sale con código 1 si alguna
+fuente o la materialización no se completó.
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import sys
+
+from .avisos import notificar_ingesta
+from .config import INGESTA_MODO, MATERIALIZAR_KPIS
+from .destinos import crear_destino
+from .fuentes import FUENTES
+from .kpis import ESQUEMAS_KPI, materializar
+from .metricas import Metricas
+from .pipeline import ingestar
+
+
+def ejecutar_fuente(nombre, destino, timestamp, modo):
+    fuente = FUENTES[nombre](Metricas(nombre))
+    try:
+        return ingestar(fuente, destino, timestamp, modo)
+    except Exception as e:
+        # Un error inesperado en una fuente no interrumpe a las demás
+        print(f"✗ Error en la ingesta de {nombre}: {e}")
+        return False
+    finally:
+        # Aunque la fuente quede incompleta alguna de sus tablas pudo cambiar
+        notificar_ingesta(
+            [fuente.nombre] +
+            [tabla.nombre for tabla in fuente.tablas_auxiliares()] +
+            [tabla.nombre for tabla in fuente.tablas_derivadas()])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m ingestor',
+        description='Ingesta de los microservicios al data lake')
+    parser.add_argument('fuentes', nargs='*', metavar='fuente',
+                        help=f"fuentes a ingerir ({', '.join(FUENTES)}); "
+                             "por defecto todas")
+    parser.add_argument('--modo', choices=['incremental', 'completo'],
+                        default=INGESTA_MODO,
+                        help='por defecto INGESTA_MODO')
+    parser.add_argument('--secuencial', action='store_true',
+                        help='ejecutar las fuentes una tras otra')
+    kpis = parser.add_mutually_exclusive_group()
+    kpis.add_argument('--sin-kpis', action='store_true',
+                      help='no recalcular las tablas KPI')
+    kpis.add_argument('--solo-kpis', action='store_true',
+                      help='recalcular las tablas KPI sin ingerir')
+    args = parser.parse_args(argv)
+    desconocidas = [nombre for nombre in args.fuentes if nombre not in FUENTES]
+    if desconocidas:
+        parser.error(f"fuente desconocida: {', '.join(desconocidas)}")
+
+    fuentes = [] if args.solo_kpis else (
+        list(dict.fromkeys(args.fuentes)) or list(FUENTES))
+    destino = crear_destino()
+    # El mismo timestamp para todas las fuentes de la ejecución
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    try:
+        if args.secuencial or len(fuentes) <= 1:
+            resultados = [ejecutar_fuente(nombre, destino, timestamp, args.modo)
+                          for nombre in fuentes]
+        else:
+            with ThreadPoolExecutor(max_workers=len(fuentes)) as executor:
+                resultados = list(executor.map(
+                    lambda nombre: ejecutar_fuente(
+                        nombre, destino, timestamp, args.modo),
+                    fuentes))
+
+        if args.solo_kpis or (MATERIALIZAR_KPIS and not args.sin_kpis):
+            try:
+                kpis_ok = materializar(destino, timestamp)
+            except Exception as e:
+                print(f"✗ Error en la materialización de KPIs: {e}")
+                kpis_ok = False
+            finally:
+                notificar_ingesta(list(ESQUEMAS_KPI))
+            resultados.append(kpis_ok)
+            fuentes.append('kpis')
+    finally:
+        destino.cerrar()
+
+    fallidas = [n for n, ok in zip(fuentes, resultados) if not ok]
+    if fallidas:
+        print(f"✗ Fuentes incompletas: {', '.join(fallidas)}")
+        return 1
+    print(f"✓ Ingesta completada: {', '.join(fuentes)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
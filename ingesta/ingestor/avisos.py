@@ -0,0 +1,19 @@
+"""Avisos a otros servicios cuando cambian las tablas del data lake"""
+import requests
+
+from .config import ANALITICO_INVALIDAR_URL
+
+
+def notificar_ingesta(tablas):
+    """Pedir a analitico-service que invalide los resultados cacheados que
+    leen `tablas`; un fallo sólo se informa, la ingesta ya está hecha"""
+    if not ANALITICO_INVALIDAR_URL:
+        return
+    try:
+        response = requests.post(ANALITICO_INVALIDAR_URL,
+                                 json={'tablas': list(tablas)}, timeout=10)
+        response.raise_for_status()
+        print(f"✓ Cache analítico invalidado: {', '.join(tablas)} "
+              f"({response.json().get('invalidadas', 0)} resultados)")
+    except (requests.RequestException, ValueError) as e:
+        print(f"⚠ No se pudo invalidar el cache analítico: {e}")
@@ -0,0 +1,59 @@
+"""Configuración de la ingesta, tomada de variables de entorno"""
+import os
+
+# Configuración AWS; sin AWS_PROFILE se usa la cadena de credenciales por
+# defecto (variables de entorno, ~/.aws o el rol de la instancia)
+AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
+AWS_PROFILE = os.getenv('AWS_PROFILE') or None
+S3_BUCKET = os.getenv('S3_BUCKET', 'inventario-datalake')
+# 's3', 'local' o 'auto' (S3 si se puede inicializar, si no DIRECTORIO_LOCAL)
+DESTINO = os.getenv('DESTINO', 'auto')
+DIRECTORIO_LOCAL = os.getenv('DIRECTORIO_LOCAL', '/data')
+
+# URLs de los microservicios
+PRODUCTOS_SERVICE_URL = os.getenv(
+    'PRODUCTOS_SERVICE_URL', 'http://productos-service:5001')
+ORDENES_SERVICE_URL = os.getenv(
+    'ORDENES_SERVICE_URL', 'http://ordenes-service:8080')
+PROVEEDORES_SERVICE_URL = os.getenv(
+    'PROVEEDORES_SERVICE_URL', 'http://proveedores-service:3000')
+
+# Extracción concurrente: como máximo PAGINAS_EN_PARALELO páginas en vuelo;
+# el límite efectivo se ajusta según la latencia y los 429/5xx del servicio
+TAMANO_PAGINA = int(os.getenv('TAMANO_PAGINA', 100))
+PAGINAS_EN_PARALELO = int(os.getenv('PAGINAS_EN_PARALELO', 4))
+LATENCIA_OBJETIVO = float(os.getenv('LATENCIA_OBJETIVO', 2.0))
+# Reintentos ante errores de red, 429 y 5xx, con backoff exponencial
+REINTENTOS_PAGINA = int(os.getenv('REINTENTOS_PAGINA', 4))
+BACKOFF_BASE = float(os.getenv('BACKOFF_BASE', 0.5))
+
+# Ingesta incremental: 'incremental' extrae sólo lo modificado desde la
+# última ejecución; 'completo' vuelve a extraer todo y reinicia el estado
+INGESTA_MODO = os.getenv('INGESTA_MODO', 'incremental')
+# Deltas acumulados antes de compactarlos en una nueva foto completa
+COMPACTAR_CADA = int(os.getenv('COMPACTAR_CADA', 24))
+# Se vuelve a pedir este margen antes del watermark para no perder cambios
+# de transacciones que confirmaron tarde; los repetidos se resuelven por id
+MARGEN_WATERMARK_SEGUNDOS = int(os.getenv('MARGEN_WATERMARK_SEGUNDOS', 300))
+
+# Copia columnar de cada foto en parquet/<tabla>/, particionada al estilo
+# Hive, para que Athena lea sólo las columnas y particiones que consulta
+ESCRIBIR_PARQUET = os.getenv('ESCRIBIR_PARQUET', 'true').lower() == 'true'
+PARQUET_COMPRESION = os.getenv('PARQUET_COMPRESION', 'snappy')
+# Filas en memoria antes de escribir un grupo de filas Parquet
+FILAS_POR_GRUPO = int(os.getenv('FILAS_POR_GRUPO', 10000))
+
+# Escritura en streaming: cada objeto se sube por partes (multipart) de
+# TAMANO_PARTE_MB mientras continúa la extracción, con a lo sumo
+# PARTES_EN_VUELO partes pendientes por objeto
+TAMANO_PARTE = max(5, int(os.getenv('TAMANO_PARTE_MB', 8))) * 1024 * 1024
+PARTES_EN_VUELO = int(os.getenv('PARTES_EN_VUELO', 2))
+SUBIDAS_EN_PARALELO = int(os.getenv('SUBIDAS_EN_PARALELO', 4))
+
+# Al terminar cada fuente se avisa a analitico-service para que invalide los
+# resultados cacheados de sus tablas (vacío: no se avisa)
+ANALITICO_INVALIDAR_URL = os.getenv('ANALITICO_INVALIDAR_URL', '')
+
+# Al terminar las fuentes se recalculan las tablas agregadas parquet/kpi_*/
+# que lee analitico-service (ver kpis.py)
+MATERIALIZAR_KPIS = os.getenv('MATERIALIZAR_KPIS', 'true').lower() == 'true'
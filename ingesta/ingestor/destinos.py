@@ -0,0 +1,255 @@
+"""Destinos del data lake: S3 o un directorio local
+
+Ambos exponen la misma interfaz: `abrir()` retorna un objeto que se escribe
+en streaming (write/tell) y que sólo queda visible al llamar a completar();
+abortar() descarta lo escrito. Para objetos chicos (el estado) están
+`escribir()` y `leer()`.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+import os
+import time
+
+import boto3
+
+from .config import (AWS_PROFILE, AWS_REGION, DESTINO, DIRECTORIO_LOCAL,
+                     PARTES_EN_VUELO, S3_BUCKET, SUBIDAS_EN_PARALELO,
+                     TAMANO_PARTE)
+
+
+class ObjetoS3:
+    """Objeto de S3 escrito por partes: cada TAMANO_PARTE acumulado se sube
+    en segundo plano como parte de un multipart upload mientras la
+    extracción continúa; si no llega a una parte se sube con un único
+    put_object"""
+
+    def __init__(self, destino, key, content_type, metricas=None):
+        self.destino = destino
+        self.key = key
+        self.content_type = content_type
+        self.metricas = metricas
+        self.closed = False
+        self._escritos = 0
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._partes = []
+
+    @property
+    def _s3(self):
+        return self.destino.cliente
+
+    def write(self, datos):
+        if isinstance(datos, str):
+            datos = datos.encode('utf-8')
+        self._escritos += len(datos)
+        self._buffer += datos
+        if len(self._buffer) >= TAMANO_PARTE:
+            self._subir_parte()
+        return len(datos)
+
+    def tell(self):
+        return self._escritos
+
+    def _medir(self, etapa, inicio):
+        if self.metricas:
+            self.metricas.sumar(etapa, time.monotonic() - inicio)
+
+    def _subir_parte(self):
+        inicio = time.monotonic()
+        if self._upload_id is None:
+            self._upload_id = self._s3.create_multipart_upload(
+                Bucket=self.destino.bucket, Key=self.key,
+                ContentType=self.content_type)['UploadId']
+        # Si ya hay PARTES_EN_VUELO partes subiendo se espera a la más
+        # antigua: la extracción se frena en lugar de acumular memoria
+        pendientes = [f for f in self._partes if not f.done()]
+        if len(pendientes) >= PARTES_EN_VUELO:
+            pendientes[0].result()
+        self._partes.append(self.destino.subidas.submit(
+            self._s3.upload_part, Bucket=self.destino.bucket, Key=self.key,
+            UploadId=self._upload_id, PartNumber=len(self._partes) + 1,
+            Body=bytes(self._buffer)))
+        self._buffer = bytearray()
+        self._medir('espera_subida', inicio)
+
+    def completar(self):
+        inicio = time.monotonic()
+        self.closed = True
+        if self._upload_id is None:
+            self._s3.put_object(Bucket=self.destino.bucket, Key=self.key,
+                                Body=bytes(self._buffer),
+                                ContentType=self.content_type)
+        else:
+            if self._buffer:
+                self._subir_parte()
+            partes = [{'PartNumber': numero, 'ETag': futuro.result()['ETag']}
+                      for numero, futuro in enumerate(self._partes, 1)]
+            self._s3.complete_multipart_upload(
+                Bucket=self.destino.bucket, Key=self.key,
+                UploadId=self._upload_id, MultipartUpload={'Parts': partes})
+        self._buffer = bytearray()
+        self._medir('cierre_subida', inicio)
+        print(f"✓ Subido a S3: s3://{self.destino.bucket}/{self.key}")
+
+    def abortar(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._buffer = bytearray()
+        if self._upload_id is None:
+            return
+        try:
+            # Las partes en curso deben terminar antes de abortar, si no S3
+            # las conserva (y las cobra) después del abort
+            wait(self._partes)
+            self._s3.abort_multipart_upload(
+                Bucket=self.destino.bucket, Key=self.key,
+                UploadId=self._upload_id)
+        except Exception as e:
+            print(f"⚠ Error descartando {self.key}: {e}")
+
+
+class ObjetoLocal:
+    """Archivo .parcial que se renombra al completar"""
+
+    def __init__(self, ruta, key, metricas=None):
+        self.key = key
+        self.ruta = ruta
+        self.metricas = metricas
+        self.closed = False
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        self._archivo = open(f'{ruta}.parcial', 'wb')
+
+    def write(self, datos):
+        if isinstance(datos, str):
+            datos = datos.encode('utf-8')
+        return self._archivo.write(datos)
+
+    def tell(self):
+        return self._archivo.tell()
+
+    def completar(self):
+        self.closed = True
+        self._archivo.close()
+        os.replace(f'{self.ruta}.parcial', self.ruta)
+        print(f"✓ Guardado localmente: {self.ruta}")
+
+    def abortar(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._archivo.close()
+            os.remove(f'{self.ruta}.parcial')
+        except OSError as e:
+            print(f"⚠ Error descartando {self.ruta}: {e}")
+
+
+class DestinoS3:
+    def __init__(self, cliente, bucket):
+        self.cliente = cliente
+        self.bucket = bucket
+        # Hilos que suben las partes de los multipart uploads, compartidos
+        # por todas las fuentes que corren en el proceso
+        self.subidas = ThreadPoolExecutor(max_workers=SUBIDAS_EN_PARALELO)
+
+    def __str__(self):
+        return f"s3://{self.bucket}"
+
+    def abrir(self, key, content_type, metricas=None):
+        return ObjetoS3(self, key, content_type, metricas)
+
+    def escribir(self, key, datos, content_type):
+        self.cliente.put_object(
+            Bucket=self.bucket, Key=key,
+            Body=datos if isinstance(datos, bytes) else datos.encode('utf-8'),
+            ContentType=content_type)
+
+    def leer(self, key):
+        """Contenido de un objeto como texto, None si no existe"""
+        try:
+            response = self.cliente.get_object(Bucket=self.bucket, Key=key)
+        except self.cliente.exceptions.NoSuchKey:
+            return None
+        return response['Body'].read().decode('utf-8')
+
+    def lineas(self, key):
+        cuerpo = self.cliente.get_object(Bucket=self.bucket, Key=key)['Body']
+        for linea in cuerpo.iter_lines():
+            yield linea.decode('utf-8')
+
+    def eliminar_obsoletos(self, prefijo, vigentes):
+        """Eliminar los objetos bajo `prefijo` que no estén en `vigentes`"""
+        vigentes = set(vigentes)
+        obsoletos = []
+        for pagina in self.cliente.get_paginator('list_objects_v2').paginate(
+                Bucket=self.bucket, Prefix=prefijo):
+            obsoletos.extend({'Key': o['Key']}
+                             for o in pagina.get('Contents', [])
+                             if o['Key'] not in vigentes)
+        for i in range(0, len(obsoletos), 1000):
+            self.cliente.delete_objects(
+                Bucket=self.bucket, Delete={'Objects': obsoletos[i:i + 1000]})
+
+    def cerrar(self):
+        self.subidas.shutdown()
+
+
+class DestinoLocal:
+    def __init__(self, raiz):
+        self.raiz = raiz
+
+    def __str__(self):
+        return self.raiz
+
+    def _ruta(self, key):
+        return os.path.join(self.raiz, key)
+
+    def abrir(self, key, content_type, metricas=None):
+        return ObjetoLocal(self._ruta(key), key, metricas)
+
+    def escribir(self, key, datos, content_type):
+        # El directorio se crea según la clave (no según la fuente)
+        ruta = self._ruta(key)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with open(ruta, 'wb') as f:
+            f.write(datos if isinstance(datos, bytes) else datos.encode('utf-8'))
+
+    def leer(self, key):
+        ruta = self._ruta(key)
+        if not os.path.exists(ruta):
+            return None
+        with open(ruta, encoding='utf-8') as f:
+            return f.read()
+
+    def lineas(self, key):
+        with open(self._ruta(key), encoding='utf-8') as f:
+            yield from f
+
+    def eliminar_obsoletos(self, prefijo, vigentes):
+        vigentes = {self._ruta(key) for key in vigentes}
+        for raiz, _, archivos in os.walk(self._ruta(prefijo)):
+            for archivo in archivos:
+                ruta = os.path.join(raiz, archivo)
+                if ruta not in vigentes:
+                    os.remove(ruta)
+
+    def cerrar(self):
+        pass
+
+
+def crear_destino():
+    """Destino según DESTINO: 's3', 'local' o 'auto' (S3 si se puede
+    inicializar el cliente, si no el directorio local)"""
+    if DESTINO != 'local':
+        try:
+            session = boto3.Session(profile_name=AWS_PROFILE)
+            cliente = session.client('s3', region_name=AWS_REGION)
+            print(f"✓ Cliente S3 inicializado (Bucket: {S3_BUCKET})")
+            return DestinoS3(cliente, S3_BUCKET)
+        except Exception as e:
+            if DESTINO == 's3':
+                raise
+            print(f"⚠ Error inicializando S3: {e}")
+
+    print(f"⚠ S3 no configurado. Guardando localmente en {DIRECTORIO_LOCAL}")
+    return DestinoLocal(DIRECTORIO_LOCAL)
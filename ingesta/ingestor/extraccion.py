@@ -0,0 +1,178 @@
+"""Peticiones a los microservicios: sesión reutilizable, reintentos con
+backoff y paginación concurrente con un límite adaptativo"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import (BACKOFF_BASE, LATENCIA_OBJETIVO, PAGINAS_EN_PARALELO,
+                     REINTENTOS_PAGINA)
+
+
+class ExtraccionIncompleta(Exception):
+    """Una página no se pudo obtener después de agotar los reintentos"""
+
+
+class LimitadorAdaptativo:
+    """Límite de peticiones simultáneas con aumento aditivo y reducción
+    multiplicativa: se reduce a la mitad ante un 429, un 5xx o una respuesta
+    más lenta que la latencia objetivo, y sube de a uno mientras el servicio
+    responde a tiempo"""
+
+    def __init__(self, maximo, latencia_objetivo=LATENCIA_OBJETIVO):
+        self.maximo = maximo
+        self.limite = maximo
+        self.latencia_objetivo = latencia_objetivo
+        self.en_curso = 0
+        self.pausa_hasta = 0.0
+        self._condicion = threading.Condition()
+
+    def __enter__(self):
+        with self._condicion:
+            while self.en_curso >= self.limite:
+                self._condicion.wait()
+            self.en_curso += 1
+            espera = self.pausa_hasta - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+        return self
+
+    def __exit__(self, *exc):
+        with self._condicion:
+            self.en_curso -= 1
+            self._condicion.notify_all()
+
+    def registrar(self, latencia, saturado=False, retry_after=None):
+        with self._condicion:
+            if saturado or latencia > self.latencia_objetivo:
+                self.limite = max(1, self.limite // 2)
+            elif self.limite < self.maximo:
+                self.limite += 1
+            if retry_after:
+                self.pausa_hasta = max(self.pausa_hasta,
+                                       time.monotonic() + retry_after)
+            self._condicion.notify_all()
+
+
+def segundos_retry_after(response):
+    try:
+        return float(response.headers.get('Retry-After', ''))
+    except (AttributeError, ValueError):
+        return None
+
+
+def reintentable(response):
+    return response.status_code == 429 or response.status_code >= 500
+
+
+def esperar_reintento(intento, response=None):
+    """Esperar antes del reintento `intento`: el Retry-After del servicio si
+    lo envía, o backoff exponencial con jitter"""
+    espera = segundos_retry_after(response)
+    if espera is None:
+        espera = random.uniform(0, BACKOFF_BASE * 2 ** intento)
+    time.sleep(espera)
+
+
+class ClienteHTTP:
+    """Sesión HTTP de una fuente: reutiliza las conexiones entre páginas y
+    suma a la etapa 'http' de las métricas la latencia de cada petición"""
+
+    def __init__(self, metricas=None):
+        self.metricas = metricas
+        self.sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_maxsize=PAGINAS_EN_PARALELO)
+        self.sesion.mount('http://', adaptador)
+        self.sesion.mount('https://', adaptador)
+
+    def get(self, url, **kwargs):
+        inicio = time.monotonic()
+        try:
+            return self.sesion.get(url, **kwargs)
+        finally:
+            if self.metricas:
+                self.metricas.sumar('http', time.monotonic() - inicio)
+
+    def get_pagina(self, limitador, url, params=None):
+        """GET de una página con reintentos; antes de cada reintento se
+        espera el Retry-After del servicio si lo envió, o backoff exponencial
+        con jitter
+
+        Reintenta errores de red, 429 y 5xx; cualquier otro error o el agotar
+        los reintentos lanza ExtraccionIncompleta.
+        """
+        ultimo_error = None
+        response = None
+        for intento in range(REINTENTOS_PAGINA + 1):
+            if intento:
+                esperar_reintento(intento, response)
+            with limitador:
+                inicio = time.monotonic()
+                try:
+                    response = self.get(url, params=params, timeout=30)
+                except requests.RequestException as e:
+                    limitador.registrar(time.monotonic() - inicio, saturado=True)
+                    ultimo_error = e
+                    response = None
+                    continue
+                latencia = time.monotonic() - inicio
+
+            saturado = reintentable(response)
+            limitador.registrar(latencia, saturado,
+                                segundos_retry_after(response))
+            if saturado:
+                ultimo_error = f"HTTP {response.status_code}"
+                continue
+            if response.status_code != 200:
+                raise ExtraccionIncompleta(
+                    f"{url} {params}: HTTP {response.status_code}")
+            return response.json()
+
+        raise ExtraccionIncompleta(f"{url} {params}: {ultimo_error}")
+
+    def paginas(self, url, params, param_pagina, primera, clave):
+        """Iterar en orden los registros de un listado paginado por número
+        de página
+
+        La primera página indica totalPages y las siguientes se piden en
+        paralelo, con a lo sumo 2 × PAGINAS_EN_PARALELO páginas por delante
+        de la que se está consumiendo, para que la memoria no crezca con el
+        total. Si alguna falla se lanza ExtraccionIncompleta; quien consume
+        debe descartar lo recibido en lugar de tomarlo como completo.
+        """
+        limitador = LimitadorAdaptativo(PAGINAS_EN_PARALELO)
+        data = self.get_pagina(limitador, url, {**params, param_pagina: primera})
+        registros = data.get(clave, [])
+        print(f"  ✓ Página {primera}: {len(registros)} {clave}")
+        restantes = iter(range(primera + 1,
+                               primera + data.get('totalPages', 1)))
+        del data
+        yield from registros
+
+        executor = ThreadPoolExecutor(max_workers=PAGINAS_EN_PARALELO)
+        en_vuelo = deque()
+
+        def pedir_siguiente():
+            pagina = next(restantes, None)
+            if pagina is not None:
+                en_vuelo.append((pagina, executor.submit(
+                    self.get_pagina, limitador, url,
+                    {**params, param_pagina: pagina})))
+
+        try:
+            for _ in range(2 * PAGINAS_EN_PARALELO):
+                pedir_siguiente()
+            while en_vuelo:
+                pagina, futuro = en_vuelo.popleft()
+                registros = futuro.result().get(clave, [])
+                pedir_siguiente()
+                print(f"  ✓ Página {pagina}: {len(registros)} {clave}")
+                yield from registros
+        finally:
+            # Si una página falló (o se dejó de consumir) no tiene sentido
+            # pedir las que faltan
+            executor.shutdown(cancel_futures=True)
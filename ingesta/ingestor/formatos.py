@@ -0,0 +1,209 @@
+"""Escritores de formato: reciben registros aplanados uno a uno y los
+escriben en streaming sobre objetos de un destino
+
+Todos exponen agregar(registro), completar() y abortar().
+"""
+import csv
+from datetime import date, datetime, timezone
+import json
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .config import FILAS_POR_GRUPO, PARQUET_COMPRESION
+
+
+class EscritorJSON:
+    """Arreglo JSON con un registro por línea, para poder leerlo luego
+    también en streaming (ver registros_json)"""
+    formato = 'json'
+
+    def __init__(self, objeto):
+        self.objeto = objeto
+        self._primero = True
+
+    def agregar(self, registro):
+        self.objeto.write(('[\n' if self._primero else ',\n') +
+                          json.dumps(registro, default=str, ensure_ascii=False))
+        self._primero = False
+
+    def completar(self):
+        self.objeto.write('[]\n' if self._primero else '\n]\n')
+        self.objeto.completar()
+
+    def abortar(self):
+        self.objeto.abortar()
+
+
+class EscritorCSV:
+    """CSV con las columnas del primer registro como encabezado; los campos
+    anidados (listas o diccionarios) no se escriben"""
+    formato = 'csv'
+
+    def __init__(self, objeto):
+        self.objeto = objeto
+        self._escritor = None
+
+    def agregar(self, registro):
+        if self._escritor is None:
+            columnas = [campo for campo, valor in registro.items()
+                        if not isinstance(valor, (list, dict))]
+            self._escritor = csv.DictWriter(self.objeto, fieldnames=columnas,
+                                            extrasaction='ignore')
+            self._escritor.writeheader()
+        self._escritor.writerow(registro)
+
+    def completar(self):
+        self.objeto.completar()
+
+    def abortar(self):
+        self.objeto.abortar()
+
+
+def convertir_valor(valor, tipo):
+    """Convertir un valor extraído (JSON) al tipo Arrow de su columna"""
+    if valor is None or valor == '':
+        return None
+    if pa.types.is_timestamp(tipo):
+        fecha = datetime.fromisoformat(valor)
+        # Athena no maneja zona horaria en Parquet: se guarda en UTC
+        if fecha.tzinfo is not None:
+            fecha = fecha.astimezone(timezone.utc).replace(tzinfo=None)
+        return fecha
+    if pa.types.is_date(tipo):
+        return date.fromisoformat(str(valor)[:10])
+    if pa.types.is_integer(tipo):
+        return int(valor)
+    if pa.types.is_floating(tipo):
+        return float(valor)
+    return str(valor)
+
+
+def escapar_particion(valor):
+    """Escapar un valor de partición como lo hace Hive (%XX)"""
+    if valor is None or valor == '':
+        return '__HIVE_DEFAULT_PARTITION__'
+    return ''.join(
+        f'%{ord(c):02X}' if c in '"#%\'*/:=?\\{[]^' or ord(c) < 32 else c
+        for c in str(valor))
+
+
+class EscritorParquet:
+    """Parquet de una tabla en parquet/<tabla>/, escrito por grupos de filas
+    en un archivo por partición Hive (`particion(registro)` retorna p. ej.
+    'anio=2025/mes=01/')
+
+    Entre todas las particiones se mantienen como máximo FILAS_POR_GRUPO
+    filas en memoria: al llegar al límite se escribe el grupo de la
+    partición más grande. Al completar se eliminan los archivos de la foto
+    anterior, de modo que la tabla de Athena siempre ve una sola copia de
+    cada registro.
+    """
+    formato = 'parquet'
+
+    def __init__(self, destino, tabla, esquema, timestamp, particion=None,
+                 metricas=None):
+        self.destino = destino
+        self.tabla = tabla
+        self.esquema = esquema
+        self.timestamp = timestamp
+        self.particion = particion
+        self.metricas = metricas
+        self.registros = 0
+        # ruta -> [objeto, writer, filas pendientes]
+        self._particiones = {}
+        self._pendientes = 0
+
+    def agregar(self, registro):
+        ruta = self.particion(registro) if self.particion else ''
+        particion = self._particiones.get(ruta)
+        if particion is None:
+            objeto = self.destino.abrir(
+                f"parquet/{self.tabla}/{ruta}{self.tabla}_{self.timestamp}.parquet",
+                'application/vnd.apache.parquet', self.metricas)
+            particion = self._particiones[ruta] = [
+                objeto,
+                pq.ParquetWriter(objeto, self.esquema,
+                                 compression=PARQUET_COMPRESION),
+                []]
+        particion[2].append(registro)
+        self.registros += 1
+        self._pendientes += 1
+        if self._pendientes >= FILAS_POR_GRUPO:
+            self._escribir_grupo(max(self._particiones.values(),
+                                     key=lambda p: len(p[2])))
+
+    def _escribir_grupo(self, particion):
+        filas = particion[2]
+        columnas = {campo.name: [convertir_valor(f.get(campo.name), campo.type)
+                                 for f in filas] for campo in self.esquema}
+        particion[1].write_table(
+            pa.Table.from_pydict(columnas, schema=self.esquema))
+        self._pendientes -= len(filas)
+        particion[2] = []
+
+    def completar(self):
+        for particion in self._particiones.values():
+            if particion[2]:
+                self._escribir_grupo(particion)
+            particion[1].close()
+            particion[0].completar()
+
+        self.destino.eliminar_obsoletos(
+            f"parquet/{self.tabla}/",
+            [p[0].key for p in self._particiones.values()])
+        print(f"✓ Parquet: {self.registros} registros de {self.tabla} en "
+              f"{len(self._particiones)} particiones")
+
+    def abortar(self):
+        for objeto, writer, _ in self._particiones.values():
+            try:
+                # Cerrar el writer antes de descartar el objeto; si no, lo
+                # cierra el recolector escribiendo sobre un objeto abortado
+                writer.close()
+            except Exception:
+                pass
+            objeto.abortar()
+
+
+class EscritorDerivado:
+    """Escribe con `escritor` las filas que `expandir(registro)` deriva de
+    cada registro (p. ej. las líneas de cada orden)"""
+
+    def __init__(self, escritor, expandir):
+        self.escritor = escritor
+        self.expandir = expandir
+        self.formato = escritor.formato
+
+    def agregar(self, registro):
+        for fila in self.expandir(registro):
+            self.escritor.agregar(fila)
+
+    def completar(self):
+        self.escritor.completar()
+
+    def abortar(self):
+        self.escritor.abortar()
+
+
+def registros_json(lineas):
+    """Registros de un arreglo JSON con un registro por línea; los archivos
+    de versiones anteriores (todo el arreglo junto o indentado) se leen
+    completos"""
+    lineas = iter(lineas)
+    primera = next(lineas, '').strip()
+    if primera != '[':
+        yield from json.loads(primera + ''.join(lineas))
+        return
+
+    for linea in lineas:
+        contenido = linea.strip().rstrip(',')
+        if not contenido or contenido == ']':
+            continue
+        try:
+            registro = json.loads(contenido)
+        except ValueError:
+            # Arreglo indentado: no hay un registro por línea
+            yield from json.loads('[' + linea + ''.join(lineas))
+            return
+        yield registro
@@ -0,0 +1,13 @@
+"""Adaptadores de fuente disponibles, por nombre"""
+from .base import Fuente, TablaCompleta, TablaDerivada
+from .ordenes import FuenteOrdenes
+from .productos import FuenteProductos
+from .proveedores import FuenteProveedores
+
+FUENTES = {
+    fuente.nombre: fuente
+    for fuente in (FuenteProductos, FuenteOrdenes, FuenteProveedores)
+}
+
+__all__ = ['FUENTES', 'Fuente', 'FuenteOrdenes', 'FuenteProductos',
+           'FuenteProveedores', 'TablaCompleta', 'TablaDerivada']
@@ -0,0 +1,48 @@
+"""Interfaz de los adaptadores de fuente"""
+from collections import namedtuple
+
+from ..extraccion import ClienteHTTP
+
+# Tabla pequeña que acompaña a una fuente y se extrae completa en cada
+# ejecución; `extraer` es una función sin argumentos que itera los registros
+TablaCompleta = namedtuple('TablaCompleta',
+                           ['nombre', 'extraer', 'esquema', 'formatos'])
+
+# Tabla Parquet que se deriva de los registros de la tabla principal al
+# escribir cada foto; `expandir(registro)` retorna sus filas (0 o más)
+TablaDerivada = namedtuple('TablaDerivada', ['nombre', 'expandir', 'esquema'])
+
+
+class Fuente:
+    """Adaptador de un microservicio: cómo extraer su tabla principal
+    (completa o sólo lo modificado desde el watermark) ya aplanada, con qué
+    esquema y partición se escribe, y qué tablas auxiliares la acompañan
+
+    Los métodos de extracción son generadores: entregan los registros a
+    medida que llegan y lanzan ExtraccionIncompleta si no pueden completar.
+    """
+    nombre = None
+    esquema = None
+    formatos = ('csv', 'json', 'parquet')
+    # Fecha desde la que pedir cambios cuando todavía no hay watermark
+    desde_sin_watermark = None
+
+    def __init__(self, metricas):
+        self.metricas = metricas
+        self.http = ClienteHTTP(metricas)
+
+    def extraer(self):
+        raise NotImplementedError
+
+    def extraer_modificados(self, desde):
+        raise NotImplementedError
+
+    def particion(self, registro):
+        """Ruta de partición Hive del registro en Parquet ('' sin partición)"""
+        return ''
+
+    def tablas_auxiliares(self):
+        return []
+
+    def tablas_derivadas(self):
+        return []
@@ -0,0 +1,147 @@
+"""Productos y categorías del microservicio de productos (Flask)"""
+from datetime import datetime
+import json
+
+import pyarrow as pa
+import requests
+
+from ..config import PRODUCTOS_SERVICE_URL, REINTENTOS_PAGINA
+from ..extraccion import ExtraccionIncompleta, esperar_reintento, reintentable
+from ..formatos import escapar_particion
+from .base import Fuente, TablaCompleta
+
+# Esquemas Parquet; la columna de partición (categoria) va en la ruta
+ESQUEMA_PRODUCTOS = pa.schema([
+    ('id', pa.int64()),
+    ('nombre', pa.string()),
+    ('descripcion', pa.string()),
+    ('precio', pa.float64()),
+    ('stock', pa.int32()),
+    ('proveedor', pa.string()),
+    ('sku', pa.string()),
+    ('fecha_creacion', pa.timestamp('ms')),
+    ('fecha_actualizacion', pa.timestamp('ms')),
+])
+
+ESQUEMA_CATEGORIAS = pa.schema([
+    ('id', pa.int64()),
+    ('nombre', pa.string()),
+    ('descripcion', pa.string()),
+])
+
+
+class FuenteProductos(Fuente):
+    nombre = 'productos'
+    esquema = ESQUEMA_PRODUCTOS
+    formatos = ('json', 'parquet')
+
+    def extraer(self):
+        return self.exportar()
+
+    def extraer_modificados(self, desde):
+        return self.exportar(desde)
+
+    def exportar(self, updated_since=None):
+        """Iterar los productos a medida que llegan del export, sólo los
+        modificados desde `updated_since` si se indica
+
+        El export está ordenado por (fecha_actualizacion, id): si la conexión
+        se corta se reanuda pidiendo desde la fecha del último producto
+        recibido y saltando los ya entregados. Lanza ExtraccionIncompleta al
+        agotar los reintentos.
+        """
+        if updated_since:
+            print(f"📥 Extrayendo productos modificados desde {updated_since}...")
+        else:
+            print("📥 Extrayendo productos...")
+
+        # (fecha_actualizacion, id) del último producto entregado
+        ultimo = None
+        total = 0
+
+        for intento in range(REINTENTOS_PAGINA + 1):
+            params = {'format': 'ndjson'}
+            desde = ultimo[0].isoformat() if ultimo else updated_since
+            if desde:
+                params['updated_since'] = desde
+            response = None
+            try:
+                # Exportación en streaming (NDJSON): una sola petición para
+                # todo el catálogo, sin paginar ni contar en cada página
+                with self.http.get(
+                    f"{PRODUCTOS_SERVICE_URL}/api/productos/export",
+                    params=params,
+                    stream=True,
+                    timeout=(10, 60)
+                ) as response:
+                    if response.status_code == 200:
+                        for linea in response.iter_lines():
+                            if not linea:
+                                continue
+                            producto = json.loads(linea)
+                            if producto.get('fecha_actualizacion'):
+                                clave = (datetime.fromisoformat(
+                                    producto['fecha_actualizacion']),
+                                    producto['id'])
+                                if ultimo and clave <= ultimo:
+                                    continue
+                                ultimo = clave
+                            else:
+                                # Sin fecha no hay desde dónde reanudar
+                                ultimo = None
+                            total += 1
+                            yield producto
+                        print(f"✓ Total productos extraídos: {total}")
+                        return
+
+                    print(f"Error exportando productos: {response.status_code}")
+                    if not reintentable(response):
+                        break
+
+            except (requests.RequestException, ValueError) as e:
+                print(f"Error extrayendo productos: {e}")
+                response = None
+
+            if total and ultimo is None:
+                # Lo ya entregado no se puede deshacer ni reanudar
+                break
+            if intento < REINTENTOS_PAGINA:
+                esperar_reintento(intento + 1, response)
+
+        raise ExtraccionIncompleta(
+            f"Exportación de productos incompleta ({total} recibidos)")
+
+    def particion(self, producto):
+        """Partición categoria= según la categoría del producto"""
+        return f"categoria={escapar_particion(producto.get('categoria'))}/"
+
+    def extraer_categorias(self):
+        print("📥 Extrayendo categorías...")
+
+        for intento in range(REINTENTOS_PAGINA + 1):
+            response = None
+            try:
+                response = self.http.get(
+                    f"{PRODUCTOS_SERVICE_URL}/api/categorias", timeout=10)
+
+                if response.status_code == 200:
+                    categorias = response.json()
+                    print(f"✓ Total categorías extraídas: {len(categorias)}")
+                    yield from categorias
+                    return
+
+                print(f"Error: {response.status_code}")
+                if not reintentable(response):
+                    break
+
+            except requests.RequestException as e:
+                print(f"Error extrayendo categorías: {e}")
+
+            if intento < REINTENTOS_PAGINA:
+                esperar_reintento(intento + 1, response)
+
+        raise ExtraccionIncompleta("No se pudieron extraer las categorías")
+
+    def tablas_auxiliares(self):
+        return [TablaCompleta('categorias', self.extraer_categorias,
+                              ESQUEMA_CATEGORIAS, ('json', 'parquet'))]
@@ -0,0 +1,429 @@
+"""Materialización de KPIs a partir de las fotos vigentes
+
+Después de la ingesta se recorren una vez las órdenes (con sus líneas), el
+catálogo de productos, los clientes y los proveedores, y se escriben en
+parquet/kpi_*/ tablas pequeñas con los agregados diarios, mensuales y
+totales por producto, categoría, proveedor y cliente. analitico-service lee
+estas tablas en lugar de recalcular los joins productos × detalles_orden en
+cada consulta.
+
+Las órdenes se recorren en streaming; en memoria quedan el catálogo de
+productos y los acumulados, cuyo tamaño depende de la cantidad de
+productos, clientes y meses, no de la cantidad de órdenes.
+"""
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import pyarrow as pa
+
+from .formatos import EscritorParquet
+from .metricas import Metricas
+from .pipeline import leer_estado, leer_registros, registros_vigentes
+
+_VENTAS = [
+    ('unidades_vendidas', pa.int64()),
+    ('ingresos_totales', pa.float64()),
+    ('num_ordenes', pa.int64()),
+    ('precio_promedio', pa.float64()),
+]
+
+ESQUEMAS_KPI = {
+    'kpi_ventas_diarias': pa.schema([
+        ('fecha', pa.date32()),
+        ('num_ordenes', pa.int64()),
+        ('ingresos_totales', pa.float64()),
+        ('ticket_promedio', pa.float64()),
+        ('unidades_vendidas', pa.int64()),
+        ('clientes_unicos', pa.int64()),
+    ]),
+    'kpi_ventas_mensuales': pa.schema([
+        ('mes', pa.string()),
+        ('num_ordenes', pa.int64()),
+        ('ingresos_totales', pa.float64()),
+        ('ticket_promedio', pa.float64()),
+        ('unidades_vendidas', pa.int64()),
+        ('clientes_unicos', pa.int64()),
+        ('productos_vendidos', pa.int64()),
+    ]),
+    'kpi_productos': pa.schema([
+        ('producto_id', pa.int64()),
+        ('producto', pa.string()),
+        ('categoria', pa.string()),
+        ('proveedor', pa.string()),
+        ('precio', pa.float64()),
+        ('stock', pa.int64()),
+    ] + _VENTAS),
+    'kpi_productos_mes': pa.schema([
+        ('mes', pa.string()),
+        ('producto_id', pa.int64()),
+        ('producto', pa.string()),
+        ('categoria', pa.string()),
+        ('proveedor', pa.string()),
+    ] + _VENTAS),
+    'kpi_categorias': pa.schema([
+        ('categoria', pa.string()),
+        ('num_productos', pa.int64()),
+        ('stock_total', pa.int64()),
+        ('productos_vendidos', pa.int64()),
+    ] + _VENTAS),
+    'kpi_categorias_mes': pa.schema([
+        ('mes', pa.string()),
+        ('categoria', pa.string()),
+        ('productos_vendidos', pa.int64()),
+    ] + _VENTAS),
+    'kpi_proveedores': pa.schema([
+        ('proveedor', pa.string()),
+        ('num_productos', pa.int64()),
+        ('precio_promedio_productos', pa.float64()),
+        ('productos_vendidos', pa.int64()),
+    ] + _VENTAS),
+    'kpi_proveedores_mes': pa.schema([
+        ('mes', pa.string()),
+        ('proveedor', pa.string()),
+        ('productos_vendidos', pa.int64()),
+    ] + _VENTAS),
+    'kpi_clientes': pa.schema([
+        ('cliente_id', pa.int64()),
+        ('cliente', pa.string()),
+        ('email', pa.string()),
+        ('ciudad', pa.string()),
+        ('pais', pa.string()),
+        ('num_ordenes', pa.int64()),
+        ('gasto_total', pa.float64()),
+        ('ticket_promedio', pa.float64()),
+        ('primera_compra', pa.timestamp('ms')),
+        ('ultima_compra', pa.timestamp('ms')),
+    ]),
+    'kpi_clientes_mes': pa.schema([
+        ('mes', pa.string()),
+        ('cliente_id', pa.int64()),
+        ('num_ordenes', pa.int64()),
+        ('gasto_total', pa.float64()),
+    ]),
+    'kpi_resumen': pa.schema([
+        ('total_ventas', pa.float64()),
+        ('total_ordenes', pa.int64()),
+        ('ticket_promedio', pa.float64()),
+        ('unidades_vendidas', pa.int64()),
+        ('productos_activos', pa.int64()),
+        ('clientes_activos', pa.int64()),
+        ('proveedores_activos', pa.int64()),
+        ('stock_total', pa.int64()),
+        ('fecha_calculo', pa.timestamp('ms')),
+    ]),
+}
+
+
+class Ventas:
+    """Acumulado de líneas de orden de un producto, categoría o proveedor"""
+    __slots__ = ('unidades', 'ingresos', 'ordenes', 'lineas', 'suma_precio',
+                 'productos')
+
+    def __init__(self):
+        self.unidades = 0
+        self.ingresos = 0.0
+        self.ordenes = 0
+        self.lineas = 0
+        self.suma_precio = 0.0
+        self.productos = set()
+
+    def agregar(self, detalle):
+        self.unidades += detalle.get('cantidad') or 0
+        self.ingresos += detalle.get('subtotal') or 0.0
+        if detalle.get('precio_unitario') is not None:
+            self.lineas += 1
+            self.suma_precio += detalle['precio_unitario']
+        self.productos.add(detalle.get('producto_id'))
+
+    def columnas(self):
+        return {
+            'unidades_vendidas': self.unidades,
+            'ingresos_totales': self.ingresos,
+            'num_ordenes': self.ordenes,
+            'precio_promedio': (self.suma_precio / self.lineas
+                                if self.lineas else None),
+        }
+
+
+class Periodo:
+    """Acumulado de órdenes de un día o un mes"""
+    __slots__ = ('ordenes', 'ingresos', 'unidades', 'clientes', 'productos')
+
+    def __init__(self):
+        self.ordenes = 0
+        self.ingresos = 0.0
+        self.unidades = 0
+        self.clientes = set()
+        self.productos = set()
+
+    def columnas(self):
+        return {
+            'num_ordenes': self.ordenes,
+            'ingresos_totales': self.ingresos,
+            'ticket_promedio': (self.ingresos / self.ordenes
+                                if self.ordenes else None),
+            'unidades_vendidas': self.unidades,
+            'clientes_unicos': len(self.clientes),
+        }
+
+
+def _mes(fecha):
+    return f"{fecha.year}-{fecha.month:02d}"
+
+
+def _iso(fecha):
+    return fecha.isoformat() if fecha else None
+
+
+def calcular_kpis(productos, ordenes, clientes=(), proveedores=None,
+                  fecha_calculo=None):
+    """Calcular las tablas KPI; retorna {tabla: lista de filas}
+
+    `productos`, `ordenes` y `clientes` son iterables de registros aplanados
+    (las órdenes con sus líneas en 'detalles'); de `proveedores`, si se
+    indica, sólo se cuentan los activos. La categoría y el proveedor de cada
+    línea son los actuales del producto, como en un join con `productos`.
+    """
+    catalogo = {p['id']: p for p in productos}
+
+    diarias = defaultdict(Periodo)
+    mensuales = defaultdict(Periodo)
+    por_producto = defaultdict(Ventas)
+    por_producto_mes = defaultdict(Ventas)
+    por_categoria = defaultdict(Ventas)
+    por_categoria_mes = defaultdict(Ventas)
+    por_proveedor = defaultdict(Ventas)
+    por_proveedor_mes = defaultdict(Ventas)
+    # cliente_id -> [ordenes, gasto, primera, ultima]
+    por_cliente = {}
+    # (mes, cliente_id) -> [ordenes, gasto]
+    por_cliente_mes = defaultdict(lambda: [0, 0.0])
+    # Nombre de los productos vendidos que ya no están en el catálogo
+    nombres = {}
+    total_ventas = 0.0
+    total_ordenes = 0
+
+    for orden in ordenes:
+        total = orden.get('total') or 0.0
+        total_ventas += total
+        total_ordenes += 1
+        fecha = (datetime.fromisoformat(orden['fecha_orden'])
+                 if orden.get('fecha_orden') else None)
+        mes = _mes(fecha) if fecha else None
+        cliente_id = orden.get('cliente_id')
+
+        periodos = [diarias[fecha.date()], mensuales[mes]] if fecha else []
+        for periodo in periodos:
+            periodo.ordenes += 1
+            periodo.ingresos += total
+            if cliente_id is not None:
+                periodo.clientes.add(cliente_id)
+
+        if cliente_id is not None:
+            cliente = por_cliente.setdefault(cliente_id, [0, 0.0, None, None])
+            cliente[0] += 1
+            cliente[1] += total
+            if fecha:
+                cliente[2] = min(cliente[2] or fecha, fecha)
+                cliente[3] = max(cliente[3] or fecha, fecha)
+                por_cliente_mes[(mes, cliente_id)][0] += 1
+                por_cliente_mes[(mes, cliente_id)][1] += total
+
+        # Acumulados en los que aparece la orden: se cuenta una sola vez
+        # aunque tenga varias líneas del mismo producto o categoría
+        tocados = {}
+        for detalle in orden.get('detalles') or []:
+            producto_id = detalle.get('producto_id')
+            producto = catalogo.get(producto_id)
+            if producto is None:
+                nombres.setdefault(producto_id, detalle.get('nombre_producto'))
+                producto = {}
+            categoria = producto.get('categoria')
+            proveedor = producto.get('proveedor')
+
+            acumulados = [por_producto[producto_id], por_categoria[categoria],
+                          por_proveedor[proveedor]]
+            if mes:
+                acumulados += [por_producto_mes[(mes, producto_id)],
+                               por_categoria_mes[(mes, categoria)],
+                               por_proveedor_mes[(mes, proveedor)]]
+            for acumulado in acumulados:
+                acumulado.agregar(detalle)
+                tocados[id(acumulado)] = acumulado
+            for periodo in periodos:
+                periodo.unidades += detalle.get('cantidad') or 0
+                periodo.productos.add(producto_id)
+
+        for acumulado in tocados.values():
+            acumulado.ordenes += 1
+
+    def datos_producto(producto_id):
+        producto = catalogo.get(producto_id, {})
+        return {
+            'producto_id': producto_id,
+            'producto': producto.get('nombre', nombres.get(producto_id)),
+            'categoria': producto.get('categoria'),
+            'proveedor': producto.get('proveedor'),
+        }
+
+    tablas = {}
+    tablas['kpi_ventas_diarias'] = [
+        {'fecha': fecha.isoformat(), **periodo.columnas()}
+        for fecha, periodo in sorted(diarias.items())]
+    tablas['kpi_ventas_mensuales'] = [
+        {'mes': mes, 'productos_vendidos': len(periodo.productos),
+         **periodo.columnas()}
+        for mes, periodo in sorted(mensuales.items())]
+
+    # Todos los productos del catálogo, también los que no se vendieron
+    tablas['kpi_productos'] = [
+        {**datos_producto(producto_id),
+         'precio': catalogo.get(producto_id, {}).get('precio'),
+         'stock': catalogo.get(producto_id, {}).get('stock'),
+         **por_producto.get(producto_id, Ventas()).columnas()}
+        for producto_id in set(catalogo) | set(por_producto)]
+    tablas['kpi_productos_mes'] = [
+        {'mes': mes, **datos_producto(producto_id), **ventas.columnas()}
+        for (mes, producto_id), ventas in por_producto_mes.items()]
+
+    catalogo_por = {'categoria': defaultdict(list),
+                    'proveedor': defaultdict(list)}
+    for producto in catalogo.values():
+        for campo, grupos in catalogo_por.items():
+            grupos[producto.get(campo)].append(producto)
+
+    por_categoria_total = catalogo_por['categoria']
+    tablas['kpi_categorias'] = [
+        {'categoria': categoria,
+         'num_productos': len(por_categoria_total.get(categoria, [])),
+         'stock_total': sum(p.get('stock') or 0
+                            for p in por_categoria_total.get(categoria, [])),
+         'productos_vendidos': len(ventas.productos),
+         **ventas.columnas()}
+        for categoria, ventas in (
+            (c, por_categoria.get(c, Ventas()))
+            for c in set(por_categoria_total) | set(por_categoria))]
+    tablas['kpi_categorias_mes'] = [
+        {'mes': mes, 'categoria': categoria,
+         'productos_vendidos': len(ventas.productos), **ventas.columnas()}
+        for (mes, categoria), ventas in por_categoria_mes.items()]
+
+    por_proveedor_total = catalogo_por['proveedor']
+    filas = []
+    for proveedor in set(por_proveedor_total) | set(por_proveedor):
+        ofrecidos = por_proveedor_total.get(proveedor, [])
+        precios = [p['precio'] for p in ofrecidos
+                   if p.get('precio') is not None]
+        ventas = por_proveedor.get(proveedor, Ventas())
+        filas.append({
+            'proveedor': proveedor,
+            'num_productos': len(ofrecidos),
+            'precio_promedio_productos': (sum(precios) / len(precios)
+                                          if precios else None),
+            'productos_vendidos': len(ventas.productos),
+            **ventas.columnas()})
+    tablas['kpi_proveedores'] = filas
+    tablas['kpi_proveedores_mes'] = [
+        {'mes': mes, 'proveedor': proveedor,
+         'productos_vendidos': len(ventas.productos), **ventas.columnas()}
+        for (mes, proveedor), ventas in por_proveedor_mes.items()]
+
+    datos_clientes = {c['id']: c for c in clientes}
+    tablas['kpi_clientes'] = [
+        {'cliente_id': cliente_id,
+         'cliente': datos_clientes.get(cliente_id, {}).get('nombre'),
+         'email': datos_clientes.get(cliente_id, {}).get('email'),
+         'ciudad': datos_clientes.get(cliente_id, {}).get('ciudad'),
+         'pais': datos_clientes.get(cliente_id, {}).get('pais'),
+         'num_ordenes': num_ordenes,
+         'gasto_total': gasto,
+         'ticket_promedio': gasto / num_ordenes,
+         'primera_compra': _iso(primera),
+         'ultima_compra': _iso(ultima)}
+        for cliente_id, (num_ordenes, gasto, primera, ultima)
+        in sorted(por_cliente.items())]
+    tablas['kpi_clientes_mes'] = [
+        {'mes': mes, 'cliente_id': cliente_id, 'num_ordenes': num_ordenes,
+         'gasto_total': gasto}
+        for (mes, cliente_id), (num_ordenes, gasto)
+        in sorted(por_cliente_mes.items())]
+
+    tablas['kpi_resumen'] = [{
+        'total_ventas': total_ventas,
+        'total_ordenes': total_ordenes,
+        'ticket_promedio': (total_ventas / total_ordenes
+                            if total_ordenes else None),
+        'unidades_vendidas': sum(v.unidades for v in por_producto.values()),
+        'productos_activos': len(catalogo),
+        'clientes_activos': len(por_cliente),
+        'proveedores_activos': (
+            sum(1 for p in proveedores if p.get('estado') == 'ACTIVO')
+            if proveedores is not None else None),
+        'stock_total': sum(p.get('stock') or 0 for p in catalogo.values()),
+        'fecha_calculo': _iso(fecha_calculo),
+    }]
+    return tablas
+
+
+def _registros(destino, estado, tabla):
+    """Registros vigentes de `tabla` según el estado de su fuente: la foto
+    con los deltas aplicados, o la foto JSON de una tabla auxiliar"""
+    if estado is None:
+        return None
+    if tabla is None:
+        return registros_vigentes(destino, estado)
+    foto = estado.get('auxiliares', {}).get(tabla)
+    return leer_registros(destino, foto) if foto else None
+
+
+def materializar(destino, timestamp):
+    """Recalcular las tablas KPI y escribirlas en parquet/kpi_*/; retorna
+    False si no se pudieron materializar"""
+    print("=" * 60)
+    print("📊 MATERIALIZACIÓN DE KPIs")
+    print("=" * 60)
+
+    metricas = Metricas('kpis')
+    with metricas.medir('estado'):
+        estados = {fuente: leer_estado(destino, fuente)
+                   for fuente in ('productos', 'ordenes', 'proveedores')}
+    faltantes = [f for f in ('productos', 'ordenes') if not estados[f]]
+    if faltantes:
+        print(f"✗ Sin foto de {', '.join(faltantes)}: se omiten los KPIs")
+        return False
+
+    clientes = _registros(destino, estados['ordenes'], 'clientes')
+    if clientes is None:
+        print("⚠ Sin foto de clientes: kpi_clientes queda sin nombres")
+    proveedores = _registros(destino, estados['proveedores'], None)
+    if proveedores is None:
+        print("⚠ Sin foto de proveedores: no se cuentan los activos")
+
+    try:
+        with metricas.medir('calculo'):
+            # Incluye la lectura en streaming de las fotos
+            tablas = calcular_kpis(
+                _registros(destino, estados['productos'], None),
+                _registros(destino, estados['ordenes'], None),
+                clientes or (), proveedores,
+                datetime.now(timezone.utc).replace(tzinfo=None))
+    except Exception as e:
+        print(f"✗ Error calculando los KPIs: {e}")
+        return False
+
+    completado = True
+    for tabla, filas in tablas.items():
+        escritor = EscritorParquet(destino, tabla, ESQUEMAS_KPI[tabla],
+                                   timestamp, None, metricas)
+        try:
+            with metricas.medir('escritura'):
+                for fila in filas:
+                    escritor.agregar(fila)
+                escritor.completar()
+        except Exception as e:
+            escritor.abortar()
+            print(f"✗ Error escribiendo {tabla}: {e}")
+            completado = False
+
+    metricas.emitir()
+    return completado
@@ -0,0 +1,76 @@
+"""Tiempos por etapa de la ingesta de una fuente"""
+from contextlib import contextmanager
+import json
+import threading
+import time
+
+
+class Metricas:
+    """Segundos y cantidad de veces acumulados por etapa
+
+    Las etapas que corren en varios hilos a la vez (las peticiones HTTP de
+    páginas en paralelo, las partes que se suben en segundo plano) suman el
+    tiempo de todos los hilos, así que pueden superar la duración total.
+    """
+
+    def __init__(self, fuente):
+        self.fuente = fuente
+        self.inicio = time.monotonic()
+        self.etapas = {}
+        self.contadores = {}
+        self._lock = threading.Lock()
+
+    def sumar(self, etapa, segundos):
+        with self._lock:
+            total, veces = self.etapas.get(etapa, (0.0, 0))
+            self.etapas[etapa] = (total + segundos, veces + 1)
+
+    def contar(self, nombre, cantidad=1):
+        with self._lock:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+
+    @contextmanager
+    def medir(self, etapa):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sumar(etapa, time.perf_counter() - inicio)
+
+    def medir_iterable(self, iterable, etapa):
+        """Iterar `iterable` sumando a `etapa` el tiempo de obtener cada
+        elemento (para una extracción: red, espera y aplanado)"""
+        iterador = iter(iterable)
+        try:
+            while True:
+                inicio = time.perf_counter()
+                try:
+                    elemento = next(iterador)
+                except StopIteration:
+                    return
+                finally:
+                    self.sumar(etapa, time.perf_counter() - inicio)
+                yield elemento
+        finally:
+            # Si se deja de consumir, el extractor libera sus hilos ya
+            if hasattr(iterador, 'close'):
+                iterador.close()
+
+    def resumen(self):
+        return {
+            'fuente': self.fuente,
+            'segundos': round(time.monotonic() - self.inicio, 3),
+            'etapas': {etapa: {'segundos': round(total, 3), 'veces': veces}
+                       for etapa, (total, veces) in sorted(self.etapas.items())},
+            'contadores': dict(self.contadores),
+        }
+
+    def emitir(self):
+        """Imprimir el resumen legible y en una línea JSON (para CloudWatch
+        Logs Insights u otra herramienta que lea la salida)"""
+        resumen = self.resumen()
+        print(f"⏱  {self.fuente}: {resumen['segundos']}s en total")
+        for etapa, valores in resumen['etapas'].items():
+            print(f"   {etapa:<22} {valores['segundos']:>9.3f}s "
+                  f"({valores['veces']} veces)")
+        print(json.dumps({'metricas_ingesta': resumen}, ensure_ascii=False))
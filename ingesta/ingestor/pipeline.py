@@ -0,0 +1,234 @@
+"""Ejecución de la ingesta de una fuente: foto completa o delta incremental
+con compactación, y las tablas auxiliares que la acompañan
+
+Los registros pasan en streaming de la fuente a los escritores de formato y
+de ahí al destino; ninguna etapa acumula la tabla en memoria.
+"""
+from datetime import datetime, timedelta
+import json
+
+from .config import (COMPACTAR_CADA, ESCRIBIR_PARQUET, INGESTA_MODO,
+                     MARGEN_WATERMARK_SEGUNDOS)
+from .formatos import (EscritorCSV, EscritorDerivado, EscritorJSON,
+                       EscritorParquet, registros_json)
+
+
+def calcular_watermark(*fechas):
+    """Mayor de las fechas ISO indicadas, ignorando las vacías"""
+    fechas = [datetime.fromisoformat(f) for f in fechas if f]
+    return max(fechas).isoformat() if fechas else None
+
+
+def escribir_registros(tabla, registros, escritores, metricas,
+                       etapa='extraccion'):
+    """Escribir en una sola pasada un iterable de registros aplanados con
+    todos los `escritores`, a medida que se extraen; el tiempo de obtener
+    cada registro se suma a `etapa`
+
+    Retorna {'registros', 'watermark'}; si no hubo registros no se crea
+    ningún objeto. Si la extracción o la subida fallan se descarta todo lo
+    escrito y se retorna None: nunca queda un objeto a medias.
+    """
+    total = 0
+    watermark = None
+
+    try:
+        for registro in metricas.medir_iterable(registros, etapa):
+            for escritor in escritores:
+                with metricas.medir(f'escritura_{escritor.formato}'):
+                    escritor.agregar(registro)
+
+            total += 1
+            if registro.get('fecha_actualizacion'):
+                fecha = datetime.fromisoformat(registro['fecha_actualizacion'])
+                if watermark is None or fecha > watermark:
+                    watermark = fecha
+
+        if not total:
+            for escritor in escritores:
+                escritor.abortar()
+            return {'registros': 0, 'watermark': None}
+
+        for escritor in escritores:
+            with metricas.medir(f'escritura_{escritor.formato}'):
+                escritor.completar()
+    except Exception as e:
+        print(f"✗ Error escribiendo {tabla}: {e}")
+        for escritor in escritores:
+            escritor.abortar()
+        return None
+
+    metricas.contar(f'registros_{tabla}', total)
+    return {'registros': total,
+            'watermark': watermark.isoformat() if watermark else None}
+
+
+def leer_registros(destino, key):
+    """Iterar los registros de una foto o delta JSON sin cargarlo entero"""
+    return registros_json(destino.lineas(key))
+
+
+def leer_estado(destino, fuente):
+    """Watermark, foto vigente y deltas pendientes de una fuente"""
+    estado = destino.leer(f"_estado/{fuente}.json")
+    return json.loads(estado) if estado else None
+
+
+def guardar_estado(destino, fuente, estado):
+    estado['actualizado'] = datetime.now().isoformat()
+    destino.escribir(f"_estado/{fuente}.json", json.dumps(estado, indent=2),
+                     'application/json')
+
+
+def guardar_foto(destino, tabla, registros, timestamp, formatos, esquema,
+                 particion, metricas, etapa='extraccion', derivadas=()):
+    """Escribir en streaming la foto completa de una tabla en los `formatos`
+    indicados (el JSON siempre, es el que usa la compactación), y en Parquet
+    las tablas `derivadas` de sus registros; retorna el resumen de
+    escribir_registros con la clave JSON en 'foto', o None si no se
+    completó"""
+    json_key = f"{tabla}/{tabla}_{timestamp}.json"
+    escritores = []
+    if 'csv' in formatos:
+        escritores.append(EscritorCSV(destino.abrir(
+            f"{tabla}/{tabla}_{timestamp}.csv", 'text/csv', metricas)))
+    escritores.append(EscritorJSON(
+        destino.abrir(json_key, 'application/json', metricas)))
+    if 'parquet' in formatos and ESCRIBIR_PARQUET:
+        escritores.append(EscritorParquet(destino, tabla, esquema, timestamp,
+                                          particion, metricas))
+        for derivada in derivadas:
+            escritores.append(EscritorDerivado(
+                EscritorParquet(destino, derivada.nombre, derivada.esquema,
+                                timestamp, None, metricas),
+                derivada.expandir))
+
+    resultado = escribir_registros(tabla, registros, escritores, metricas,
+                                   etapa)
+    if resultado:
+        resultado['foto'] = json_key
+    return resultado
+
+
+def registros_vigentes(destino, estado):
+    """Iterar los registros actuales de una tabla: la foto vigente con los
+    deltas pendientes aplicados
+
+    Sólo los cambios pendientes se cargan en memoria; la foto se recorre en
+    streaming. Los deltas se aplican en orden: la versión más reciente de
+    cada id gana.
+    """
+    cambios = {}
+    for delta_key in estado['deltas']:
+        for registro in leer_registros(destino, delta_key):
+            cambios[registro['id']] = registro
+
+    for registro in leer_registros(destino, estado['foto']):
+        yield cambios.pop(registro['id'], registro)
+    # Lo que queda son altas posteriores a la foto
+    yield from sorted(cambios.values(), key=lambda r: r['id'])
+
+
+def compactar(fuente, destino, estado, timestamp):
+    """Aplicar los deltas pendientes sobre la foto vigente y subir una nueva"""
+    print(f"🗜  Compactando {len(estado['deltas'])} deltas de "
+          f"{fuente.nombre}...")
+
+    resultado = guardar_foto(destino, fuente.nombre,
+                             registros_vigentes(destino, estado), timestamp,
+                             fuente.formatos, fuente.esquema,
+                             fuente.particion, fuente.metricas, 'lectura_foto',
+                             fuente.tablas_derivadas())
+    if not resultado or not resultado['registros']:
+        # Se conservan los deltas para reintentar en la próxima ejecución
+        return False
+    estado['foto'] = resultado['foto']
+    estado['deltas'] = []
+    print(f"✓ Foto compactada: {resultado['registros']} registros")
+    return True
+
+
+def ingestar_principal(fuente, destino, timestamp, modo):
+    """Ingesta completa o incremental de la tabla principal de la fuente
+    según `modo` y el estado guardado; True si se completó"""
+    metricas = fuente.metricas
+    with metricas.medir('estado'):
+        estado = leer_estado(destino, fuente.nombre)
+
+    if modo != 'incremental' or not estado:
+        resultado = guardar_foto(destino, fuente.nombre, fuente.extraer(),
+                                 timestamp, fuente.formatos, fuente.esquema,
+                                 fuente.particion, metricas,
+                                 derivadas=fuente.tablas_derivadas())
+        if resultado and resultado['registros']:
+            with metricas.medir('estado'):
+                guardar_estado(destino, fuente.nombre, {
+                    'watermark': resultado['watermark'],
+                    'foto': resultado['foto'],
+                    'deltas': [],
+                    'auxiliares': (estado or {}).get('auxiliares', {})
+                })
+        return resultado is not None
+
+    if estado['watermark']:
+        desde = (datetime.fromisoformat(estado['watermark']) -
+                 timedelta(seconds=MARGEN_WATERMARK_SEGUNDOS)).isoformat()
+    else:
+        # Sin watermark (sin fechas previas) se toman todas las modificaciones
+        desde = fuente.desde_sin_watermark
+
+    delta_key = (f"cdc/{fuente.nombre}/fecha={timestamp[:8]}/"
+                 f"{fuente.nombre}_{timestamp}.json")
+    resultado = escribir_registros(
+        fuente.nombre, fuente.extraer_modificados(desde),
+        [EscritorJSON(destino.abrir(delta_key, 'application/json', metricas))],
+        metricas)
+    if resultado is None:
+        # Sin el delta completo guardado el watermark no debe avanzar
+        return False
+    if resultado['registros']:
+        estado['deltas'].append(delta_key)
+        estado['watermark'] = calcular_watermark(
+            estado['watermark'], resultado['watermark'])
+
+    completado = True
+    if len(estado['deltas']) >= COMPACTAR_CADA:
+        with metricas.medir('compactacion'):
+            completado = compactar(fuente, destino, estado, timestamp)
+    with metricas.medir('estado'):
+        guardar_estado(destino, fuente.nombre, estado)
+    return completado
+
+
+def ingestar(fuente, destino, timestamp, modo=INGESTA_MODO):
+    """Ingesta de una fuente: la tabla principal y luego sus tablas
+    auxiliares (pequeñas, siempre completas); True si todo se completó"""
+    print("=" * 60)
+    print(f"🚀 INGESTA DE {fuente.nombre.upper()} - Inicio")
+    print("=" * 60)
+
+    completado = ingestar_principal(fuente, destino, timestamp, modo)
+    fotos = {}
+    for tabla in fuente.tablas_auxiliares():
+        resultado = guardar_foto(destino, tabla.nombre, tabla.extraer(),
+                                 timestamp, tabla.formatos, tabla.esquema,
+                                 None, fuente.metricas)
+        completado = completado and resultado is not None
+        if resultado and resultado['registros']:
+            fotos[tabla.nombre] = resultado['foto']
+
+    # La foto JSON vigente de cada tabla auxiliar queda en el estado de la
+    # fuente (la usa la materialización de KPIs)
+    if fotos:
+        with fuente.metricas.medir('estado'):
+            estado = leer_estado(destino, fuente.nombre)
+            if estado:
+                estado.setdefault('auxiliares', {}).update(fotos)
+                guardar_estado(destino, fuente.nombre, estado)
+
+    print("=" * 60)
+    print(f"{'✓' if completado else '✗'} INGESTA DE {fuente.nombre.upper()} - "
+          f"{'Completada' if completado else 'Incompleta'}")
+    print("=" * 60)
+    fuente.metricas.emitir()
+    return completado